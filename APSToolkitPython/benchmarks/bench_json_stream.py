@@ -0,0 +1,102 @@
+"""
+Benchmark of decoding a synthetic objects_vals.json.gz: the json.loads of the whole decompressed file
+against the chunked :class:`JsonStream` decode, into a list and into a :class:`ValuePool`.
+Every mode runs in its own process to measure its peak memory.
+
+usage: python bench_json_stream.py [count]
+"""
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+MODES = ["json_loads", "stream_list", "json_pool", "stream_pool"]
+
+
+def write_vals(path, count):
+    rnd = random.Random(0)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("[0")
+        for i in range(1, count):
+            kind = i % 10
+            if kind < 4:
+                value = f"Element {i} - {rnd.choice(['Wall', 'Door', 'Window', 'Floor'])}"
+            elif kind < 7:
+                value = rnd.random() * 10000
+            elif kind < 9:
+                value = rnd.randint(0, 10 ** 9)
+            else:
+                value = "%08x-%04x-%012x" % (rnd.getrandbits(32), rnd.getrandbits(16), rnd.getrandbits(48))
+            f.write("," + json.dumps(value))
+        f.write("]")
+
+
+def peak_memory_mb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on linux, bytes on macOS
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+
+
+def run(mode, path):
+    try:
+        import resource
+    except ImportError:
+        # no getrusage on windows, fall back to the python allocations
+        import tracemalloc
+        tracemalloc.start()
+    import codecs
+    from aps_toolkit.JsonStream import JsonStream
+    from aps_toolkit.PropColumns import ValuePool, ValuePoolBuilder
+    before = peak_memory_mb()
+    start = time.perf_counter()
+    if mode == "json_loads":
+        with open(path, "rb") as f:
+            values = json.loads(codecs.decode(gzip.decompress(f.read()), "utf-8"))
+        count = len(values)
+    elif mode == "json_pool":
+        with open(path, "rb") as f:
+            values = ValuePool.from_list(json.loads(codecs.decode(gzip.decompress(f.read()), "utf-8")))
+        count = len(values)
+    elif mode == "stream_list":
+        values = JsonStream.load_gzip(path)
+        count = len(values)
+    else:
+        builder = ValuePoolBuilder()
+        for batch in JsonStream.iter_gzip_batches(path):
+            builder.extend(batch)
+        values = builder.build()
+        count = len(values)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "count": count, "seconds": elapsed, "peak_mb": peak_memory_mb() - before}))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "objects_vals.json.gz")
+        write_vals(path, count)
+        print(f"{count} values, {os.path.getsize(path) / 1024 ** 2:.1f} MB compressed")
+        print(f"{'mode':<12} {'seconds':>8} {'peak MB':>8}")
+        for mode in MODES:
+            output = subprocess.run([sys.executable, __file__, "--run", mode, path], capture_output=True, text=True,
+                                    check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['mode']:<12} {result['seconds']:>8.2f} {result['peak_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,172 @@
+"""
+Benchmark of SVFMesh.parse_mesh on a RAW OpenCTM mesh pack, decoded by chunks with np.frombuffer, against
+the previous decoding reading one value at a time. Without a path, a synthetic pack of 1M triangles is written to a temporary folder.
+
+usage: python bench_mesh_raw.py [path/to/<n>.pf] [triangles]
+"""
+import gzip
+import math
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+MESH_TYPE = "Autodesk.CloudPlatform.OpenCTM"
+
+
+def varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def string(value):
+    data = value.encode("utf-8")
+    return varint(len(data)) + data
+
+
+def raw_mesh(triangles, rnd):
+    """
+    Write one RAW OpenCTM entry: a grid of vertices with normals not of unit length, one uv map and colors
+    """
+    vcount = triangles // 2 + 2
+    body = bytearray(b"OCTM" + struct.pack("<i", 5) + b"RAW\0")
+    body += struct.pack("<5i", vcount, triangles, 1, 1, 1) + struct.pack("<i", 0)
+    body += b"INDX" + rnd.integers(0, vcount, triangles * 3, dtype="<u4").tobytes()
+    body += b"VERT" + rnd.uniform(-100, 100, vcount * 3).astype("<f4").tobytes()
+    body += b"NORM" + rnd.uniform(-2, 2, vcount * 3).astype("<f4").tobytes()
+    body += b"TEXC" + struct.pack("<i", 2) + b"uv" + struct.pack("<i", 0)
+    body += rnd.random(vcount * 2).astype("<f4").tobytes()
+    body += b"ATTR" + struct.pack("<i", 5) + b"Color" + rnd.random(vcount * 4).astype("<f4").tobytes()
+    return bytes(body)
+
+
+def write_pack(path, triangles):
+    rnd = np.random.default_rng(0)
+    # split the triangles in meshes of 64k triangles at most, as in the mesh packs of a model
+    sizes = [65536] * (triangles // 65536) + ([triangles % 65536] if triangles % 65536 else [])
+    body = bytearray(string("Autodesk.CloudPlatform.PackFile") + struct.pack("<i", 1))
+    offsets = []
+    for size in sizes:
+        offsets.append(len(body))
+        body += struct.pack("<I", 0) + raw_mesh(size, rnd)
+    entries_offset = len(body)
+    body += varint(len(offsets)) + b"".join(struct.pack("<I", offset) for offset in offsets)
+    types_offset = len(body)
+    body += varint(1) + string("Autodesk.CloudPlatform.Geometry") + string(MESH_TYPE) + varint(1)
+    body += struct.pack("<II", entries_offset, types_offset)
+    with open(path, "wb") as f:
+        f.write(gzip.compress(bytes(body), compresslevel=1))
+
+
+def parse_mesh_raw_loop(pfr):
+    """
+    The previous decoding of a RAW mesh, one value at a time
+    """
+    vcount, tcount, uvcount, attrs, flags = [pfr.get_int32() for _ in range(5)]
+    pfr.get_string(pfr.get_int32())
+    pfr.get_string(4)
+    indices = [pfr.get_uint32() for _ in range(tcount * 3)]
+    pfr.get_string(4)
+    vertices = []
+    min_values = [float('inf')] * 3
+    max_values = [float('-inf')] * 3
+    for _ in range(vcount):
+        x, y, z = pfr.get_float32(), pfr.get_float32(), pfr.get_float32()
+        min_values = [min(x, min_values[0]), min(y, min_values[1]), min(z, min_values[2])]
+        max_values = [max(x, max_values[0]), max(y, max_values[1]), max(z, max_values[2])]
+        vertices.extend([x, y, z])
+    normals = None
+    if flags & 1 != 0:
+        pfr.get_string(4)
+        normals = []
+        for _ in range(vcount):
+            x, y, z = pfr.get_float32(), pfr.get_float32(), pfr.get_float32()
+            dot = x * x + y * y + z * z
+            if dot != 1.0:
+                length = math.sqrt(dot)
+                x /= length
+                y /= length
+                z /= length
+            normals.extend([x, y, z])
+    uvmaps = []
+    for _ in range(uvcount):
+        pfr.get_string(4)
+        pfr.get_string(pfr.get_int32())
+        pfr.get_string(pfr.get_int32())
+        uvs = []
+        for _ in range(vcount):
+            u, v = pfr.get_float32(), 1.0 - pfr.get_float32()
+            uvs.extend([u, v])
+        uvmaps.append(uvs)
+    colors = None
+    if attrs > 0:
+        pfr.get_string(4)
+        for _ in range(attrs):
+            if pfr.get_string(pfr.get_int32()) == "Color":
+                colors = [pfr.get_float32() for _ in range(vcount * 4)]
+            else:
+                pfr.seek(pfr.offset + vcount * 4)
+    return indices, vertices, normals, uvmaps, colors, min_values, max_values
+
+
+def parse_mesh_loop(buffer):
+    from aps_toolkit.PackFileReader import PackFileReader
+    meshes = []
+    pfr = PackFileReader(buffer)
+    for i in range(pfr.num_entries()):
+        pfr.seek_entry(i)
+        pfr.get_string(4)
+        pfr.get_int32()
+        pfr.get_string(4)
+        meshes.append(parse_mesh_raw_loop(pfr))
+    return meshes
+
+
+def main():
+    from aps_toolkit import SVFMesh
+    path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    triangles = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 1000000
+    if path is None:
+        import shutil
+        import tempfile
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, "0.pf")
+        try:
+            write_pack(path, triangles)
+            with open(path, "rb") as f:
+                buffer = f.read()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    else:
+        with open(path, "rb") as f:
+            buffer = f.read()
+    start = time.perf_counter()
+    meshes = SVFMesh.parse_mesh(buffer)
+    vectorized = time.perf_counter() - start
+    print(f"{len(meshes)} meshes, {sum(mesh.t_count for mesh in meshes if mesh is not None)} triangles, "
+          f"{len(buffer) / 2 ** 20:.1f} MB pack")
+    print(f"np.frombuffer  {vectorized:8.3f} s")
+    start = time.perf_counter()
+    expected = parse_mesh_loop(buffer)
+    loop = time.perf_counter() - start
+    print(f"value by value {loop:8.3f} s  speedup {loop / vectorized:6.1f}x")
+    same = all(np.array_equal(mesh.indices, indices) and np.array_equal(mesh.vertices, vertices)
+               and np.allclose(mesh.normals, normals, atol=1e-6) and mesh.min == min_values and mesh.max == max_values
+               and np.allclose(mesh.uv_maps[0]["uvs"], uvmaps[0]) and np.array_equal(mesh.colors, colors)
+               for mesh, (indices, vertices, normals, uvmaps, colors, min_values, max_values) in zip(meshes, expected))
+    print(f"same {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark of PropDbReaderRevit.get_all_data read in one process and in pools of 2 to 16 worker processes
+(workers=N). The database is converted to the columns sidecar first, so the workers memory-map it.
+Without a path, a synthetic Revit model is written to a temporary folder, removed at the end.
+The speedup is only meaningful with as many cpus as workers, run it on a multi-core machine to measure the scaling.
+
+usage: python bench_parallel_extract.py [path/to/Resource] [max_workers]
+"""
+import gzip
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+CATEGORIES, FAMILIES, TYPES, INSTANCES = 64, 8, 4, 60
+
+
+def write_model(path):
+    """
+    Write the objects_*.json.gz files of a model: root -> category -> family -> type -> instances,
+    each instance is instance of a symbol object holding the type parameters
+    """
+    rnd = random.Random(0)
+    attrs = [0, ["child", "__child__", 11], ["parent", "__parent__", 11], ["instanceof_objid", "__instanceof__", 11],
+             ["name", "__name__", 20], ["_RC", "__revit__", 20], ["_RFN", "__revit__", 20], ["_RFT", "__revit__", 20],
+             ["Category", "__category__", 20], ["ElementId", "__revit__", 20],
+             ["Width", "Dimensions", 3, "autodesk.unit.unit:millimeters-1.0.1"],
+             ["Area", "Dimensions", 3, "autodesk.unit.unit:squareMeters-1.0.1"], ["Level", "Constraints", 20],
+             ["Comments", "Identity Data", 20]]
+    # name, category, data_type, data_type_context, description, display_name, flags, precision, forge id
+    attrs = [attrs[0]] + [(row + [None])[:4] + [None, row[0], 0, None, None] for row in attrs[1:]]
+    child, parent, instance_of, name, rc, rfn, rft, category, element_id, width, area, level, comments = range(1, 14)
+    vals, val_ids = [0], {}
+    nodes = [None, []]
+
+    def value(v):
+        if (type(v), v) not in val_ids:
+            val_ids[(type(v), v)] = len(vals)
+            vals.append(v)
+        return val_ids[(type(v), v)]
+
+    def node(parent_id, props):
+        nodes.append(props + ([(parent, value(parent_id))] if parent_id else []))
+        if parent_id:
+            nodes[parent_id].append((child, value(len(nodes) - 1)))
+        return len(nodes) - 1
+
+    nodes[1] = [(name, value("Model"))]
+    eid = 100000
+    for c in range(CATEGORIES):
+        cname = f"Category {c}"
+        category_id = node(1, [(name, value(cname)), (rc, value(cname))])
+        for f in range(FAMILIES):
+            fname = f"Family {c}-{f}"
+            family_id = node(category_id, [(name, value(fname)), (rc, value(cname)), (rfn, value(fname))])
+            for t in range(TYPES):
+                tname = f"Type {c}-{f}-{t}"
+                type_id = node(family_id, [(name, value(tname)), (rc, value(cname)), (rfn, value(fname)),
+                                           (rft, value(tname)), (category, value("Revit Family Type"))])
+                symbol_id = node(None, [(name, value(tname)), (width, value(float(rnd.randint(100, 2000)))),
+                                        (comments, value(f"symbol {tname}"))])
+                for _ in range(INSTANCES):
+                    eid += 1
+                    node(type_id, [(name, value(f"{fname} [{eid}]")), (instance_of, value(symbol_id)),
+                                   (element_id, value(str(eid))), (area, value(round(rnd.random() * 50, 3))),
+                                   (level, value(f"Level {rnd.randint(1, 9)}")), (category, value(f"Revit {cname}"))])
+    ids, offsets, avs = [""], [0], []
+    for i in range(1, len(nodes)):
+        ids.append("%032x-%08x" % (rnd.getrandbits(128), i))
+        offsets.append(len(avs) // 2)
+        for attr_id, val_id in nodes[i]:
+            avs.extend([attr_id, val_id])
+    os.makedirs(path, exist_ok=True)
+    for file_name, data in zip(["ids", "offs", "avs", "attrs", "vals"], [ids, offsets, avs, attrs, vals]):
+        with open(os.path.join(path, f"objects_{file_name}.json.gz"), "wb") as f:
+            f.write(gzip.compress(json.dumps(data).encode("utf-8")))
+
+
+def main():
+    from aps_toolkit import PropDbReaderRevit
+    path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    max_workers = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 16
+    temp_dir = None
+    if path is None:
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, "Resource")
+        write_model(path)
+    try:
+        run(PropDbReaderRevit, path, max_workers)
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def run(reader_class, path, max_workers):
+    reader_class.convert_resource(path)
+    reader = reader_class.read_from_resource(path)
+    print(f"{len(reader.offsets) - 1} objects, {len(reader.get_all_categories())} categories, "
+          f"{os.cpu_count()} cpus")
+    if os.cpu_count() < max_workers:
+        print(f"warning: {os.cpu_count()} cpus for up to {max_workers} workers, the speedup does not show the scaling")
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        dataframe = reader.get_all_data(workers=workers)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline, expected = elapsed, dataframe
+        same = dataframe.equals(expected)
+        print(f"workers {workers:3d}  {elapsed:8.3f} s  speedup {baseline / elapsed:5.2f}x  "
+              f"rows {len(dataframe)}  same {same}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
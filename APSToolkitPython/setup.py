@@ -24,7 +24,7 @@ setuptools.setup(
     package_dir={"": "src"},
     packages=setuptools.find_packages(where="src"),
     python_requires=">=3.9",
-    install_requires=['requests', 'pandas'],
+    install_requires=['requests', 'pandas', 'numpy'],
     include_package_data=True,
     data_files=[('aps_toolkit/units', ['src/aps_toolkit/units/units.json'])]
 )
@@ -28,16 +28,32 @@ from .PathInfo import PathInfo
 from .Resource import Resource
 from .ManifestItem import ManifestItem
 from .Token import Token
+from .DerivativeCache import DerivativeCache
 import json
+import hashlib
 import pandas as pd
 import time
 
 class Derivative:
-    def __init__(self, urn: str, token: Token, region: str = "US"):
+    def __init__(self, urn: str, token: Token, region: str = "US", cache_dir: str = None):
+        """
+        :param urn: the urn of the model
+        :param token: the token authentication
+        :param region: the region of hub (default is US)
+        :param cache_dir: directory of a local :class:`DerivativeCache` to keep downloaded resources,
+        a :class:`DerivativeCache` is also accepted to set the cache size. The resources are keyed by the
+        version of their manifest item, a hash of the assets of the svf manifest, so a translation again of
+        the model gets new keys and the old entries are evicted as least recently used.
+        """
         self.urn = urn
         self.token = token
         self.region = region
         self.host = "https://developer.api.autodesk.com"
+        self.cache = None
+        if isinstance(cache_dir, DerivativeCache):
+            self.cache = cache_dir
+        elif cache_dir:
+            self.cache = DerivativeCache(cache_dir)
 
     def translate_job(self, root_file_name: str, type: str = "svf", generate_master_views: bool = False):
         url = "https://developer.api.autodesk.com/modelderivative/v2/designdata/job"
@@ -232,7 +248,8 @@ class Derivative:
                         mime = c["mime"]
                         # add svf files
                         path_info.files.append(path_info.root_file_name)
-                        manifest_items.append(ManifestItem(guid, mime, path_info, urn_json))
+                        version = self._get_assets_version(json_content)
+                        manifest_items.append(ManifestItem(guid, mime, path_info, urn_json, version))
                     # case mapping image with svf
                     if "type" in c and c["role"] == "thumbnail":
                         guid = c["guid"]
@@ -269,7 +286,7 @@ class Derivative:
             myUri = "file://" + manifest_item.path_info.base_path + file
             remote_path = join(derivative_path, unquote(myUri)[len("file://"):])
             remote_path = normpath(remote_path)
-            resources.append(Resource(file_name, remote_path, local_path))
+            resources.append(Resource(file_name, remote_path, local_path, manifest_item.version))
         return resources
 
     def read_svf_resource(self) -> dict[str, List[Resource]]:
@@ -314,7 +331,6 @@ class Derivative:
             with zipfile.ZipFile(BytesIO(response.content)) as zip_file:
                 with zip_file.open("manifest.json") as manifest_data:
                     manifest_json = json_loads(manifest_data.read().decode("utf-8"))
-
         return manifest_json
 
     def read_svf_metadata(self, svf_urn: str):
@@ -368,6 +384,20 @@ class Derivative:
 
         return files
 
+    @staticmethod
+    def _get_assets_version(manifest) -> str:
+        """
+        Get the version of a svf manifest from its assets, which changes when the model is translated again.
+
+        Parameters:
+        manifest (dict): The svf manifest.
+
+        Returns:
+        str: The sha256 of the URI and sizes of the assets.
+        """
+        assets = [[asset.get("URI"), asset.get("size"), asset.get("usize")] for asset in manifest.get("assets", [])]
+        return hashlib.sha256(json.dumps(assets).encode("utf-8")).hexdigest()
+
     def _decompose_urn(self, encodedUrn: str):
         """
             Decomposes the given encoded URN into its constituent parts.
@@ -398,6 +428,13 @@ class Derivative:
         Returns:
         BytesIO: A stream containing the downloaded resource.
         """
+        # a resource without version (e.g. the IFC file) is not cached, its key could not change on a new translation
+        cache = self.cache if resource.version is not None else None
+        cache_key = DerivativeCache.make_key(self.urn, resource.version, resource.remote_path, "resource")
+        if cache is not None:
+            cached = cache.get_bytes(cache_key)
+            if cached is not None:
+                return BytesIO(cached)
         url = resource.url
         access_token = self.token.access_token
         if not access_token:
@@ -407,6 +444,8 @@ class Derivative:
             "region": self.region
         }
         response = requests.get(url, headers=headers)
+        if cache is not None and response.status_code == 200:
+            cache.put_bytes(cache_key, response.content)
         return BytesIO(response.content)
 
     def download_resource(self, resource: Resource, local_path: str) -> str:
@@ -0,0 +1,288 @@
+"""
+Copyright (C) 2024  chuongmep.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+import uuid
+
+
+class DerivativeCache:
+    """
+    Local content-addressed cache of derivative data. Every entry is a file or a directory named by the
+    sha256 of its key parts (e.g. urn, manifest guid, derivative version). The least recently used entries
+    are removed when the cache grows over max_size bytes.
+
+    The size of the entries is kept in an append-only index file, so adding an entry does not walk the cache,
+    the directory is only listed when entries must be evicted.
+    """
+    INDEX_NAME = ".index"
+    # a temporary entry older than this (in seconds) is left by a crashed writer and removed
+    TEMP_MAX_AGE = 3600
+    # evict down to this fraction of max_size, so the cache is not listed again on the next put
+    EVICT_RATIO = 0.9
+
+    def __init__(self, cache_dir: str, max_size: int = 2 * 1024 ** 3):
+        """
+        :param cache_dir: the directory of the cache, created if not exists
+        :param max_size: the maximum size of the cache in bytes, default is 2 GB
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes = None
+        self._total = 0
+        self._index_lines = 0
+        self._remove_temp()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Build the key of an entry from its parts, e.g. make_key(urn, guid, version, "properties")
+        :return: the sha256 hex digest of the parts
+        """
+        text = "\n".join("" if part is None else str(part) for part in parts)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str):
+        """
+        Get the path of an entry and mark it as recently used
+        :param key: the key from :meth:`make_key`
+        :return: the path of the entry or None if it is not cached
+        """
+        path = self.entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # not cached, or evicted by another process
+            return None
+        return path
+
+    def put(self, key: str, writer) -> str:
+        """
+        Add an entry. writer is called with a temporary path to write the file or directory,
+        which is then moved in place so readers never see a partial entry.
+        :param key: the key from :meth:`make_key`
+        :param writer: function taking the path to write
+        :return: the path of the entry
+        """
+        path = self.entry_path(key)
+        temp_path = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            writer(temp_path)
+            size = self._size(temp_path)
+            if os.path.exists(path):
+                self._remove(path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                self._remove(temp_path)
+        with self._lock:
+            self._load_index()
+            self._set_size(key, size)
+            over = self._total > self.max_size
+        if over:
+            self.evict(keep=key)
+        return path
+
+    def get_bytes(self, key: str):
+        """
+        Get the content of a file entry
+        :param key: the key from :meth:`make_key`
+        :return: bytes or None if it is not cached
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """
+        Add a file entry
+        :param key: the key from :meth:`make_key`
+        :param data: the content of the file
+        :return: the path of the entry
+        """
+
+        def write(path):
+            with open(path, "wb") as f:
+                f.write(data)
+
+        return self.put(key, write)
+
+    def entries(self) -> list:
+        """
+        Get the entries of the cache, least recently used first. The sizes come from the index, an entry
+        missing from the index (e.g. added by an older version) is measured once.
+        :return: list of tuple (key, size in bytes, last used time)
+        """
+        with self._lock:
+            self._load_index()
+            entries = []
+            found = set()
+            for name in os.listdir(self.cache_dir):
+                if name.startswith("."):
+                    continue
+                path = self.entry_path(name)
+                try:
+                    used = os.path.getmtime(path)
+                    size = self._sizes[name] if name in self._sizes else self._size(path)
+                except FileNotFoundError:
+                    continue
+                if self._sizes.get(name) != size:
+                    self._set_size(name, size)
+                found.add(name)
+                entries.append((name, size, used))
+            # drop the entries removed by another process
+            for name in [name for name in self._sizes if name not in found]:
+                self._set_size(name, None)
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def size(self) -> int:
+        """
+        Get the total size of the cache in bytes, from the index
+        """
+        with self._lock:
+            self._load_index()
+            return self._total
+
+    def evict(self, keep: str = None):
+        """
+        Remove the least recently used entries until the cache is under max_size * :attr:`EVICT_RATIO`
+        :param keep: a key which is never removed, e.g. the entry just added
+        """
+        entries = self.entries()
+        total = sum(entry[1] for entry in entries)
+        limit = self.max_size * self.EVICT_RATIO
+        for key, size, _ in entries:
+            if total <= limit:
+                break
+            if key == keep:
+                continue
+            self._remove(self.entry_path(key))
+            total -= size
+            with self._lock:
+                self._set_size(key, None)
+        self._compact_index()
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        for key, _, _ in self.entries():
+            self._remove(self.entry_path(key))
+        with self._lock:
+            self._sizes = {}
+            self._total = 0
+            self._write_index()
+
+    def _load_index(self):
+        """
+        Read the index once: lines "key size" add or replace an entry, "key -" remove it.
+        Without index, the entries are measured.
+        """
+        if self._sizes is not None:
+            return
+        self._sizes = {}
+        index_path = os.path.join(self.cache_dir, self.INDEX_NAME)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._index_lines += 1
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    if parts[1] == "-":
+                        self._sizes.pop(parts[0], None)
+                    else:
+                        self._sizes[parts[0]] = int(parts[1])
+        else:
+            for name in os.listdir(self.cache_dir):
+                if not name.startswith("."):
+                    self._sizes[name] = self._size(self.entry_path(name))
+            self._write_index()
+        self._total = sum(self._sizes.values())
+
+    def _set_size(self, key: str, size):
+        """
+        Update the size of an entry and append it to the index, None removes the entry
+        """
+        self._total -= self._sizes.pop(key, 0)
+        if size is not None:
+            self._sizes[key] = size
+            self._total += size
+        with open(os.path.join(self.cache_dir, self.INDEX_NAME), "a", encoding="utf-8") as f:
+            f.write(f"{key} {'-' if size is None else size}\n")
+        self._index_lines += 1
+
+    def _compact_index(self):
+        with self._lock:
+            if self._index_lines > 2 * len(self._sizes) + 64:
+                self._write_index()
+
+    def _write_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_NAME)
+        temp_path = f"{index_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{key} {size}\n" for key, size in self._sizes.items())
+        os.replace(temp_path, index_path)
+        self._index_lines = len(self._sizes)
+
+    def _remove_temp(self):
+        """
+        Remove the temporary entries left by crashed writers
+        """
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.TEMP_MAX_AGE:
+                    self._remove(path)
+            except FileNotFoundError:
+                continue
+
+    @staticmethod
+    def _size(path: str) -> int:
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                size += os.path.getsize(os.path.join(root, file))
+        return size
+
+    @staticmethod
+    def _remove(path: str):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -14,13 +14,20 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
+import numpy as np
 from .PackFileReader import PackFileReader
+from .SVFTransform import SVFTransform
 from .Derivative import Derivative
 from .ManifestItem import ManifestItem
 from .Token import Token
 
 
 class Fragments:
+    # one row of the structured array of fragments, see parse_fragments_array
+    DTYPE = np.dtype([("visible", np.bool_), ("materialID", np.uint32), ("geometryID", np.uint32),
+                      ("dbID", np.uint32), ("bbox", np.float64, 6), ("transform_type", np.int8),
+                      ("t", np.float64, 3), ("q", np.float32, 4), ("s", np.float32, 3), ("matrix", np.float32, 9)])
+
     def __init__(self):
         self.visible = False
         self.materialID = 0
@@ -69,32 +76,105 @@ class Fragments:
         :param buffer:  the buffer of the fragment list
         :return:  a list of fragments
         """
-        fragments = []
+        return Fragments.from_array(Fragments.parse_fragments_array(buffer))
+
+    @staticmethod
+    def parse_fragments_array(buffer: bytes) -> np.ndarray:
+        """
+        Parse fragments from buffer to one row per fragment of a structured array, all entries are decoded at once
+        without creating a python object by fragment. Use :meth:`from_array` to get the list of fragments.
+        :param buffer:  the buffer of the fragment list
+        :return:  :class:`numpy.ndarray` of :attr:`DTYPE`: visible, materialID, geometryID, dbID, bbox[6] and
+        the transform, transform_type is -1 for a fragment without transform, the unused transform fields are 0
+        """
         pfr = PackFileReader(buffer)
+        data = np.frombuffer(pfr.buffer, dtype=np.uint8)
+        positions = np.asarray(pfr.entries, dtype=np.int64)
+        fragments = np.zeros(len(positions), dtype=Fragments.DTYPE)
+        if len(positions) == 0:
+            return fragments
+        type_index = Fragments._gather(data, positions, "<u4")[:, 0]
+        assert (type_index < len(pfr.types)).all()
+        assert all(pfr.types[i].version > 4 for i in np.unique(type_index).tolist())
+        positions = positions + 4
+
+        fragments["visible"] = (data[positions] & 0x01) != 0
+        fragments["materialID"], positions = Fragments._gather_varints(data, positions + 1)
+        fragments["geometryID"], positions = Fragments._gather_varints(data, positions)
+
+        raw_types = data[positions]
+        positions = positions + 1
+        # translation offset inside the transform and the whole transform size by transform type
+        t_offsets = np.array([0, 16, 20, 36], dtype=np.int64)
+        sizes = np.array([24, 40, 44, 60], dtype=np.int64)
+        # compared as unsigned bytes, a type of 128 or more would be negative as int8
+        transform_type = np.where(raw_types <= 3, raw_types, -1).astype(np.int8)
+        fragments["transform_type"] = transform_type
+        for kind in range(4):
+            rows = np.flatnonzero(transform_type == kind)
+            if len(rows) == 0:
+                continue
+            starts = positions[rows]
+            fragments["t"][rows] = Fragments._gather(data, starts + t_offsets[kind], "<f8", 3)
+            if kind == 1:
+                fragments["q"][rows] = Fragments._gather(data, starts, "<f4", 4)
+                fragments["s"][rows] = 1.0
+            elif kind == 2:
+                fragments["s"][rows] = Fragments._gather(data, starts, "<f4")
+                fragments["q"][rows] = Fragments._gather(data, starts + 4, "<f4", 4)
+            elif kind == 3:
+                fragments["matrix"][rows] = Fragments._gather(data, starts, "<f4", 9)
+            positions[rows] += sizes[kind]
+
+        # the bounding box is stored relative to the translation of the fragment
+        fragments["bbox"] = Fragments._gather(data, positions, "<f4", 6) + np.tile(fragments["t"], 2)
+        fragments["dbID"], _ = Fragments._gather_varints(data, positions + 24)
+        return fragments
+
+    @staticmethod
+    def _gather(data: np.ndarray, positions: np.ndarray, dtype: str, count: int = 1) -> np.ndarray:
+        """
+        Read count little-endian numbers at every position of a byte buffer
+        :return: :class:`numpy.ndarray` of shape (len(positions), count)
+        """
+        size = np.dtype(dtype).itemsize * count
+        return data[positions[:, None] + np.arange(size)].view(dtype)
 
-        for i in range(pfr.num_entries()):
-            entry_type = pfr.seek_entry(i)
-            assert entry_type is not None
-            assert entry_type.version > 4
-
-            flags = pfr.get_uint8()
-            visible = (flags & 0x01) != 0
-            material_id = pfr.get_varint()
-            geometry_id = pfr.get_varint()
-            transform = pfr.get_transform()
-            bbox = [0, 0, 0, 0, 0, 0]
-            bbox_offset = [0, 0, 0]
-            if entry_type.version > 3:
-                if transform is not None and transform.t is not None:
-                    bbox_offset[0] = float(transform.t[0])
-                    bbox_offset[1] = float(transform.t[1])
-                    bbox_offset[2] = float(transform.t[2])
-
-            for j in range(6):
-                bbox[j] = pfr.get_float32() + bbox_offset[j % 3]
-
-            db_id = pfr.get_varint()
+    @staticmethod
+    def _gather_varints(data: np.ndarray, positions: np.ndarray) -> tuple:
+        """
+        Read one varint at every position of a byte buffer, all varints advance one byte at a time together
+        :return: tuple of (values, positions after the varints) arrays
+        """
+        values = np.zeros(len(positions), dtype=np.int64)
+        ends = positions.copy()
+        index = np.arange(len(positions))
+        shift = 0
+        while len(index) > 0:
+            byte = data[ends[index]].astype(np.int64)
+            values[index] |= (byte & 0x7F) << shift
+            ends[index] += 1
+            index = index[(byte & 0x80) != 0]
+            shift += 7
+        return values, ends
 
+    @staticmethod
+    def from_array(fragments_array: np.ndarray) -> list:
+        """
+        Materialize the fragments of a structured array from :meth:`parse_fragments_array`
+        :param fragments_array:  :class:`numpy.ndarray` of :attr:`DTYPE`
+        :return:  a list of fragments
+        """
+        fragments = []
+        columns = [fragments_array[name].tolist() for name in Fragments.DTYPE.names]
+        for visible, material_id, geometry_id, db_id, bbox, transform_type, t, q, s, matrix in zip(*columns):
+            transform = None
+            if transform_type == 0:
+                transform = SVFTransform(t=tuple(t))
+            elif transform_type in (1, 2):
+                transform = SVFTransform(t=tuple(t), q=tuple(q), s=tuple(s))
+            elif transform_type == 3:
+                transform = SVFTransform(t=tuple(t), matrix=tuple(matrix))
             fragment = Fragments()
             fragment.visible = visible
             fragment.materialID = material_id
@@ -103,5 +183,4 @@ class Fragments:
             fragment.transform = transform
             fragment.bbox = bbox
             fragments.append(fragment)
-
         return fragments
@@ -15,6 +15,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import struct
+import numpy as np
 
 
 class InputStream:
@@ -77,3 +78,14 @@ class InputStream:
         val = self.buffer[self.offset:self.offset + length].decode('utf-8')
         self.offset += length
         return val
+
+    def get_array(self, dtype: str, count: int) -> np.ndarray:
+        """
+        Read count numbers at once as a read-only view into the buffer, nothing is copied
+        :param dtype: little-endian numpy type, e.g. '<f4', '<u4'
+        :param count: number of items
+        :return: :class:`numpy.ndarray` of count items
+        """
+        val = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.offset)
+        self.offset += val.nbytes
+        return val
@@ -0,0 +1,137 @@
+"""
+Copyright (C) 2024  chuongmep.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import gzip
+import io
+import json
+import numpy as np
+
+
+class JsonStream:
+    """
+    Incremental decoder of a top level json array, e.g. objects_vals.json.gz. The text is read one chunk
+    at a time and every chunk is decoded up to its last complete element, so the whole json string is
+    never held in memory.
+    """
+    CHUNK_SIZE = 4 * 1024 * 1024
+
+    @staticmethod
+    def iter_batches(text_stream, chunk_size: int = CHUNK_SIZE):
+        """
+        Decode a json array from a text stream
+        :param text_stream: file like object returning str from read(size)
+        :param chunk_size: number of characters read at a time
+        :return: generator of lists of elements, in order
+        """
+        buffer = ""
+        started = False
+        while True:
+            chunk = text_stream.read(chunk_size)
+            end_of_stream = not chunk
+            buffer += chunk
+            if not started:
+                buffer = buffer.lstrip()
+                if not buffer:
+                    if end_of_stream:
+                        raise Exception("Json array is empty")
+                    continue
+                if buffer[0] != "[":
+                    raise Exception("Json is not an array")
+                buffer = buffer[1:]
+                started = True
+            if end_of_stream:
+                buffer = buffer.rstrip()
+                if not buffer.endswith("]"):
+                    raise Exception("Json array is not closed")
+                buffer = buffer[:-1]
+                if buffer.strip():
+                    yield json.loads("[" + buffer + "]")
+                return
+            batch, buffer = JsonStream._split_complete(buffer)
+            if batch:
+                yield batch
+
+    @staticmethod
+    def _split_complete(buffer: str) -> tuple:
+        """
+        Decode the complete elements at the start of buffer. The last comma is usually between two top level
+        elements and is tried first, otherwise the buffer is scanned once for it, see :meth:`_find_cut`.
+        :return: tuple of (list of elements, rest of buffer)
+        """
+        cut = buffer.rfind(",")
+        if cut <= 0:
+            return [], buffer
+        try:
+            return json.loads("[" + buffer[:cut] + "]"), buffer[cut + 1:]
+        except json.JSONDecodeError:
+            pass
+        data = buffer.encode("utf-8")
+        cut = JsonStream._find_cut(data)
+        if cut <= 0:
+            return [], buffer
+        return json.loads(b"[" + data[:cut] + b"]"), data[cut + 1:].decode("utf-8")
+
+    @staticmethod
+    def _find_cut(data: bytes) -> int:
+        """
+        Find the last comma between two top level elements: a quote not escaped by an odd number of
+        backslashes toggles the string state, and the depth of the brackets out of strings must be 0.
+        :param data: utf-8 bytes of the buffer
+        :return: byte position of the comma, -1 if not found
+        """
+        codes = np.frombuffer(data, dtype=np.uint8)
+        quotes = np.flatnonzero(codes == 34)
+        backslashes = codes == 92
+        if len(quotes) > 0 and backslashes.any():
+            # position of the last character which is not a backslash, up to every position
+            last_other = np.maximum.accumulate(np.where(backslashes, -1, np.arange(len(codes))))
+            run = quotes - 1 - last_other[np.maximum(quotes - 1, 0)]
+            run[quotes == 0] = 0
+            quotes = quotes[run % 2 == 0]
+        toggles = np.zeros(len(codes), dtype=np.uint8)
+        toggles[quotes] = 1
+        outside = np.bitwise_xor.accumulate(toggles) == 0
+        steps = ((codes == 91) | (codes == 123)).astype(np.int8) - ((codes == 93) | (codes == 125))
+        steps[~outside] = 0
+        depth = np.cumsum(steps, dtype=np.int32)
+        commas = np.flatnonzero((codes == 44) & outside & (depth == 0))
+        return int(commas[-1]) if len(commas) > 0 else -1
+
+    @staticmethod
+    def iter_gzip_batches(source, chunk_size: int = CHUNK_SIZE):
+        """
+        Decode a gzip compressed json array
+        :param source: path of the .json.gz file, bytes of it or a binary file object
+        :param chunk_size: number of characters read at a time
+        :return: generator of lists of elements, in order
+        """
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with gzip.open(source, "rt", encoding="utf-8") as text_stream:
+            yield from JsonStream.iter_batches(text_stream, chunk_size)
+
+    @staticmethod
+    def load_gzip(source, chunk_size: int = CHUNK_SIZE) -> list:
+        """
+        Decode a gzip compressed json array to a list
+        :param source: path of the .json.gz file, bytes of it or a binary file object
+        :param chunk_size: number of characters read at a time
+        :return: list of elements
+        """
+        result = []
+        for batch in JsonStream.iter_gzip_batches(source, chunk_size):
+            result.extend(batch)
+        return result
@@ -18,8 +18,9 @@ from .PathInfo import PathInfo
 
 
 class ManifestItem:
-    def __init__(self, guid, mime, path_info: [PathInfo], urn):
+    def __init__(self, guid, mime, path_info: [PathInfo], urn, version=None):
         self.guid = guid
         self.mime = mime
         self.urn = urn
         self.path_info = path_info
+        self.version = version
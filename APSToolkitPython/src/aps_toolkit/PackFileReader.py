@@ -16,6 +16,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import struct
 import gzip
+import numpy as np
 from io import BytesIO
 from .InputStream import InputStream
 from .SVFTransform import SVFTransform
@@ -46,7 +47,7 @@ class PackFileReader(InputStream):
 
         self.seek(entries_offset)
         entries_count = self.get_varint()
-        self.entries = [self.get_uint32() for _ in range(entries_count)]
+        self.entries = np.frombuffer(self.buffer, dtype='<u4', count=entries_count, offset=self.offset).tolist()
 
         self.seek(types_offset)
         types_count = self.get_varint()
@@ -76,13 +77,19 @@ class PackFileReader(InputStream):
         return self.types[type_index]
 
     def get_vector3d(self) -> tuple:
-        return struct.unpack('<3d', self.buffer[self.offset:self.offset + 24])
+        val = struct.unpack_from('<3d', self.buffer, self.offset)
+        self.offset += 24
+        return val
 
     def get_quaternion(self):
-        return struct.unpack('<4f', self.buffer[self.offset:self.offset + 16])
+        val = struct.unpack_from('<4f', self.buffer, self.offset)
+        self.offset += 16
+        return val
 
     def get_matrix3x3(self):
-        return struct.unpack('<9d', self.buffer[self.offset:self.offset + 72])
+        val = struct.unpack_from('<9f', self.buffer, self.offset)
+        self.offset += 36
+        return val
 
     def get_transform(self):
         xform_type = self.get_uint8()
@@ -16,6 +16,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import re
 from typing import List
+import numpy as np
 import pandas as pd
 from .ManifestItem import ManifestItem
 from .PropReader import PropReader
@@ -23,69 +24,125 @@ from .Token import Token
 
 
 class PropDbReaderCad(PropReader):
+    _type_index = None
+
     def __int__(self, urn: str, token: Token, region: str = "US", manifest_item: [ManifestItem] = None):
         super().__init__(urn, token, region, manifest_item)
 
+    def _assign_tables(self, ids, offsets, avs, attrs, vals):
+        super()._assign_tables(ids, offsets, avs, attrs, vals)
+        self._type_index = None
+
+    def _get_type_index(self) -> tuple:
+        """
+        Classify all entities by their "type" property in one pass over the inverted index, built once
+        :return: tuple of (owners, codes, names): the database id and the type of every "type" property in avs
+        order, the type as a position in names, the list of distinct type values
+        """
+        if self._type_index is None:
+            pair_index = self._get_postings(self._attr_mask("name", ["type"]))
+            distinct, codes = np.unique(self._avs_array()[2 * pair_index + 1], return_inverse=True)
+            names = list(self._take_values(distinct))
+            self._type_index = (self._pair_owners(pair_index), codes.ravel().astype(np.int32), names)
+        return self._type_index
+
+    def _get_ids_by_type(self, type_name: str) -> List[int]:
+        """
+        Get the entities having a "type" property of the given value
+        :param type_name: e.g. "AcDbLayerTableRecord"
+        :return: list of database ids, in order
+        """
+        owners, codes, names = self._get_type_index()
+        matches = [code for code, name in enumerate(names) if name == type_name]
+        return np.unique(owners[np.isin(codes, matches)]).tolist()
+
+    def _get_types(self, db_ids: List[int]) -> list:
+        """
+        Get the "type" property of entities, the last one when an entity has several
+        :param db_ids: list of database ids
+        :return: list of type values, None for an entity without type
+        """
+        owners, codes, names = self._get_type_index()
+        types = [None] * len(db_ids)
+        if len(owners) == 0:
+            return types
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        # owners are in avs order, so sorted, the last "type" of an entity is the last match
+        last = np.searchsorted(owners, db_ids, side="right") - 1
+        found = np.flatnonzero((last >= 0) & (owners[last] == db_ids))
+        for position, code in zip(found.tolist(), codes[last[found]].tolist()):
+            types[position] = names[code]
+        return types
+
     def get_document_info(self) -> pd.Series:
         schema_name = "DocumentData"
-        indexs = []
-        # get index at value DocumentData
-        for i, s in enumerate(self.ids):
-            if s == schema_name:
-                indexs.append(i)
-        df = self.get_recursive_ids(indexs)
+        db_id = self._get_external_id_index().get(schema_name)
+        if db_id is None:
+            raise Exception(f"{schema_name} not found")
+        df = self.get_recursive_ids([db_id])
         series = df.iloc[0]
         return series
 
     def get_all_layers(self):
-        db_layers = []
-        df = pd.DataFrame()
-        for i, s in enumerate(self.ids):
-            properties = self.enumerate_properties(i)
-            flag_layer = [p for p in properties if p.name == "type" and p.value == "AcDbLayerTableRecord"]
-            if flag_layer:
-                df_single = self.get_recursive_ids([i])
-                df = pd.concat([df, df_single])
-        return df
+        """
+        Get data of all layers, read in one pass. The index restarts at 0 for every layer.
+        :return: pandas dataframe
+        """
+        db_layers = self._get_ids_by_type("AcDbLayerTableRecord")
+        return self._get_recursive_ids_by_groups([[db_layer] for db_layer in db_layers])
 
     def get_all_categories(self) -> dict:
+        db_blocks = [id for id in self._get_ids_by_type("AcDbBlockTableRecord") if id]
+        _, _, childs = self._gather_links(db_blocks, "__child__")
+        childs = childs.tolist()
         db_categories = {}
-        for i, s in enumerate(self.ids):
-            properties = self.enumerate_properties(i)
-            type = "AcDbBlockTableRecord"
-            dbid = None
-            flag = [p for p in properties if p.name == "type" and p.value == type]
-            if flag:
-                dbid = i
-            if dbid:
-                childs = self.get_children(dbid)
-                for child in childs:
-                    properties = self.enumerate_properties(child)
-                    for p in properties:
-                        if p.name == "type":
-                            db_categories[child] = p.value
+        for child, type in zip(childs, self._get_types(childs)):
+            if type is not None:
+                db_categories[child] = type
         return db_categories
 
+    def _get_category_ids(self, categories: List[str]) -> List[List[int]]:
+        """
+        Get the category ids of every category name, case insensitive
+        :param categories: list of category names
+        :return: list of lists of database ids, in the order of categories
+        """
+        db_categories = self.get_all_categories()
+        return [[k for k, v in db_categories.items() if v.lower() == category.lower()] for category in categories]
+
     def get_data_by_category(self, category: str) -> pd.DataFrame:
         """
         Get data by cad category : eg: MText, Line, Circle, ...
         :param category: the category name of cad file, e.g : MText, Line, Circle,Tables ...
         :return: pandas dataframe
         """
-        db_categories = self.get_all_categories()
-        category_ids = [k for k, v in db_categories.items() if v.lower() == category.lower()]
-        childs = self.get_children(category_ids[0])
-        return self.get_recursive_ids(childs)
+        return self.get_data_by_categories([category])
 
     def get_data_by_categories(self, categories: List[str]) -> pd.DataFrame:
         """
-        Get data by multiple cad categories
+        Get data by multiple cad categories, read in one pass. The index restarts at 0 for every category.
         :param categories: list of category names
         :return: pandas dataframe
         """
-        df = pd.DataFrame()
-        for category in categories:
-            df = pd.concat([df, self.get_data_by_category(category)])
+        groups = []
+        for category, category_ids in zip(categories, self._get_category_ids(categories)):
+            if len(category_ids) == 0:
+                raise Exception(f"Category {category} not found")
+            groups.append(self.get_children(category_ids[0]))
+        return self._get_recursive_ids_by_groups(groups)
+
+    def _get_recursive_ids_by_groups(self, groups: List[List[int]]) -> pd.DataFrame:
+        """
+        Get the recursive data of several groups of objects in one pass, as if the frame of every group was
+        read with :meth:`get_recursive_ids` and concatenated: the index restarts at 0 for every group.
+        :param groups: list of lists of database ids
+        :return: pandas dataframe
+        """
+        childs = [db_id for group in groups for db_id in group]
+        df = self.get_recursive_ids(childs)
+        if not df.empty:
+            sizes = [len(self._preorder_ids(group)) if group else 0 for group in groups]
+            df.index = np.concatenate([np.arange(size) for size in sizes])
         return df
 
     def get_data_by_categories_and_params(self, categories: List[str], params: List[str]) -> pd.DataFrame:
@@ -105,12 +162,10 @@ class PropDbReaderCad(PropReader):
 
     def get_all_data(self) -> pd.DataFrame:
         """
-        Get all data from cad file
+        Get all data from cad file, read in one pass. The index restarts at 0 for every category.
         :return: pandas dataframe
         """
         cates = self.get_all_categories()
-        df = pd.DataFrame()
-        for k, v in cates.items():
-            childs = self.get_children(k)
-            df = pd.concat([df, self.get_recursive_ids(childs)])
-        return df
+        rows, _, childs = self._gather_links(list(cates.keys()), "__child__")
+        groups = np.split(childs, np.cumsum(np.bincount(rows, minlength=len(cates)))[:-1])
+        return self._get_recursive_ids_by_groups([group.tolist() for group in groups])
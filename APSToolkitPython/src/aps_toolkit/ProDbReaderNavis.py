@@ -17,6 +17,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from typing import List
 import re
 import pandas as pd
+import numpy as np
 import json
 import requests
 from .PropReader import PropReader
@@ -29,17 +30,6 @@ class PropDbReaderNavis(PropReader):
     def __int__(self, urn, token: Token, region="US", manifest_item: [ManifestItem] = None):
         super().__init__(urn, token, region, manifest_item)
 
-    def _get_recursive_child(self, output, id, name):
-        children = self.get_children(id)
-        for child in children:
-            properties = self.enumerate_properties(child)
-            property = [prop.value for prop in properties if prop.name == name]
-            if len(property) == 0:
-                self._get_recursive_child(output, child, name)
-            else:
-                if str(property[0]) == "": continue
-                output[child] = property[0].strip()
-
     def get_external_id(self, id) -> str:
         return self.ids[id]
 
@@ -78,13 +68,11 @@ class PropDbReaderNavis(PropReader):
         """
         categories = []
         rg = re.compile(r'^__\w+__$')
-        df = pd.DataFrame()
+        rows = []
         for i in range(1, len(self.attrs)):
             if self.attrs[i][1] not in categories and not rg.match(self.attrs[i][1]):
-                category = self.attrs[i][1]
-                parameter = self.attrs[i][5]
-                singleDF = pd.DataFrame({"Category": [category], "Parameter": [parameter]})
-                df = pd.concat([df, singleDF], ignore_index=True)
+                rows.append({"Category": self.attrs[i][1], "Parameter": self.attrs[i][5]})
+        df = pd.DataFrame(rows)
         df = df.sort_values(by=['Category'])
         return df
 
@@ -109,25 +97,40 @@ class PropDbReaderNavis(PropReader):
         sources = self._get_recursive_ids_sources_files(childs)
         return sources
 
+    def _get_type_mask(self, type_name: str) -> np.ndarray:
+        """
+        Get the objects having a property displayed "Type" of the given value, from the inverted index,
+        each distinct value is decoded once
+        :param type_name: the value of Type, e.g. "File", "Layer"
+        :return: :class:`numpy.ndarray` of bool indexed by database id
+        """
+        pair_index = self._get_postings(self._attr_mask("display_name", ["Type"]))
+        distinct, inverse = np.unique(self._avs_array()[2 * pair_index + 1], return_inverse=True)
+        matches = np.fromiter((value == type_name for value in self._take_values(distinct)), dtype=bool,
+                              count=len(distinct))
+        mask = np.zeros(len(self.offsets), dtype=bool)
+        mask[self._pair_owners(pair_index[matches[inverse.ravel()]])] = True
+        return mask
+
+    def _get_item_names(self, db_ids: List[int]) -> list:
+        """
+        Get the first "Item" "Name" property of objects
+        :param db_ids: list of database ids
+        :return: list of names, None for an object without name
+        """
+        selected = self._attr_mask("category", ["Item"]) & self._attr_mask("display_name", ["Name"])
+        rows, _, val_ids = self._gather_selected_pairs(db_ids, selected)
+        rows, first = np.unique(rows, return_index=True)
+        names = [None] * len(db_ids)
+        for row, name in zip(rows.tolist(), self._take_values(val_ids[first])):
+            names[row] = name
+        return names
+
     def _get_recursive_ids_sources_files(self, db_ids: List[int]) -> List[str]:
-        sources = []
-        for id in db_ids:
-            props = self.enumerate_properties(id)
-            # list objects props to dataframe
-            properties_dicts = [prop.__dict__ for prop in props]
-            df_props = pd.DataFrame(properties_dicts)
-            # stop tree from layer
-            if not df_props[(df_props['display_name'] == 'Type') & (df_props['value'] == 'Layer')].empty:
-                continue
-            # see if any row have column 'display_name' with value is Type and  column 'Value' is File
-            if not df_props[(df_props['display_name'] == 'Type') & (df_props['value'] == 'File')].empty:
-                row_value = df_props[(df_props['category'] == 'Item') & (df_props['display_name'] == 'Name')].iloc[0]
-                value = row_value['value']
-                sources.append(value)
-                child_ids = self.get_children(id)
-                if len(child_ids) > 0:
-                    sources = sources + self._get_recursive_ids_sources_files(child_ids)
-        return sources
+        # the walk goes down through files only, a layer is never a source
+        files = self._get_type_mask("File") & ~self._get_type_mask("Layer")
+        file_ids = list(self.traverse(db_ids, lambda id: ([id], True) if files[id] else ([], False)))
+        return self._get_item_names(file_ids)
 
     def get_all_data_resources(self) -> pd.DataFrame:
         """
@@ -152,66 +155,77 @@ class PropDbReaderNavis(PropReader):
         df = df.dropna(axis=0, how='all', subset=df.columns.difference(['DbId']))
         return df
 
+    def iter_data_by_resources(self, categories: List[str] = None, sep: str = '|'):
+        """
+        Get data by sub sources files one source at a time, e.g. to write every model to a file and free it
+        before reading the next, so only one source model is held in memory
+        :param categories: List[str] - list of categories like Item, Element, ..., default is all categories
+        :param sep: str - separator between category and parameter
+        :return: generator of pd.DataFrame - one dataframe by source file, with the column 'ModelName',
+        in the order of the sources files
+        """
+        if categories is None:
+            categories = self.get_all_categories()
+        files = self._get_type_mask("File")
+        found = False
+        for id in self.get_children(1):
+            if not files[id]:
+                continue
+            df = self._get_recursive_elements([id], categories, sep)
+            if df.empty:
+                continue
+            found = True
+            yield df.dropna(axis=0, how='all', subset=df.columns.difference(['DbId']))
+        if not found and files[1]:
+            # use main model
+            df = self._get_recursive_elements([1], categories, sep)
+            if not df.empty:
+                yield df.dropna(axis=0, how='all', subset=df.columns.difference(['DbId']))
+
     def _get_recursive_data_by_resources(self, db_ids: list[int], categories: list[str], sep="|") -> pd.DataFrame:
-        dataframe = pd.DataFrame()
-        for id in db_ids:
-            props = self.enumerate_properties(id)
-            # list objects props to dataframe
-            properties_dicts = [prop.__dict__ for prop in props]
-            df_props = pd.DataFrame(properties_dicts)
-            # see if any row have column 'display_name' with value is Type and  column 'Value' is File
-            if not df_props[(df_props['display_name'] == 'Type') & (df_props['value'] == 'File')].empty:
-                row_value = df_props[(df_props['category'] == 'Item') & (df_props['display_name'] == 'Name')].iloc[0]
-                source_name = row_value['value']
-                child_ids = self.get_children(id)
-                if len(child_ids) > 0:
-                    df = self._get_recursive_elements(source_name, child_ids, categories, sep)
-                    dataframe = pd.concat([dataframe, df], ignore_index=True)
-        if dataframe.empty:
+        files = self._get_type_mask("File")
+        source_ids = [id for id in db_ids if files[id]]
+        dataframe = self._get_recursive_elements(source_ids, categories, sep)
+        if dataframe.empty and files[1]:
             # use main model
-            props = self.enumerate_properties(1)
-            properties_dicts = [prop.__dict__ for prop in props]
-            df_props = pd.DataFrame(properties_dicts)
-            # see if any row have column 'display_name' with value is Type and  column 'Value' is File
-            if not df_props[(df_props['display_name'] == 'Type') & (df_props['value'] == 'File')].empty:
-                row_value = df_props[(df_props['category'] == 'Item') & (df_props['display_name'] == 'Name')].iloc[0]
-                source_name = row_value['value']
-                child_ids = self.get_children(id)
-                if len(child_ids) > 0:
-                    df = self._get_recursive_elements(source_name, child_ids, categories, sep)
-                    dataframe = pd.concat([dataframe, df], ignore_index=True)
+            dataframe = self._get_recursive_elements([1], categories, sep)
         return dataframe
 
-    def _get_recursive_elements(self, model_name, source_ids: list[int], categories: list[str],
-                                sep='|') -> pd.DataFrame:
-        all_properties = []
-
-        def collect_properties(id):
-            props = self.enumerate_properties(id)
-            properties = {"DbId": id, "ModelName": model_name}
-
-            for p in props:
-                if p.category not in categories:
-                    continue
-                key = p.category + sep + str(p.display_name) if p.category else str(p.display_name)
-                if key:
-                    properties[key] = p.value
-
-            return properties
-
-        def process_ids(ids):
-            for id in ids:
-                properties = collect_properties(id)
-                if len(properties) > 2:  # More than DbId and ModelName
-                    all_properties.append(properties)
-                children = self.get_children(id)
-                if children:
-                    process_ids(children)
-
-        process_ids(source_ids)
-
-        dataframe = pd.DataFrame(all_properties)
-        return dataframe
+    def _get_recursive_elements(self, source_ids: list[int], categories: list[str], sep='|') -> pd.DataFrame:
+        """
+        Get the properties in categories of the descendants of source files, one row per object having one
+        :param source_ids: database ids of the source files, their "Item" "Name" is the ModelName column
+        :param categories: list of categories
+        :param sep: separator between category and parameter
+        :return: pd.DataFrame - columns DbId, ModelName and category + sep + parameter
+        """
+        ids, model_names = [], []
+        for source_id, model_name in zip(source_ids, self._get_item_names(source_ids)):
+            child_ids = self.get_children(source_id)
+            if len(child_ids) > 0:
+                elements = self._preorder_ids(child_ids)
+                ids.extend(elements)
+                model_names.extend([model_name] * len(elements))
+        if len(ids) == 0:
+            return pd.DataFrame()
+        category_column = self._attr_field("category")
+        display_name_column = self._attr_field("display_name")
+        selected = self._attr_mask("category", categories)
+        keys = np.empty(len(category_column), dtype=object)
+        for attr_id in np.flatnonzero(selected).tolist():
+            category = category_column[attr_id]
+            keys[attr_id] = category + sep + str(display_name_column[attr_id]) if category else str(
+                display_name_column[attr_id])
+            selected[attr_id] = keys[attr_id] != ""
+        rows, attr_ids, val_ids = self._gather_selected_pairs(ids, selected)
+        if len(rows) == 0:
+            return pd.DataFrame()
+        dataframe = self._pivot(len(ids), rows, keys[attr_ids], val_ids)
+        dataframe.insert(0, "ModelName", model_names)
+        dataframe.insert(0, "DbId", ids)
+        # keep objects having at least one property in categories
+        dataframe = dataframe[np.bincount(rows, minlength=len(ids)) > 0]
+        return dataframe.reset_index(drop=True)
 
     def _get_recursive_ids_by_categories(self, db_ids: List[int], categories: List[str], sep='|') -> pd.DataFrame:
         """
@@ -221,27 +235,26 @@ class PropDbReaderNavis(PropReader):
         :param sep:  str - separator between category and parameter
         :return: pd.DataFrame - dataframe contains data by categories
         """
-        dataframe = pd.DataFrame()
         props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
         if len(db_ids) == 0:
-            return dataframe
-        for id in db_ids:
-            props = self.enumerate_properties(id)
-            properties = {}
-            for p in props:
-                if p.category in categories:
-                    properties["DbId"] = id
-                    for p in props:
-                        if p.name not in props_ignore and p.category in categories:
-                            key = p.category + sep + str(p.display_name)
-                            properties[key] = p.value
-            if len(properties) > 1:
-                singleDF = pd.DataFrame(properties, index=[0])
-                dataframe = pd.concat([dataframe, singleDF], ignore_index=True)
-            children = self.get_children(id)
-            df = self._get_recursive_ids_by_categories(children, categories, sep)
-            dataframe = pd.concat([dataframe, df], ignore_index=True)
-        return dataframe
+            return pd.DataFrame()
+        ids = self._preorder_ids(db_ids)
+        rows, attr_ids, val_ids = self._gather_pairs(ids)
+        selected = self._attr_mask("category", categories) & ~self._attr_mask("name", props_ignore)
+        keep = selected[attr_ids]
+        rows, attr_ids, val_ids = rows[keep], attr_ids[keep], val_ids[keep]
+        if len(rows) == 0:
+            return pd.DataFrame()
+        category_column = self._attr_field("category")
+        display_name_column = self._attr_field("display_name")
+        keys = np.empty(len(category_column), dtype=object)
+        for attr_id in np.flatnonzero(selected).tolist():
+            keys[attr_id] = category_column[attr_id] + sep + str(display_name_column[attr_id])
+        dataframe = self._pivot(len(ids), rows, keys[attr_ids], val_ids)
+        dataframe.insert(0, "DbId", ids)
+        # keep objects having at least one property in categories
+        dataframe = dataframe[np.bincount(rows, minlength=len(ids)) > 0]
+        return dataframe.reset_index(drop=True)
 
     def get_all_data(self) -> pd.DataFrame:
         """
@@ -260,22 +273,18 @@ class PropDbReaderNavis(PropReader):
         return df
 
     def _get_recursive_ids_by_category(self, db_ids: List[int], category: str) -> pd.DataFrame:
-        dataframe = pd.DataFrame()
         props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
         if len(db_ids) == 0:
-            return dataframe
-        for id in db_ids:
-            props = self.enumerate_properties(id)
-            properties = {}
-            flag = [p for p in props if p.category == category]
-            if flag:
-                properties["DbId"] = id
-                for p in props:
-                    if p.name not in props_ignore and p.category == category:
-                        properties[p.display_name] = p.value
-                singleDF = pd.DataFrame(properties, index=[0])
-                dataframe = pd.concat([dataframe, singleDF], ignore_index=True)
-            children = self.get_children(id)
-            df = self._get_recursive_ids_by_category(children, category)
-            dataframe = pd.concat([dataframe, df], ignore_index=True)
-        return dataframe
+            return pd.DataFrame()
+        ids = self._preorder_ids(db_ids)
+        rows, attr_ids, val_ids = self._gather_pairs(ids)
+        in_category = self._attr_mask("category", [category])
+        # objects having a property in category get a row, even if all of them are ignored
+        has_category = np.bincount(rows[in_category[attr_ids]], minlength=len(ids)) > 0
+        if not has_category.any():
+            return pd.DataFrame()
+        keep = (in_category & ~self._attr_mask("name", props_ignore))[attr_ids]
+        dataframe = self._pivot(len(ids), rows[keep], self._attr_field("display_name")[attr_ids[keep]],
+                                val_ids[keep])
+        dataframe.insert(0, "DbId", ids)
+        return dataframe[has_category].reset_index(drop=True)
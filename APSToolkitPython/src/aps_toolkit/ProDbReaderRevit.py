@@ -16,12 +16,16 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 from typing import List
 import re
+import concurrent.futures
+import numpy as np
 import pandas as pd
 import requests
 from .PropReader import PropReader
 from .ManifestItem import ManifestItem
 import warnings
 from .SVFReader import SVFReader
+from .RevitQuery import RevitQuery
+from .RevitHierarchy import RevitHierarchy
 
 
 class PropDbReaderRevit(PropReader):
@@ -44,19 +48,14 @@ class PropDbReaderRevit(PropReader):
         and optional manifest items.
     """
 
+    _hierarchy = None
+
     def __int__(self, urn, token, region="US", manifest_item: [ManifestItem] = None):
         super().__init__(urn, token, region, manifest_item)
 
-    def _get_recursive_child(self, output, id, name):
-        children = self.get_children(id)
-        for child in children:
-            properties = self.enumerate_properties(child)
-            property = [prop.value for prop in properties if prop.name == name]
-            if len(property) == 0:
-                self._get_recursive_child(output, child, name)
-            else:
-                if str(property[0]) == "": continue
-                output[child] = property[0].strip()
+    def _assign_tables(self, ids, offsets, avs, attrs, vals):
+        super()._assign_tables(ids, offsets, avs, attrs, vals)
+        self._hierarchy = None
 
     def get_external_id(self, id) -> str:
         """
@@ -72,10 +71,34 @@ class PropDbReaderRevit(PropReader):
         :param external_id:  The unique id of element in model
         :return:  :class:`int` : Database id of element in model
         """
-        for idx in range(0, len(self.ids)):
-            if self.ids[idx] == external_id:
-                return idx
-        return -1
+        return self._get_external_id_index().get(external_id, -1)
+
+    def get_db_ids(self, external_ids: List[str]) -> List[int]:
+        """
+        Get database ids of elements in model from external ids
+        :param external_ids:  The unique ids of elements in model
+        :return:  :class:`list` : Database id of each external id, -1 if it is not found
+        """
+        index = self._get_external_id_index()
+        return [index.get(external_id, -1) for external_id in external_ids]
+
+    def get_db_ids_by_element_ids(self, element_ids: List) -> List[int]:
+        """
+        Get database ids of elements in model from element ids
+        :param element_ids:  The element ids of elements in model. e.g: [9895625, 9895626]
+        :return:  :class:`list` : Database id of each element id, -1 if it is not found
+        """
+        index = self._get_value_index("ElementId")
+        return [index.get(str(element_id), [-1])[0] for element_id in element_ids]
+
+    def get_db_ids_by_ifc_guids(self, ifc_guids: List[str]) -> List[int]:
+        """
+        Get database ids of elements in model from IfcGUID
+        :param ifc_guids:  The IfcGUID of elements in model. e.g: ["2Yd8Ml$1v3xBnAsOnRZnMM"]
+        :return:  :class:`list` : Database id of each IfcGUID, -1 if it is not found
+        """
+        index = self._get_value_index("IfcGUID")
+        return [index.get(str(ifc_guid), [-1])[0] for ifc_guid in ifc_guids]
 
     def get_document_info(self) -> pd.Series:
         properties = self.get_all_properties(1)
@@ -163,26 +186,94 @@ class PropDbReaderRevit(PropReader):
         e.g: {1: "Walls", 2: "Doors", 3: "Windows", 4: "Furniture", 5: "Plumbing Fixtures", 6: "Electrical Fixtures"}
         :return:  :class:`dict` : Dictionary contains all categories, key is dbId, value is category name
         """
-        categories = {}
-        self._get_recursive_child(categories, 1, "_RC")
-        return categories
-
-    def get_all_data(self, is_get_sub_family: bool = False, display_unit: bool = False) -> pd.DataFrame:
+        return dict(self.get_hierarchy().categories)
+
+    def get_hierarchy(self) -> RevitHierarchy:
+        """
+        Get the Category -> Family -> Type -> Instance tree of the model, walked once and kept
+        :return: :class:`RevitHierarchy` : the dbIds and names of each level
+        """
+        if self._hierarchy is None:
+            self._hierarchy = self._build_hierarchy()
+        return self._hierarchy
+
+    def _build_hierarchy(self) -> RevitHierarchy:
+        names = ["_RC", "_RFN", "_RFT"]
+        found = {name: {} for name in names}
+        family_categories = {}
+        type_parents = {}
+        type_rows = []
+        type_nodes = []
+        # every level is searched as its own walk from the root would: the first node having the property
+        # ends the search below it, 4th level is the nodes of category "Revit Family Type"
+        stack = [(child, (True, True, True, True), 0, 0) for child in reversed(self.get_children(1))]
+        while stack:
+            id, searching, category_id, family_id = stack.pop()
+            values = {}
+            is_type_node = False
+            for prop in self.enumerate_properties(id):
+                values.setdefault(prop.name, prop.value)
+                if prop.name == "Category" and prop.value == "Revit Family Type":
+                    is_type_node = True
+            searching = list(searching)
+            for level, name in enumerate(names):
+                if not searching[level] or name not in values:
+                    continue
+                searching[level] = False
+                if str(values[name]) == "":
+                    continue
+                found[name][id] = values[name].strip()
+                if name == "_RC":
+                    category_id = id
+                elif name == "_RFN":
+                    family_categories[id] = category_id
+                    family_id = id
+                else:
+                    type_parents[id] = (category_id, family_id)
+                    type_rows.append({"dbId": id, "Category": values.get("_RC"), "Family": values.get("_RFN"),
+                                      "FamilyType": found[name][id]})
+            if searching[3] and is_type_node:
+                searching[3] = False
+                type_nodes.append({"dbId": id, "Category": values.get("_RC"), "Family": values.get("_RFN"),
+                                   "FamilyType": values.get("_RFT"), "child": values.get("child"),
+                                   "instanceof_objid": values.get("instanceof_objid")})
+            if any(searching):
+                stack.extend((child, tuple(searching), category_id, family_id)
+                             for child in reversed(self.get_children(id)))
+        type_ids = np.fromiter(found["_RFT"], dtype=np.int64, count=len(found["_RFT"]))
+        rows, _, instance_ids = self._gather_links(type_ids, "__child__")
+        instance_offsets = np.zeros(len(type_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(type_ids)), out=instance_offsets[1:])
+        return RevitHierarchy(found["_RC"], found["_RFN"], found["_RFT"], family_categories, type_parents,
+                              type_rows, type_nodes, instance_offsets, instance_ids)
+
+    def get_all_data(self, is_get_sub_family: bool = False, display_unit: bool = False,
+                     unit_column: bool = False, typed_columns: bool = False, workers: int = 1) -> pd.DataFrame:
         """
         Get all data from model, include all categories
         :param is_get_sub_family: the flag to get sub family or not, default is False
         :param display_unit: the flag to display unit or not in value, default is False
+        :param unit_column: with display_unit, keep the values as numbers and add a "<name> Unit" column after
+        each column having units, default is False
+        :param typed_columns: the flag to convert the columns to the data type of their parameters, see
+        :meth:`apply_data_types`, default is False
+        :param workers: number of processes reading the categories, they memory-map the database instead of
+        receiving a copy of it. Default is 1, read in this process. On Windows call it under
+        if __name__ == "__main__"
         :return: :class:`pandas.DataFrame` : Dataframe contains all data
         """
         categories_dict = self.get_all_categories()
         dbids = list(categories_dict.keys())
-        dataframe = pd.DataFrame()
-        for dbid in dbids:
-            df = self._get_recursive_ids([dbid], is_get_sub_family, display_unit)
-            dataframe = pd.concat([dataframe, df], ignore_index=True)
+        if workers > 1:
+            dataframe = self._read_shards(self._shard_categories(dbids, workers * 4), workers, is_get_sub_family,
+                                          display_unit, unit_column)
+        else:
+            dataframe = self._get_recursive_ids(dbids, is_get_sub_family, display_unit, unit_column)
         if dataframe.empty:
             return dataframe
         dataframe["Family Name"] = dataframe["Name"].str.extract(r'(.*)\s\[')
+        if typed_columns:
+            dataframe = self.apply_data_types(dataframe)
         return dataframe
 
     def get_all_bounding_boxs(self) -> pd.DataFrame:
@@ -193,10 +284,8 @@ class PropDbReaderRevit(PropReader):
         """
         svf_reader = SVFReader(self.urn, self.token, self.region)
         frags = svf_reader.read_fragments()
-        df_bbox = pd.DataFrame(columns=["dbId", "bbox"])
-        for k, v in frags.items():
-            for f in v:
-                df_bbox = pd.concat([df_bbox, pd.DataFrame([[f.dbID, f.bbox]], columns=["dbId", "bbox"])])
+        rows = [[f.dbID, f.bbox] for v in frags.values() for f in v]
+        df_bbox = pd.DataFrame(rows, columns=["dbId", "bbox"])
         df_bbox.reset_index(drop=True, inplace=True)
         df_bbox.sort_values(by="dbId", inplace=True)
         df_bbox.drop_duplicates(subset="dbId", inplace=True)
@@ -207,18 +296,14 @@ class PropDbReaderRevit(PropReader):
         Get all families in model
         :return:  :class:`dict` : Dictionary contains all families, key is dbId, value is family name
         """
-        families = {}
-        self._get_recursive_child(families, 1, "_RFN")
-        return families
+        return dict(self.get_hierarchy().families)
 
     def get_all_families_types(self) -> dict:
         """
         Get all families types in model
         :return:  :class:`dict` : Dictionary contains all families types, key is dbId, value is family type name
         """
-        families_types = {}
-        self._get_recursive_child(families_types, 1, "_RFT")
-        return families_types
+        return dict(self.get_hierarchy().types)
 
     def get_categories_families_types(self) -> pd.DataFrame:
         """
@@ -226,90 +311,54 @@ class PropDbReaderRevit(PropReader):
         :return: :class:`pandas.DataFrame` : Dataframe contains all dbid,category, family, family type
         dbId: database id of family type
         """
-        # create columns
-        df = pd.DataFrame(columns=["dbId", "Category", "Family", "FamilyType"])
-        self._get_recursive_child_types(df, 1, "_RFT")
+        rows = self.get_hierarchy().type_rows
+        df = pd.DataFrame(rows, columns=["dbId", "Category", "Family", "FamilyType"])
         df = df.sort_values(by=["Category", "Family", "FamilyType"])
         return df
 
-    def _get_recursive_child_types(self, data_frame, id, name):
-        children = self.get_children(id)
-        for child in children:
-            properties = self.enumerate_properties(child)
-            property = [prop.value for prop in properties if prop.name == name]
-            if len(property) == 0:
-                self._get_recursive_child_types(data_frame, child, name)
-            else:
-                if str(property[0]) == "":
-                    continue
-                family_type = property[0].strip()
-                category = [prop.value for prop in properties if prop.name == "_RC"][0]
-                family = [prop.value for prop in properties if prop.name == "_RFN"][0]
-                new_row = {"dbId": child, "Category": category, "Family": family, "FamilyType": family_type}
-                data_frame.loc[len(data_frame)] = new_row
-
     def get_cats_fams_types_params(self) -> pd.DataFrame:
         """
         Get all categories, families, families types and parameters, is parameter type in model
         :return: :class:`pandas.DataFrame` : Dataframe contains all dbid,category, family, family type, parameter, is parameter type
         """
-        df = pd.DataFrame(columns=["dbId", "Category", "Family", "FamilyType", "Parameter","Is Parameter Type"])
-        self._get_recursive_child_types_params(df, 1)
+        rows = [row for node in self.get_hierarchy().type_nodes for row in self._get_type_node_params(node)]
+        df = pd.DataFrame(rows, columns=["dbId", "Category", "Family", "FamilyType", "Parameter", "Is Parameter Type"])
         # drop duplicates
         df.drop_duplicates(subset=["dbId", "Category", "Family", "FamilyType", "Parameter","Is Parameter Type"], inplace=True)
         df = df.sort_values(by=["Category", "Family", "FamilyType", "Parameter", "Is Parameter Type"])
         df = df.drop(columns=["dbId"])
         return df
 
-    def _get_recursive_child_types_params(self, data_frame, id):
-        children = self.get_children(id)
-        for child in children:
-            properties = self.enumerate_properties(child)
-            property = [prop.value for prop in properties if
-                        prop.name == "Category" and prop.value == "Revit Family Type"]
-
-            if len(property) == 0:
-                # Recursively call the function, passing the same data_frame
-                self._get_recursive_child_types_params(data_frame, child)
-            else:
-                if str(property[0]) == "":
-                    continue
-                family_type = [prop.value for prop in properties if prop.name == "_RFT"][0]
-                category = [prop.value for prop in properties if prop.name == "_RC"][0]
-                family = [prop.value for prop in properties if prop.name == "_RFN"][0]
-                child_id = [prop.value for prop in properties if prop.name == "child"][0] if len(
-                    [prop.value for prop in properties if prop.name == "child"]) > 0 else None
-                instance_of_objid = [prop.value for prop in properties if prop.name == "instanceof_objid"][0] if len(
-                    [prop.value for prop in properties if prop.name == "instanceof_objid"]) > 0 else None
-
-                # Collect parameters
-                params = {}
-                if child_id:
-                    params_dict = self.get_properties(int(child_id))
-                    is_type = False
-                    # add key is parameter name and value is type
-                    for key, value in params_dict.items():
-                        params[key] = is_type
-                if instance_of_objid:
-                    is_type = True
-                    params_dict = self.get_properties(int(instance_of_objid))
-                    # add key is parameter name and value is type
-                    for key, value in params_dict.items():
-                        params[key] = is_type
-                # Add rows to the existing data_frame
-                for param in params:
-                    new_row = {"dbId": child, "Category": category, "Family": family, "FamilyType": family_type,
-                               "Parameter": param, "Is Parameter Type": params[param]}
-                    data_frame.loc[len(data_frame)] = new_row
+    def _get_type_node_params(self, node: dict) -> List[dict]:
+        """
+        Get the parameters of a family type node, from its child (instance parameters) and its type
+        :param node: a node of :attr:`RevitHierarchy.type_nodes`
+        :return: rows of dbId, Category, Family, FamilyType, Parameter, Is Parameter Type
+        """
+        params = {}
+        if node["child"]:
+            for key in self.get_properties(int(node["child"])):
+                params[key] = False
+        if node["instanceof_objid"]:
+            for key in self._get_type_properties(int(node["instanceof_objid"])):
+                params[key] = True
+        return [{"dbId": node["dbId"], "Category": node["Category"], "Family": node["Family"],
+                 "FamilyType": node["FamilyType"], "Parameter": param, "Is Parameter Type": params[param]}
+                for param in params]
 
     def get_data_by_category(self, category: str, is_get_sub_family: bool = False,
-                             display_unit: bool = False, is_add_family_name: bool = False) -> pd.DataFrame:
+                             display_unit: bool = False, is_add_family_name: bool = False,
+                             unit_column: bool = False, typed_columns: bool = False) -> pd.DataFrame:
         """
         Get data by category in model
         :param category: the category name need get data, e.g: Walls, Doors, Windows, etc
         :param is_get_sub_family: the flag to get sub family or not, default is False
         :param display_unit: the flag to display unit or not in value, default is False
         :param is_add_family_name: the flag to add family name or not, default is False
+        :param unit_column: with display_unit, keep the values as numbers and add a "<name> Unit" column after
+        each column having units, default is False
+        :param typed_columns: the flag to convert the columns to the data type of their parameters, see
+        :meth:`apply_data_types`, default is False
         :return: :class:`pandas.DataFrame` : Dataframe contains data by category
         """
         categories = self.get_all_categories()
@@ -317,71 +366,106 @@ class PropDbReaderRevit(PropReader):
         if category.startswith("Revit"):
             category = category[5:].strip()
         category_id = [key for key, value in categories.items() if value == category]
-        dataframe = self._get_recursive_ids(category_id, is_get_sub_family, display_unit)
+        dataframe = self._get_recursive_ids(category_id, is_get_sub_family, display_unit, unit_column)
         if dataframe.empty:
             return dataframe
         if (is_add_family_name):
             # get name from family and get name by regex e.g "Seating-LAMMHULTS-PENNE-Chair [12143232]" ->
             # "Seating-LAMMHULTS-PENNE-Chair"
             dataframe["Family Name"] = dataframe["Name"].str.extract(r'(.*)\s\[')
+        if typed_columns:
+            dataframe = self.apply_data_types(dataframe)
         return dataframe
 
     def get_data_by_categories(self, categories: List[str], is_get_sub_family: bool = False,
-                               display_unit: bool = False, is_add_family_name: bool = False) -> pd.DataFrame:
+                               display_unit: bool = False, is_add_family_name: bool = False,
+                               unit_column: bool = False, typed_columns: bool = False,
+                               workers: int = 1) -> pd.DataFrame:
         """
         Get data by list of categories in model
         :param categories: the list of categories need get data, e.g: ["Walls", "Doors", "Windows"]
         :param is_get_sub_family: the flag to get sub family or not, default is False
         :param display_unit: the flag to display unit or not in value, default is False
+        :param is_add_family_name: the flag to add family name or not, default is False
+        :param unit_column: with display_unit, keep the values as numbers and add a "<name> Unit" column after
+        each column having units, default is False
+        :param typed_columns: the flag to convert the columns to the data type of their parameters, see
+        :meth:`apply_data_types`, default is False
+        :param workers: number of processes reading the categories, they memory-map the database instead of
+        receiving a copy of it. Default is 1, read in this process. On Windows call it under
+        if __name__ == "__main__"
         :return: :class:`pandas.DataFrame` : Dataframe contains data by categories
         """
-        dataframe = pd.DataFrame()
-        for category in categories:
-            dataframe = pd.concat(
-                [dataframe, self.get_data_by_category(category, is_get_sub_family, display_unit, is_add_family_name)],
-                ignore_index=True)
+        if workers > 1:
+            # one shard by category, read the same way as get_data_by_category
+            all_categories = self.get_all_categories()
+            names = [category[5:].strip() if category.startswith("Revit") else category for category in categories]
+            shards = [[key for key, value in all_categories.items() if value == name] for name in names]
+            dataframe = self._read_shards(shards, workers, is_get_sub_family, display_unit, unit_column,
+                                          is_add_family_name)
+            if dataframe.empty:
+                return dataframe
+        else:
+            dataframes = [self.get_data_by_category(category, is_get_sub_family, display_unit, is_add_family_name,
+                                                    unit_column) for category in categories]
+            if len(dataframes) == 0:
+                return pd.DataFrame()
+            dataframe = pd.concat(dataframes, ignore_index=True)
+        # typed once the categories are together, categorical columns would not survive the concat
+        if typed_columns:
+            dataframe = self.apply_data_types(dataframe)
         return dataframe
 
-    def get_data_by_parameters(self, params: List[str], display_unit: bool = False) -> pd.DataFrame:
+    def get_data_by_parameters(self, params: List[str], display_unit: bool = False,
+                               unit_column: bool = False, typed_columns: bool = False) -> pd.DataFrame:
         """
         Get data by list of parameters in model
         :param params: the list of parameters need get data, e.g: ["Name", "Area", "Volume", "Height"]
         :param display_unit: the flag to display unit or not in value, default is False
+        :param unit_column: with display_unit, keep the values as numbers and add a "<name> Unit" column after
+        each column having units, default is False
+        :param typed_columns: the flag to convert the columns to the data type of their parameters, see
+        :meth:`apply_data_types`, default is False
         :return: :class:`pandas.DataFrame` : Dataframe contains data by parameters
         """
-        dataframe = pd.DataFrame()
-        all_categories = self.get_all_categories()
-        category_ids = [key for key, value in all_categories.items()]
-        dataframe = pd.concat(
-            [dataframe, self._get_recursive_ids_prams(category_ids, params, False, display_unit)], ignore_index=True)
+        dataframe = self.select(params).execute(False, display_unit, unit_column)
         if dataframe.empty:
             return dataframe
         if "Family Name" in params:
             dataframe["Family Name"] = dataframe["Name"].str.extract(r'(.*)\s\[')
+        if typed_columns:
+            dataframe = self.apply_data_types(dataframe)
         return dataframe
 
+    def select(self, params: List[str]) -> RevitQuery:
+        """
+        Start a query of parameters, e.g: select(["Name", "Width"]).where(["Walls", "Doors"]).execute()
+        :param params: the list of parameters need get data, e.g: ["Name", "Area", "Volume", "Height"]
+        :return: :class:`RevitQuery` : the query, run it with execute()
+        """
+        return RevitQuery(self, params)
+
     def get_data_by_categories_and_params(self, categories: List[str], params: List[str],
-                                          is_get_sub_family: bool = False, display_unit: bool = False) -> pd.DataFrame:
+                                          is_get_sub_family: bool = False, display_unit: bool = False,
+                                          unit_column: bool = False, typed_columns: bool = False) -> pd.DataFrame:
         """
         Get data by list of categories and list of parameters in model
         :param categories: the list of categories need get data, e.g: ["Walls", "Doors", "Windows"]
         :param params: the list of parameters need get data, e.g: ["Name", "Area", "Volume", "Height"]
         :param is_get_sub_family: the flag to get sub family or not, default is False
         :param display_unit: the flag to display unit or not in value, default is False
+        :param unit_column: with display_unit, keep the values as numbers and add a "<name> Unit" column after
+        each column having units, default is False
+        :param typed_columns: the flag to convert the columns to the data type of their parameters, see
+        :meth:`apply_data_types`, default is False
         :return: :class:`pandas.DataFrame` : Dataframe contains data by categories and parameters
         """
         flag_name = False
         is_have_name = "Name" in params
         if not is_have_name:
-            params.append("Name")
+            params = params + ["Name"]
             flag_name = True
-        dataframe = pd.DataFrame()
-        all_categories = self.get_all_categories()
-        category_ids = [key for key, value in all_categories.items() if value in categories]
-        for category_id in category_ids:
-            dataframe = pd.concat(
-                [dataframe, self._get_recursive_ids_prams([category_id], params, is_get_sub_family, display_unit)],
-                ignore_index=True)
+        dataframe = self.select(params).where(categories).execute(is_get_sub_family, display_unit, unit_column)
         if dataframe.empty:
             return dataframe
         if "Family Name" in params:
@@ -391,6 +475,8 @@ class PropDbReaderRevit(PropReader):
         # remove all row have all values is null, ignore dbId and external_id columns
         dataframe = dataframe.dropna(how='all',
                                      subset=[col for col in dataframe.columns if col not in ['dbId', 'external_id']])
+        if typed_columns:
+            dataframe = self.apply_data_types(dataframe)
         return dataframe
 
     def get_data_by_family(self, family_name: str, is_get_sub_family: bool = False,
@@ -463,142 +549,190 @@ class PropDbReaderRevit(PropReader):
         dataframe["Family Name"] = dataframe["Name"].str.extract(r'(.*)\s\[')
         return dataframe
 
-    def _get_recursive_ids(self, db_ids: List[int], get_sub_family: bool, display_unit: bool = False) -> pd.DataFrame:
-        dataframe = pd.DataFrame()
+    def _shard_categories(self, category_ids: List[int], count: int) -> List[List[int]]:
+        """
+        Split categories in contiguous shards having about the same number of instances
+        :param category_ids: dbIds of the categories, in order
+        :param count: the number of shards wanted
+        :return: list of lists of dbIds, in the order of category_ids
+        """
+        hierarchy = self.get_hierarchy()
+        weights = dict.fromkeys(category_ids, 1)
+        for type_id, size in zip(hierarchy.types, np.diff(hierarchy.instance_offsets).tolist()):
+            category_id = hierarchy.type_parents[type_id][0]
+            if category_id in weights:
+                weights[category_id] += size
+        target = sum(weights.values()) / count
+        shards, shard, done = [], [], 0
+        for category_id in category_ids:
+            shard.append(category_id)
+            done += weights[category_id]
+            if done >= target * (len(shards) + 1):
+                shards.append(shard)
+                shard = []
+        if shard:
+            shards.append(shard)
+        return shards
+
+    def _read_shards(self, shards: List[List[int]], workers: int, get_sub_family: bool, display_unit: bool = False,
+                     unit_column: bool = False, is_add_family_name: bool = False) -> pd.DataFrame:
+        """
+        Read the elements below each shard of categories in a pool of processes. The workers memory-map the
+        columns of the database, see :meth:`_get_shared_columns_path`, and the tables are joined in the order
+        of the shards, so rows and columns are in the same order as reading them in this process.
+        :param shards: lists of dbIds of categories
+        :param workers: the number of processes
+        :return: :class:`pandas.DataFrame` : the tables of the shards, one after the other
+        """
+        shards = [shard for shard in shards if len(shard) > 0]
+        if len(shards) == 0:
+            return pd.DataFrame()
+        columns_path = self._get_shared_columns_path()
+        count = len(shards)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, count), initializer=_init_worker,
+                                                    initargs=(columns_path,)) as executor:
+            dataframes = list(executor.map(_read_shard, shards, [get_sub_family] * count, [display_unit] * count,
+                                           [unit_column] * count, [is_add_family_name] * count))
+        dataframes = [dataframe for dataframe in dataframes if not dataframe.empty]
+        if len(dataframes) == 0:
+            return pd.DataFrame()
+        return pd.concat(dataframes, ignore_index=True)
+
+    def _get_recursive_ids(self, db_ids: List[int], get_sub_family: bool, display_unit: bool = False,
+                           unit_column: bool = False) -> pd.DataFrame:
         props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
         if len(db_ids) == 0:
-            return dataframe
-        for id in db_ids:
+            return pd.DataFrame()
+
+        def visit(id):
             props = self.enumerate_properties(id)
             flag_sub_families = False
             properties = {}
+            units = {}
             # if props contain _RC, _RFN, _RFT, it's not a leaf node, continue to get children
             if len([prop for prop in props if prop.name in ["_RC", "_RFN", "_RFT"]]) > 0:
-                ids = self.get_children(id)
-                dataframe = pd.concat([dataframe, self._get_recursive_ids(ids, get_sub_family, display_unit)],
-                                      ignore_index=True)
-                continue
+                return [], True
             for prop in props:
                 if prop.category == "__internalref__" and prop.name == "Sub Family":
                     flag_sub_families = True
                 if prop.name not in props_ignore:
                     if prop.name == "name":
                         properties["Name"] = prop.value
-                    else:
                         if display_unit:
-                            if prop.data_type_context not in ["", None]:
-                                properties[prop.name] = str(prop.value) + " " + str(
-                                    self.units.parse_symbol(prop.data_type_context))
-                            else:
-                                properties[prop.name] = prop.value
+                            units.pop("Name", None)
+                    else:
+                        properties[prop.name] = prop.value
+                        # units are added to whole columns once the table is built
+                        if not display_unit:
+                            continue
+                        if prop.data_type_context not in ["", None]:
+                            units[prop.name] = self._get_unit_symbol(prop.data_type_context)
                         else:
-                            properties[prop.name] = prop.value
+                            units.pop(prop.name, None)
             db_id = id
             external_id = self.ids[id]
             properties['dbId'] = db_id
             properties['external_id'] = external_id
             if flag_sub_families and not get_sub_family:
-                ids = self.get_children(id)
-                dataframe = pd.concat([dataframe, self._get_recursive_ids(ids, get_sub_family, display_unit)],
-                                      ignore_index=True)
-                continue
+                return [], True
             ins = self.get_instance(id)
             if len(ins) > 0:
                 for instance in ins:
-                    if display_unit:
-                        types = self.get_all_properties_display_unit(instance)
-                    else:
-                        types = self.get_properties(instance)
+                    types, type_units = self._get_type_entry(instance, display_unit)
                     properties = {**properties, **types}
-            singleDF = pd.DataFrame(properties, index=[0])
-            dataframe = pd.concat([dataframe, singleDF], ignore_index=True)
-            ids = self.get_children(id)
-            dataframe = pd.concat([dataframe, self._get_recursive_ids(ids, get_sub_family, display_unit)],
-                                  ignore_index=True)
+                    if display_unit:
+                        units = {**{name: unit for name, unit in units.items() if name not in types}, **type_units}
+            return [(properties, units)], True
+
+        rows = list(self.traverse(db_ids, visit))
+        if display_unit:
+            dataframe = pd.DataFrame([properties for properties, _ in rows], dtype=object)
+            units = pd.DataFrame([units for _, units in rows], index=dataframe.index, dtype=object)
+            dataframe = self._apply_units(dataframe, units, unit_column).infer_objects()
+        else:
+            dataframe = pd.DataFrame([properties for properties, _ in rows])
         if 'dbId' in dataframe.columns and 'external_id' in dataframe.columns:
             dataframe = dataframe[
                 ['dbId', 'external_id'] + [col for col in dataframe.columns if col not in ['dbId', 'external_id']]]
         return dataframe
 
     def _get_recursive_ids_prams(self, childs: List[int], params: List[str], get_sub_family: bool,
-                                 display_unit: bool = False) -> pd.DataFrame:
+                                 display_unit: bool = False, unit_column: bool = False) -> pd.DataFrame:
         """
-        Get recursive ids by list of parameters
+        Get recursive ids by list of parameters. Only the avs slots of the parameters are read and the
+        properties of a type are decoded once for all its instances.
         :param childs:  List of child ids, ids is database id
         :param params: List of parameters need get data
         :param get_sub_family: the flag to get sub family or not
         :param display_unit: the flag to display unit or not in value
+        :param unit_column: with display_unit, add unit columns instead of text values
         :return:
         """
-        dataframe = pd.DataFrame()
         props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
         if len(childs) == 0:
-            return dataframe
-        for id in childs:
-            flag_sub_families = False
-            props = self.enumerate_properties(id)
-            # if props contain _RC, _RFN, _RFT, it's not a leaf node, continue to get children
-            if len([prop for prop in props if prop.name in ["_RC", "_RFN", "_RFT"]]) > 0:
-                ids = self.get_children(id)
-                dataframe = pd.concat(
-                    [dataframe, self._get_recursive_ids_prams(ids, params, get_sub_family, display_unit)],
-                    ignore_index=True)
-                continue
-            properties = {}
-            for prop in props:
-                if prop.category == "__internalref__" and prop.name == "Sub Family":
-                    flag_sub_families = True
-                if prop.name not in props_ignore:
-                    if prop.name == "name":
-                        properties["Name"] = prop.value
-                    else:
-                        if display_unit:
-                            if prop.data_type_context not in ["", None]:
-                                properties[prop.name] = str(prop.value) + " " + str(
-                                    self.units.parse_symbol(prop.data_type_context))
-                            else:
-                                properties[prop.name] = prop.value
-                        else:
-                            properties[prop.name] = prop.value
-            db_id = id
-            external_id = self.ids[id]
-            # filter just get properties name in params list
-            properties = {k: v for k, v in properties.items() if k in params}
-            properties['dbId'] = db_id
-            properties['external_id'] = external_id
-            if flag_sub_families and not get_sub_family:
-                ids = self.get_children(id)
-                dataframe = pd.concat(
-                    [dataframe, self._get_recursive_ids_prams(ids, params, get_sub_family, display_unit)],
-                    ignore_index=True)
-                continue
-            # get instances
-            ins = self.get_instance(id)
-            if len(ins) > 0:
-                for instance in ins:
-                    if display_unit:
-                        types = self.get_all_properties_display_unit(instance)
-                    else:
-                        types = self.get_all_properties(instance)
-                    types = {k: v for k, v in types.items() if k in params}
-                    # add unit to value
-                    if display_unit:
-                        for key, value in types.items():
-                            if key in params:
-                                if self.units is not None:
-                                    types[key] = str(value) + " " + str(self.units.parse_symbol(key))
-                    properties = {**properties, **types}
-            single_df = pd.DataFrame(properties, index=[0])
-            dataframe = pd.concat([dataframe, single_df], ignore_index=True)
-            ids = self.get_children(id)
-            dataframe = pd.concat([dataframe, self._get_recursive_ids_prams(ids, params, get_sub_family, display_unit)],
-                                  ignore_index=True)
-        # set dbid and external_id to first and second column if it exists
-        if 'dbId' in dataframe.columns and 'external_id' in dataframe.columns:
-            dataframe = dataframe[
-                ['dbId', 'external_id'] + [col for col in dataframe.columns if col not in ['dbId', 'external_id']]]
+            return pd.DataFrame()
+        ids = np.asarray(self._preorder_ids(childs), dtype=np.int64)
+        # category, family and type nodes are walked through, they are not elements
+        skip = self._owners_mask(self._attr_mask("name", ["_RC", "_RFN", "_RFT"]))
+        if not get_sub_family:
+            skip |= self._owners_mask(self._attr_mask("category", ["__internalref__"]) &
+                                      self._attr_mask("name", ["Sub Family"]))
+        db_ids = ids[~skip[ids]]
+        if len(db_ids) == 0:
+            return pd.DataFrame()
+        names = self._attr_field("name")
+        labels = names.copy()
+        labels[names == "name"] = "Name"
+        selected = np.fromiter((label in params for label in labels), dtype=bool, count=len(labels))
+        selected &= ~self._attr_mask("name", props_ignore)
+        symbols = self._attr_units() if display_unit else np.full(len(names), None, dtype=object)
+
+        rows, attr_ids, val_ids = self._gather_selected_pairs(db_ids, selected)
+        rows_parts = [rows]
+        ranks_parts = [np.zeros(len(rows), dtype=np.int64)]
+        labels_parts = [labels[attr_ids]]
+        values_parts = [self._take_value_array(val_ids)]
+        val_ids_parts = [val_ids]
+        # the instance "name" is renamed "Name" and shown without unit
+        units_parts = [np.where(names[attr_ids] == "name", None, symbols[attr_ids])]
+
+        # properties of each distinct type once, then repeated for its instances
+        link_rows, ranks, types = self._gather_links(db_ids, "__instanceof__")
+        type_ids, inverse = np.unique(types, return_inverse=True)
+        type_rows, type_attr_ids, type_val_ids = self._gather_selected_pairs(type_ids, self._attr_mask("name", params))
+        type_values = self._take_value_array(type_val_ids)
+        type_counts = np.bincount(type_rows, minlength=len(type_ids))
+        counts = type_counts[inverse]
+        index = self._concat_ranges((np.cumsum(type_counts) - type_counts)[inverse], counts)
+        rows_parts.append(np.repeat(link_rows, counts))
+        ranks_parts.append(np.repeat(ranks + 1, counts))
+        labels_parts.append(names[type_attr_ids][index])
+        values_parts.append(type_values[index])
+        val_ids_parts.append(type_val_ids[index])
+        units_parts.append(symbols[type_attr_ids][index])
+
+        # own properties first, then the types in order, the way the dicts were merged
+        rows = np.concatenate(rows_parts)
+        order = np.lexsort((np.concatenate(ranks_parts), rows))
+        rows = rows[order]
+        labels = np.concatenate(labels_parts)[order]
+        values = np.concatenate(values_parts)[order]
+        units = np.concatenate(units_parts)[order]
+        if display_unit and not unit_column:
+            values = self._format_units(values, units, np.concatenate(val_ids_parts)[order])
+        dataframe = self._pivot(len(db_ids), rows, labels, None, values=values)
+        if display_unit and unit_column:
+            units = self._pivot(len(db_ids), rows, labels, None, values=units)
+            dataframe = self._apply_units(dataframe, units, unit_column)
+        dataframe.insert(0, "external_id", self._take_ids(db_ids))
+        dataframe.insert(0, "dbId", db_ids)
         return dataframe
 
+    def _take_value_array(self, val_ids: np.ndarray) -> np.ndarray:
+        values = np.empty(len(val_ids), dtype=object)
+        values[:] = list(self._take_values(val_ids))
+        return values
+
     def get_data_by_external_id(self, external_id: str, is_get_sub_family: bool = False,
                                 display_unit: bool = False) -> pd.DataFrame:
         """
@@ -608,40 +742,98 @@ class PropDbReaderRevit(PropReader):
         :param display_unit:  the flag to display unit or not in value, default is False
         :return: :class:`pandas.DataFrame` : Dataframe contains data by external id
         """
-        db_id = None
-        for idx in range(0, len(self.ids)):
-            if self.ids[idx] == external_id:
-                db_id = idx
-                break
-        if db_id is None:
+        db_id = self.get_db_id(external_id)
+        if db_id == -1:
             return pd.DataFrame()
         dataframe = self._get_recursive_ids([db_id], is_get_sub_family, display_unit)
         return dataframe
 
+    def get_data_by_external_ids(self, external_ids: List[str], is_get_sub_family: bool = False,
+                                 display_unit: bool = False) -> pd.DataFrame:
+        """
+        Get data by external ids(UniqueId Element) in model
+        :param external_ids:  The unique ids of elements in model
+        :param is_get_sub_family:  the flag to get sub family or not, default is False
+        :param display_unit:  the flag to display unit or not in value, default is False
+        :return: :class:`pandas.DataFrame` : Dataframe contains data of the elements found
+        """
+        db_ids = [db_id for db_id in self.get_db_ids(external_ids) if db_id != -1]
+        return self._get_recursive_ids(db_ids, is_get_sub_family, display_unit)
+
     def get_data_by_element_id(self, element_id: str) -> dict:
         """
         Get data by element id in model
         :param element_id:  the element id of element in model. e.g: 9895625
         :return: :class:`dict` : Dictionary contains data by element id
         """
-        rg = re.compile(r'^__\w+__$')
         properties = {}
-        for i in range(0, len(self.ids)):
-            props = self.enumerate_properties(i)
-            for prop in props:
-                if prop.name == "ElementId" and prop.value == str(element_id):
-                    for prop in props:
-                        if not rg.match(prop.category):
-                            properties[prop.name] = prop.value
-                    # get instance
-                    instances = self.get_instance(i)
-                    for instance in instances:
-                        types = self.get_properties(instance)
-                        properties = {**properties, **types}
-                    break
+        for db_id in self._get_value_index("ElementId").get(str(element_id), []):
+            properties.update(self._get_element_properties(db_id))
         properties = dict(sorted(properties.items()))
         return properties
 
+    def get_data_by_element_ids(self, element_ids: List) -> pd.DataFrame:
+        """
+        Get data by element ids in model. The ids are resolved once, the properties of the elements are
+        gathered in one pass and the properties of each type are decoded once for all its instances.
+        :param element_ids:  the element ids of elements in model. e.g: [9895625, 9895626]
+        :return: :class:`pandas.DataFrame` : Dataframe contains one row by element id, in order, with the
+        dbId and element_id columns first. An element id not found has dbId -1 and no properties.
+        """
+        db_ids = np.asarray(self.get_db_ids_by_element_ids(element_ids), dtype=np.int64)
+        # the properties of the element, internal categories like __parent__ excluded
+        rg = re.compile(r'^__\w+__$')
+        categories = self._attr_field("category")
+        public = np.fromiter((category is None or not rg.match(category) for category in categories), dtype=bool,
+                             count=len(categories))
+        rows, attr_ids, val_ids = self._gather_pairs(db_ids)
+        keep = public[attr_ids]
+        rows, attr_ids, val_ids = rows[keep], attr_ids[keep], val_ids[keep]
+        rows_parts = [rows]
+        ranks_parts = [np.zeros(len(rows), dtype=np.int64)]
+        labels_parts = [self._attr_field("name")[attr_ids]]
+        values_parts = [self._take_value_array(val_ids)]
+
+        # the properties of each distinct type from the memo, then repeated for its instances
+        link_rows, ranks, types = self._gather_links(db_ids, "__instanceof__")
+        type_ids, inverse = np.unique(types, return_inverse=True)
+        type_properties = [self._get_type_properties(int(type_id)) for type_id in type_ids]
+        type_counts = np.fromiter((len(properties) for properties in type_properties), dtype=np.int64,
+                                  count=len(type_properties))
+        type_labels = np.empty(int(type_counts.sum()), dtype=object)
+        type_labels[:] = [name for properties in type_properties for name in properties]
+        type_values = np.empty(len(type_labels), dtype=object)
+        type_values[:] = [value for properties in type_properties for value in properties.values()]
+        counts = type_counts[inverse]
+        index = self._concat_ranges((np.cumsum(type_counts) - type_counts)[inverse], counts)
+        rows_parts.append(np.repeat(link_rows, counts))
+        ranks_parts.append(np.repeat(ranks + 1, counts))
+        labels_parts.append(type_labels[index])
+        values_parts.append(type_values[index])
+
+        # own properties first, then the types in order, the way the dicts were merged
+        rows = np.concatenate(rows_parts)
+        order = np.lexsort((np.concatenate(ranks_parts), rows))
+        dataframe = self._pivot(len(db_ids), rows[order], np.concatenate(labels_parts)[order], None,
+                                values=np.concatenate(values_parts)[order])
+        dataframe = dataframe[sorted(dataframe.columns, key=str)]
+        dataframe.insert(0, "element_id", list(element_ids))
+        dataframe.insert(0, "dbId", db_ids)
+        return dataframe
+
+    def _get_element_properties(self, db_id: int) -> dict:
+        """
+        Get the properties of an element merged with the properties of its type
+        """
+        rg = re.compile(r'^__\w+__$')
+        properties = {}
+        for prop in self.enumerate_properties(db_id):
+            if prop.category is None or not rg.match(prop.category):
+                properties[prop.name] = prop.value
+        for instance in self.get_instance(db_id):
+            properties = {**properties, **self._get_type_properties(instance)}
+        return properties
+
     def get_all_parameters(self) -> List:
         """
         Get all parameters in model.
@@ -664,24 +856,14 @@ class PropDbReaderRevit(PropReader):
         Return a dataframe contains all units mapping include name, category, data_type, data_type_context, description, display_name, flags, display_precision, forge_parameter, symbol_unit, data_type_string
         :return:  :class:`pandas.DataFrame` : Dataframe contains all units
         """
-        df = pd.DataFrame(columns=["name", "category", "data_type","data_type_context","description","display_name","flags","display_precision","forge_parameter"])
-        # get from atts
-        for i in range(1,len(self.attrs)):
-            name = self.attrs[i][0]
-            category = self.attrs[i][1]
-            data_type = self.attrs[i][2]
-            data_type_context = self.attrs[i][3]
-            description = self.attrs[i][4]
-            display_name = self.attrs[i][5]
-            flags = self.attrs[i][6]
-            display_precision = self.attrs[i][7]
-            forge_parameter = self.attrs[i][8]
-            new_row = {"name": name, "category": category, "data_type": data_type, "data_type_context": data_type_context,
-                       "description": description, "display_name": display_name, "flags": flags, "display_precision": display_precision,
-                       "forge_parameter": forge_parameter}
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        # insert column symbol_unit = self.units.parse_symbol(<value from data_type_context>)
-        df["symbol_unit"] = df["data_type_context"].apply(lambda x: self.units.parse_symbol(x))
+        return self._get_table("units_mapping", self._build_units_mapping)
+
+    def _build_units_mapping(self) -> pd.DataFrame:
+        df = self.get_attributes_table().rename(columns={"forge_parameter_id": "forge_parameter"})
+        # the symbol is parsed once per distinct data_type_context, not once per attribute
+        contexts = self._attr_field("data_type_context")[1:].tolist()
+        symbols = {context: self.units.parse_symbol(context) for context in dict.fromkeys(contexts)}
+        df["symbol_unit"] = [symbols[context] for context in contexts]
         # enum map : https://stackoverflow.com/questions/76973784/how-to-get-string-type-of-data-type-from-autodesk-platform-services
         enum_mapping = {
             0: "Unknown",
@@ -698,3 +880,20 @@ class PropDbReaderRevit(PropReader):
         }
         df["data_type_string"] = df["data_type"].map(enum_mapping)
         return df
+
+
+# the reader of a worker process of PropDbReaderRevit._read_shards
+_worker_reader = None
+
+
+def _init_worker(columns_path: str):
+    global _worker_reader
+    _worker_reader = PropDbReaderRevit._read_from_columns(columns_path)
+
+
+def _read_shard(category_ids: List[int], get_sub_family: bool, display_unit: bool, unit_column: bool,
+                is_add_family_name: bool) -> pd.DataFrame:
+    dataframe = _worker_reader._get_recursive_ids(category_ids, get_sub_family, display_unit, unit_column)
+    if is_add_family_name and not dataframe.empty:
+        dataframe["Family Name"] = dataframe["Name"].str.extract(r'(.*)\s\[')
+    return dataframe
@@ -0,0 +1,511 @@
+"""
+Copyright (C) 2024  chuongmep.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from array import array
+from typing import List
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+from .JsonStream import JsonStream
+
+
+class StringColumn:
+    """
+    Column of strings stored as one UTF-8 buffer plus start/end offsets.
+    Behaves like a read-only list: supports len(), indexing and iteration.
+    Items which are not strings, like the int placeholder at ids[0], are kept as they are in others.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, nulls: np.ndarray = None, others: dict = None):
+        self.data = data
+        self.offsets = offsets
+        self.nulls = nulls
+        self.others = others or {}
+        self._view = memoryview(data)
+        self._count = len(offsets) - 1
+
+    @classmethod
+    def from_list(cls, values: list):
+        """
+        Build a string column from a list of str (None and other types are kept as they are)
+        :param values: list of strings
+        :return: :class:`StringColumn`
+        """
+        encoded = [value.encode("utf-8") if type(value) is str else b"" for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        nulls = None
+        if any(value is None for value in values):
+            nulls = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        others = {i: value for i, value in enumerate(values) if value is not None and type(value) is not str}
+        return cls(data, offsets, nulls, others)
+
+    @classmethod
+    def from_batches(cls, batches):
+        """
+        Build a string column from lists of str given one after another, e.g. by :class:`JsonStream`
+        :param batches: iterable of lists of strings
+        :return: :class:`StringColumn`
+        """
+        data = bytearray()
+        lengths = array("q")
+        nulls = array("b")
+        others = {}
+        for values in batches:
+            encoded = [value.encode("utf-8") if type(value) is str else b"" for value in values]
+            for i, value in enumerate(values):
+                if value is not None and type(value) is not str:
+                    others[len(lengths) + i] = value
+            data += b"".join(encoded)
+            lengths.extend(map(len, encoded))
+            nulls.extend(value is None for value in values)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(lengths, dtype=np.int64), out=offsets[1:])
+        null_mask = np.frombuffer(nulls, dtype=np.int8).astype(bool)
+        return cls(np.frombuffer(data, dtype=np.uint8), offsets, null_mask if null_mask.any() else None, others)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("StringColumn index out of range")
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        if index in self.others:
+            return self.others[index]
+        offsets = self.offsets
+        return str(self._view[offsets.item(index):offsets.item(index + 1)], "utf-8")
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        result = np.empty(len(self), dtype=object)
+        result[:] = self.tolist()
+        return result
+
+    def take(self, indices) -> list:
+        """
+        Decode the strings at the given positions
+        :param indices: positions of the strings
+        :return: list of str
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.offsets[indices].tolist()
+        ends = self.offsets[indices + 1].tolist()
+        view = self._view
+        result = [str(view[start:end], "utf-8") for start, end in zip(starts, ends)]
+        if self.nulls is not None:
+            for position in np.flatnonzero(self.nulls[indices]).tolist():
+                result[position] = None
+        if self.others:
+            others = np.fromiter(self.others, dtype=np.int64, count=len(self.others))
+            for position in np.flatnonzero(np.isin(indices, others)).tolist():
+                result[position] = self.others[int(indices[position])]
+        return result
+
+    def tolist(self) -> list:
+        return self.take(np.arange(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        size = self.data.nbytes + self.offsets.nbytes
+        return size + (self.nulls.nbytes if self.nulls is not None else 0)
+
+
+class AttrColumns:
+    """
+    Columns of objects_attrs.json split by field. Indexing a row returns the same list
+    layout as the json file, so code written against the raw list keeps working.
+    """
+    FIELDS = ["name", "category", "data_type", "data_type_context", "description", "display_name", "flags",
+              "display_precision", "forge_parameter_id"]
+
+    def __init__(self, columns: dict, valid: np.ndarray, widths: np.ndarray, placeholders: dict = None):
+        self.columns = columns
+        self.valid = valid
+        self.widths = widths
+        self.placeholders = placeholders or {}
+        self._rows = None
+
+    @classmethod
+    def from_list(cls, attrs: list):
+        """
+        Split the attribute rows into per-field columns
+        :param attrs: list decoded from objects_attrs.json
+        :return: :class:`AttrColumns`
+        """
+        size = len(attrs)
+        columns = {field: np.empty(size, dtype=object) for field in cls.FIELDS}
+        valid = np.zeros(size, dtype=bool)
+        widths = np.zeros(size, dtype=np.int8)
+        placeholders = {}
+        for i, row in enumerate(attrs):
+            if isinstance(row, list) and len(row) >= 2:
+                valid[i] = True
+                widths[i] = min(len(row), len(cls.FIELDS))
+                for field, value in zip(cls.FIELDS, row):
+                    columns[field][i] = value
+            else:
+                placeholders[i] = row
+        return cls(columns, valid, widths, placeholders)
+
+    def __len__(self):
+        return len(self.valid)
+
+    def __getitem__(self, index):
+        return self.rows()[index]
+
+    def __iter__(self):
+        return iter(self.rows())
+
+    def rows(self) -> list:
+        """
+        Get the attribute rows in the json layout, built once and kept since attrs is small
+        :return: list of rows
+        """
+        if self._rows is None:
+            rows = []
+            for i in range(len(self.valid)):
+                if self.valid[i]:
+                    rows.append([self.columns[field][i] for field in self.FIELDS[:self.widths[i]]])
+                else:
+                    rows.append(self.placeholders.get(i))
+            self._rows = rows
+        return self._rows
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Get one field for every attribute id, e.g. "name", "category", "display_name"
+        :param field: field name, see :attr:`AttrColumns.FIELDS`
+        :return: :class:`numpy.ndarray` of objects indexed by attribute id
+        """
+        return self.columns[field]
+
+
+class ValuePool:
+    """
+    Typed pool of the values of objects_vals.json. Every value is stored as a kind code plus
+    a slot in the array of its type: ints, floats, strings or generic objects.
+    """
+    NONE, BOOL, INT, FLOAT, STRING, OBJECT = range(6)
+
+    def __init__(self, kinds: np.ndarray, slots: np.ndarray, ints: np.ndarray, floats: np.ndarray,
+                 strings: StringColumn, objects: list):
+        self.kinds = kinds
+        self.slots = slots
+        self.ints = ints
+        self.floats = floats
+        self.strings = strings
+        self.objects = objects
+
+    @classmethod
+    def from_list(cls, values: list):
+        """
+        Build a value pool from the list decoded from objects_vals.json
+        :param values: list of values
+        :return: :class:`ValuePool`
+        """
+        builder = ValuePoolBuilder()
+        builder.extend(values)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self)))).tolist()
+        kind = self.kinds.item(index)
+        slot = self.slots.item(index)
+        if kind == ValuePool.STRING:
+            return self.strings[slot]
+        if kind == ValuePool.INT:
+            return self.ints.item(slot)
+        if kind == ValuePool.FLOAT:
+            return self.floats.item(slot)
+        if kind == ValuePool.BOOL:
+            return bool(self.ints.item(slot))
+        if kind == ValuePool.OBJECT:
+            return self.objects[slot]
+        return None
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.take(np.arange(len(self)))
+
+    def take(self, indices) -> np.ndarray:
+        """
+        Get the values at the given positions in one vectorized gather
+        :param indices: positions of the values (value ids)
+        :return: :class:`numpy.ndarray` of objects
+        """
+        if len(indices) <= 16:
+            result = np.empty(len(indices), dtype=object)
+            result[:] = [self[index] for index in indices]
+            return result
+        indices = np.asarray(indices, dtype=np.int64)
+        kinds = self.kinds[indices]
+        slots = self.slots[indices]
+        result = np.empty(len(indices), dtype=object)
+        mask = kinds == ValuePool.STRING
+        if mask.any():
+            result[mask] = self.strings.take(slots[mask])
+        mask = kinds == ValuePool.INT
+        if mask.any():
+            result[mask] = self.ints[slots[mask]].tolist()
+        mask = kinds == ValuePool.FLOAT
+        if mask.any():
+            result[mask] = self.floats[slots[mask]].tolist()
+        mask = kinds == ValuePool.BOOL
+        if mask.any():
+            result[mask] = self.ints[slots[mask]].astype(bool).tolist()
+        for position in np.flatnonzero(kinds == ValuePool.OBJECT).tolist():
+            result[position] = self.objects[slots[position]]
+        return result
+
+    def tolist(self) -> list:
+        return self.take(np.arange(len(self))).tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return self.kinds.nbytes + self.slots.nbytes + self.ints.nbytes + self.floats.nbytes + self.strings.nbytes
+
+
+class ValuePoolBuilder:
+    """
+    Incremental builder of :class:`ValuePool`, values can be appended one batch at a time.
+    """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.slots = array("i")
+        self.ints = array("q")
+        self.floats = array("d")
+        self.string_data = bytearray()
+        self.string_lengths = array("q")
+        self.objects = []
+
+    def extend(self, values):
+        kinds = self.kinds
+        slots = self.slots
+        ints = self.ints
+        floats = self.floats
+        string_data = self.string_data
+        string_lengths = self.string_lengths
+        for value in values:
+            value_type = type(value)
+            if value_type is str:
+                # objects_vals is already deduplicated, strings go straight to the utf-8 buffer
+                encoded = value.encode("utf-8")
+                kinds.append(ValuePool.STRING)
+                slots.append(len(string_lengths))
+                string_lengths.append(len(encoded))
+                string_data += encoded
+            elif value_type is float:
+                kinds.append(ValuePool.FLOAT)
+                slots.append(len(floats))
+                floats.append(value)
+            elif value_type is int and -2 ** 63 <= value < 2 ** 63:
+                kinds.append(ValuePool.INT)
+                slots.append(len(ints))
+                ints.append(value)
+            elif value_type is bool:
+                kinds.append(ValuePool.BOOL)
+                slots.append(len(ints))
+                ints.append(int(value))
+            elif value is None:
+                kinds.append(ValuePool.NONE)
+                slots.append(0)
+            else:
+                kinds.append(ValuePool.OBJECT)
+                slots.append(len(self.objects))
+                self.objects.append(value)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def build(self) -> ValuePool:
+        pool = ValuePool(np.frombuffer(self.kinds, dtype=np.int8),
+                         np.frombuffer(self.slots, dtype=np.int32),
+                         np.frombuffer(self.ints, dtype=np.int64),
+                         np.frombuffer(self.floats, dtype=np.float64),
+                         self._build_strings(),
+                         self.objects)
+        self.string_data = bytearray()
+        self.string_lengths = array("q")
+        return pool
+
+    def _build_strings(self) -> StringColumn:
+        offsets = np.zeros(len(self.string_lengths) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self.string_lengths, dtype=np.int64), out=offsets[1:])
+        return StringColumn(np.frombuffer(self.string_data, dtype=np.uint8), offsets)
+
+
+class PropColumns:
+    """
+    Columnar form of a property database: the five objects_*.json tables converted to
+    contiguous arrays. offsets and avs are int32 arrays, ids is a :class:`StringColumn`,
+    attrs is an :class:`AttrColumns` and vals is a :class:`ValuePool`.
+    """
+    FORMAT = 2
+
+    def __init__(self, ids: StringColumn, offsets: np.ndarray, avs: np.ndarray, attrs: AttrColumns,
+                 vals: ValuePool):
+        self.ids = ids
+        self.offsets = offsets
+        self.avs = avs
+        self.attrs = attrs
+        self.vals = vals
+
+    @classmethod
+    def from_lists(cls, ids: List[str], offsets: List[int], avs: List[int], attrs: list, vals: list):
+        """
+        Convert the lists decoded from the json files to columns
+        :return: :class:`PropColumns`
+        """
+        return cls(StringColumn.from_list(ids),
+                   np.asarray(offsets, dtype=np.int32),
+                   np.asarray(avs, dtype=np.int32),
+                   AttrColumns.from_list(attrs),
+                   ValuePool.from_list(vals))
+
+    @classmethod
+    def from_json_gzip(cls, ids_source, offsets_source, avs_source, attrs_source, vals_source):
+        """
+        Decode the five objects_*.json.gz files straight into columns, one chunk at a time, so neither the
+        decompressed json text nor the lists of Python objects are held in memory
+        :param ids_source: objects_ids.json.gz as a path, bytes or binary file object, same for the others
+        :return: :class:`PropColumns`
+        """
+        ids = StringColumn.from_batches(JsonStream.iter_gzip_batches(ids_source))
+        offsets = cls._int_column(JsonStream.iter_gzip_batches(offsets_source))
+        avs = cls._int_column(JsonStream.iter_gzip_batches(avs_source))
+        attrs = AttrColumns.from_list(JsonStream.load_gzip(attrs_source))
+        builder = ValuePoolBuilder()
+        for values in JsonStream.iter_gzip_batches(vals_source):
+            builder.extend(values)
+        return cls(ids, offsets, avs, attrs, builder.build())
+
+    @staticmethod
+    def _int_column(batches) -> np.ndarray:
+        column = array("i")
+        for values in batches:
+            column.extend(values)
+        return np.frombuffer(column, dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.offsets.nbytes + self.avs.nbytes + self.vals.nbytes
+
+    def to_lists(self) -> tuple:
+        """
+        Convert the columns back to the lists decoded from the json files
+        :return: tuple of (ids, offsets, avs, attrs, vals)
+        """
+        return self.ids.tolist(), self.offsets.tolist(), self.avs.tolist(), self.attrs.rows(), self.vals.tolist()
+
+    def _arrays(self) -> dict:
+        arrays = {"ids_data": self.ids.data, "ids_offsets": self.ids.offsets, "ids_nulls": self.ids.nulls,
+                  "offsets": self.offsets, "avs": self.avs,
+                  "vals_kinds": self.vals.kinds, "vals_slots": self.vals.slots, "vals_ints": self.vals.ints,
+                  "vals_floats": self.vals.floats, "vals_strings_data": self.vals.strings.data,
+                  "vals_strings_offsets": self.vals.strings.offsets, "vals_strings_nulls": self.vals.strings.nulls}
+        return {name: array for name, array in arrays.items() if array is not None}
+
+    def save(self, path: str):
+        """
+        Save the columns to a directory of .npy files, see :meth:`load`. The files are written to a temporary
+        sibling directory which then replaces the directory, so readers never load a partial save and the
+        files mapped by other processes are not rewritten.
+        :param path: the directory to write, replaced if exists
+        """
+        path = os.path.normpath(path)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        old_path = f"{path}.{uuid.uuid4().hex}.old"
+        try:
+            os.makedirs(temp_path)
+            for name, array in self._arrays().items():
+                np.save(os.path.join(temp_path, name + ".npy"), np.ascontiguousarray(array))
+            with open(os.path.join(temp_path, "attrs.json"), "w", encoding="utf-8") as f:
+                json.dump(self.attrs.rows(), f)
+            with open(os.path.join(temp_path, "vals_objects.json"), "w", encoding="utf-8") as f:
+                json.dump(self.vals.objects, f)
+            with open(os.path.join(temp_path, "ids_others.json"), "w", encoding="utf-8") as f:
+                json.dump([[position, value] for position, value in self.ids.others.items()], f)
+            # written last, a directory without it is an interrupted save
+            with open(os.path.join(temp_path, "columns.json"), "w", encoding="utf-8") as f:
+                json.dump({"format": PropColumns.FORMAT}, f)
+            # a directory can't replace a non-empty directory, the previous save is moved aside first
+            if os.path.exists(path):
+                os.replace(path, old_path)
+            os.replace(temp_path, path)
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        """
+        Check if a directory holds columns saved by :meth:`save`
+        :param path: the directory to check
+        :return: True if the directory can be loaded
+        """
+        marker = os.path.join(path, "columns.json")
+        if not os.path.isfile(marker):
+            return False
+        with open(marker, "r", encoding="utf-8") as f:
+            return json.load(f).get("format") == cls.FORMAT
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """
+        Load columns saved by :meth:`save`
+        :param path: the directory written by :meth:`save`
+        :param mmap: memory-map the arrays instead of reading them, pages are then shared between processes
+        :return: :class:`PropColumns`
+        """
+        if not cls.exists(path):
+            raise Exception(f"Directory {path} does not contain property columns")
+
+        def load_array(name):
+            file_path = os.path.join(path, name + ".npy")
+            if not os.path.exists(file_path):
+                return None
+            return np.load(file_path, mmap_mode="r" if mmap else None)
+
+        with open(os.path.join(path, "attrs.json"), "r", encoding="utf-8") as f:
+            attrs = json.load(f)
+        with open(os.path.join(path, "vals_objects.json"), "r", encoding="utf-8") as f:
+            objects = json.load(f)
+        with open(os.path.join(path, "ids_others.json"), "r", encoding="utf-8") as f:
+            ids_others = {position: value for position, value in json.load(f)}
+        ids = StringColumn(load_array("ids_data"), load_array("ids_offsets"), load_array("ids_nulls"), ids_others)
+        strings = StringColumn(load_array("vals_strings_data"), load_array("vals_strings_offsets"),
+                               load_array("vals_strings_nulls"))
+        vals = ValuePool(load_array("vals_kinds"), load_array("vals_slots"), load_array("vals_ints"),
+                         load_array("vals_floats"), strings, objects)
+        return cls(ids, load_array("offsets"), load_array("avs"), AttrColumns.from_list(attrs), vals)
@@ -14,10 +14,7 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
-import gzip
-import json
 import re
-import codecs
 import requests
 from .Derivative import Derivative
 from .ManifestItem import ManifestItem
@@ -26,32 +23,112 @@ from typing import List
 from .units.DisplayUnits import DisplayUnits
 from .Token import Token
 import concurrent.futures
+import functools
 import os
+import shutil
+import tempfile
+import weakref
+import numpy as np
+from .PropColumns import PropColumns, AttrColumns
+from .DerivativeCache import DerivativeCache
+from .JsonStream import JsonStream
 
 
 class PropReader:
+    COLUMNS_DIR = "objects_columns"
+    TYPE_CACHE_SIZE = 4096
+    # string columns with at most this ratio of distinct values are stored as categorical by apply_data_types
+    CATEGORY_RATIO = 0.5
+    # deeper trees are walked one object at a time by _preorder_ids
+    PREORDER_MAX_LEVELS = 256
+    columnar = False
+    _avs_np = None
+    _offsets_np = None
+    _links = None
+    _postings = None
+    _value_indexes = None
+    _external_ids = None
+    _type_cache = None
+    _attr_units_np = None
+    _unit_symbols = None
+    _tables = None
+    _columns_path = None
 
-    def __init__(self, urn: str = None, token: Token = None, region: str = "US", manifest_item: [ManifestItem] = None):
+    def __init__(self, urn: str = None, token: Token = None, region: str = "US", manifest_item: [ManifestItem] = None,
+                 columnar: bool = False, cache_dir: str = None):
+        """
+        Read the property database of a derivative
+        :param urn: the urn of the model
+        :param token: the token authentication
+        :param region: the region of hub (default is US)
+        :param manifest_item: the manifest item to read, default is the first svf manifest item
+        :param columnar: store the database as contiguous numpy columns (see :class:`PropColumns`) instead of lists
+        :param cache_dir: directory of a local :class:`DerivativeCache`, the decoded database is kept there
+        and memory-mapped on the next open of the same urn and manifest item
+        """
         # get manifest
         self.host = "https://developer.api.autodesk.com"
         self.urn = urn
         self.token = token
         self.region = region
+        self.columnar = columnar
         if manifest_item:
-            derivative = Derivative(self.urn, self.token, self.region)
+            derivative = Derivative(self.urn, self.token, self.region, cache_dir)
             self._read_metadata_item(derivative, manifest_item)
         else:
-            self._read_metadata()
+            self._read_metadata(cache_dir)
         self.units = DisplayUnits()
 
     @classmethod
-    def read_from_resource(cls, path):
+    def read_from_resource(cls, path, columnar: bool = None):
         """
-        Initialize PropReader from svf extracted
+        Initialize PropReader from svf extracted. If the folder was converted by :meth:`convert_resource`,
+        the converted columns are memory-mapped instead of parsing the json files.
         :param path: path of resource extracted by svf, e.g. "path/to/3D.svf" or "path/../Resource"
+        :param columnar: store the database as contiguous numpy columns instead of lists,
+        default is True when the folder is converted, False otherwise
         :remark :see tutorial at https://chuongmep.com/posts/2024-09-25-revit-extractor.html
         :return: Instance
         """
+        parrent_dir = cls._get_resource_dir(path)
+        columns_path = cls._get_columns_path(parrent_dir)
+        if columns_path is not None:
+            return cls._read_from_columns(columns_path, columnar is not False)
+        paths = cls._get_resource_files(parrent_dir)
+        return cls.read_from_json_gzip_files(*paths, columnar=bool(columnar))
+
+    @classmethod
+    def _read_from_columns(cls, columns_path: str, columnar: bool = True):
+        """
+        Initialize from a directory of columns, memory-mapped
+        :param columns_path: directory written by :meth:`PropColumns.save`
+        :param columnar: keep the columns, or convert them to lists
+        :return: Instance
+        """
+        instance = cls.__new__(cls)
+        instance.columnar = columnar
+        instance._set_columns(PropColumns.load(columns_path, mmap=True))
+        instance._columns_path = columns_path
+        instance.units = DisplayUnits()
+        return instance
+
+    @classmethod
+    def convert_resource(cls, path) -> str:
+        """
+        Convert the property database of a svf extracted folder once to a binary sidecar folder "objects_columns"
+        next to the json files. :meth:`read_from_resource` then memory-maps it, so processes reading the same
+        model share the same physical pages.
+        :param path: path of resource extracted by svf, e.g. "path/to/3D.svf" or "path/../Resource"
+        :return: path of the sidecar folder
+        """
+        parrent_dir = cls._get_resource_dir(path)
+        reader = cls.read_from_json_gzip_files(*cls._get_resource_files(parrent_dir), columnar=True)
+        columns_path = os.path.join(parrent_dir, cls.COLUMNS_DIR)
+        reader._get_columns().save(columns_path)
+        return columns_path
+
+    @staticmethod
+    def _get_resource_dir(path) -> str:
         parrent_dir = path
         if path.endswith(".svf"):
             parrent_dir = os.path.abspath(os.path.join(path, os.pardir))
@@ -67,47 +144,103 @@ class PropReader:
             raise Exception(f"Directory {parrent_dir} not found")
         if not parrent_dir.endswith("Resource"):
             raise Exception(f"Directory {parrent_dir} is not Resource")
-        ids_path = os.path.join(parrent_dir, "objects_ids.json.gz")
-        if not os.path.exists(ids_path):
-            raise Exception(f"File {ids_path} not found")
-        offsets_path = os.path.join(parrent_dir, "objects_offs.json.gz")
-        if not os.path.exists(offsets_path):
-            raise Exception(f"File {offsets_path} not found")
-        avs_path = os.path.join(parrent_dir, "objects_avs.json.gz")
-        if not os.path.exists(avs_path):
-            raise Exception(f"File {avs_path} not found")
-        attrs_path = os.path.join(parrent_dir, "objects_attrs.json.gz")
-        if not os.path.exists(attrs_path):
-            raise Exception(f"File {attrs_path} not found")
-        vals_path = os.path.join(parrent_dir, "objects_vals.json.gz")
-        if not os.path.exists(vals_path):
-            raise Exception(f"File {vals_path} not found")
-        return cls.read_from_json_gzip_files(ids_path, offsets_path, avs_path, attrs_path, vals_path)
+        return parrent_dir
+
+    @staticmethod
+    def _get_resource_files(parrent_dir) -> list:
+        paths = []
+        for name in ["ids", "offs", "avs", "attrs", "vals"]:
+            file_path = os.path.join(parrent_dir, f"objects_{name}.json.gz")
+            if not os.path.exists(file_path):
+                raise Exception(f"File {file_path} not found")
+            paths.append(file_path)
+        return paths
+
+    @classmethod
+    def _get_columns_path(cls, parrent_dir):
+        """
+        Get the sidecar folder written by :meth:`convert_resource`, None if missing or older than the json files
+        """
+        columns_path = os.path.join(parrent_dir, cls.COLUMNS_DIR)
+        if not PropColumns.exists(columns_path):
+            return None
+        converted_time = os.path.getmtime(os.path.join(columns_path, "columns.json"))
+        for name in ["ids", "offs", "avs", "attrs", "vals"]:
+            file_path = os.path.join(parrent_dir, f"objects_{name}.json.gz")
+            if os.path.exists(file_path) and os.path.getmtime(file_path) > converted_time:
+                return None
+        return columns_path
+
     @classmethod
     def read_from_json_gzip_files(cls, ids_path: str, offsets_path: str, avs_path: str, attrs_path: str,
-                                  vals_path: str):
-        # unzip and load json files
-        with open(ids_path, 'rb') as f:
-            ids = json.loads(codecs.decode(gzip.decompress(f.read()), 'utf-8'))
-        with open(offsets_path, 'rb') as f:
-            offsets = json.loads(codecs.decode(gzip.decompress(f.read()), 'utf-8'))
-        with open(avs_path, 'rb') as f:
-            avs = json.loads(codecs.decode(gzip.decompress(f.read()), 'utf-8'))
-        with open(attrs_path, 'rb') as f:
-            attrs = json.loads(codecs.decode(gzip.decompress(f.read()), 'utf-8'))
-        with open(vals_path, 'rb') as f:
-            vals = json.loads(codecs.decode(gzip.decompress(f.read()), 'utf-8'))
+                                  vals_path: str, columnar: bool = False):
         instance = cls.__new__(cls)
-        instance.ids = ids
-        instance.offsets = offsets
-        instance.avs = avs
-        instance.attrs = attrs
-        instance.vals = vals
+        instance.columnar = columnar
+        instance._decode_tables(ids_path, offsets_path, avs_path, attrs_path, vals_path)
         instance.units = DisplayUnits()
         return instance
 
-    def _read_metadata(self):
-        derivative = Derivative(self.urn, self.token, self.region)
+    def _decode_tables(self, ids, offsets, avs, attrs, vals):
+        """
+        Decode the five objects_*.json.gz files with :class:`JsonStream`, one chunk at a time,
+        straight into columns when columnar is set
+        :param ids: objects_ids.json.gz as a path, bytes or binary file object, same for the others
+        """
+        if self.columnar:
+            self._set_columns(PropColumns.from_json_gzip(ids, offsets, avs, attrs, vals))
+        else:
+            self._set_tables(*[JsonStream.load_gzip(source) for source in [ids, offsets, avs, attrs, vals]])
+
+    def _set_tables(self, ids, offsets, avs, attrs, vals):
+        if self.columnar:
+            self._set_columns(PropColumns.from_lists(ids, offsets, avs, attrs, vals))
+            return
+        self._assign_tables(ids, offsets, avs, attrs, vals)
+
+    def _set_columns(self, columns: PropColumns):
+        if not self.columnar:
+            self._assign_tables(*columns.to_lists())
+            return
+        self._assign_tables(columns.ids, columns.offsets, columns.avs, columns.attrs, columns.vals)
+
+    def _get_columns(self) -> PropColumns:
+        if self.columnar:
+            return PropColumns(self.ids, self.offsets, self.avs, self.attrs, self.vals)
+        return PropColumns.from_lists(self.ids, self.offsets, self.avs, self.attrs, self.vals)
+
+    def _assign_tables(self, ids, offsets, avs, attrs, vals):
+        self.ids = ids
+        self.offsets = offsets
+        self.avs = avs
+        self.attrs = attrs
+        self.vals = vals
+        self._avs_np = None
+        self._offsets_np = None
+        self._links = None
+        self._postings = None
+        self._value_indexes = None
+        self._external_ids = None
+        self._type_cache = None
+        self._attr_units_np = None
+        self._tables = None
+        self._columns_path = None
+
+    def _get_shared_columns_path(self) -> str:
+        """
+        Get a directory of the columns that other processes can memory-map, see :meth:`PropColumns.load`.
+        The folder the database was loaded from is used when there is one, otherwise the columns are saved
+        once to a temporary directory, removed with the reader.
+        :return: path of the columns directory
+        """
+        if self._columns_path is None or not PropColumns.exists(self._columns_path):
+            path = tempfile.mkdtemp(prefix="aps_columns_")
+            weakref.finalize(self, shutil.rmtree, path, True)
+            self._get_columns().save(path)
+            self._columns_path = path
+        return self._columns_path
+
+    def _read_metadata(self, cache_dir: str = None):
+        derivative = Derivative(self.urn, self.token, self.region, cache_dir)
         manifest_items = derivative.read_svf_manifest_items()
         if len(manifest_items) > 0:
             self._read_metadata_item(derivative, manifest_items[0])
@@ -115,6 +248,15 @@ class PropReader:
             raise Exception("No manifest item found")
 
     def _read_metadata_item(self, derivative, manifest_item):
+        # the version is the hash of the assets of the manifest item, it changes when the model is translated again
+        cache = derivative.cache if manifest_item.version is not None else None
+        cache_key = DerivativeCache.make_key(self.urn, manifest_item.guid, manifest_item.version, "properties")
+        if cache is not None:
+            path = cache.get(cache_key)
+            if path is not None and PropColumns.exists(path):
+                self._set_columns(PropColumns.load(path, mmap=True))
+                self._columns_path = path
+                return
         items = [
             "objects_attrs.json.gz",
             "objects_vals.json.gz",
@@ -164,11 +306,482 @@ class PropReader:
         if missing_files:
             raise Exception(f"Missing required files: {missing_files}")
 
-        self.ids = json.loads(codecs.decode(gzip.decompress(downloaded_files["objects_ids.json.gz"]), 'utf-8'))
-        self.offsets = json.loads(codecs.decode(gzip.decompress(downloaded_files["objects_offs.json.gz"]), 'utf-8'))
-        self.avs = json.loads(codecs.decode(gzip.decompress(downloaded_files["objects_avs.json.gz"]), 'utf-8'))
-        self.attrs = json.loads(codecs.decode(gzip.decompress(downloaded_files["objects_attrs.json.gz"]), 'utf-8'))
-        self.vals = json.loads(codecs.decode(gzip.decompress(downloaded_files["objects_vals.json.gz"]), 'utf-8'))
+        self._decode_tables(*[downloaded_files[file] for file in required_files])
+        if cache is not None:
+            cache.put(cache_key, self._get_columns().save)
+
+    def _avs_array(self) -> np.ndarray:
+        if isinstance(self.avs, np.ndarray):
+            return self.avs
+        if self._avs_np is None:
+            self._avs_np = np.asarray(self.avs, dtype=np.int32)
+        return self._avs_np
+
+    def _offsets_array(self) -> np.ndarray:
+        if self._offsets_np is None:
+            self._offsets_np = np.asarray(self.offsets, dtype=np.int64)
+        return self._offsets_np
+
+    def _av_pairs(self, id) -> tuple:
+        """
+        Get attribute ids and value ids of an object
+        :param id: database id storage in the manifest file
+        :return: tuple of (list of attribute id, list of value id)
+        """
+        av_start = 2 * int(self.offsets[id])
+        av_end = len(self.avs) if id == len(self.offsets) - 1 else 2 * int(self.offsets[id + 1])
+        pairs = self.avs[av_start:av_end]
+        if isinstance(pairs, np.ndarray):
+            pairs = pairs.tolist()
+        return pairs[0::2], pairs[1::2]
+
+    def _take_values(self, val_ids):
+        if isinstance(self.vals, list):
+            return [self.vals[i] for i in val_ids]
+        return self.vals.take(val_ids)
+
+    def _take_ids(self, db_ids) -> list:
+        if isinstance(self.ids, list):
+            return [self.ids[i] for i in db_ids]
+        return self.ids.take(db_ids)
+
+    def _get_unit_symbol(self, data_type_context: str) -> str:
+        """
+        Get the display unit symbol of a data type context, parsed once per context
+        :param data_type_context: e.g. "autodesk.unit.unit:millimeters-1.0.1"
+        :return: the symbol, e.g. "mm", empty if the unit is not known
+        """
+        if self._unit_symbols is None:
+            self._unit_symbols = {}
+        symbol = self._unit_symbols.get(data_type_context)
+        if symbol is None:
+            symbol = str(self.units.parse_symbol(data_type_context))
+            self._unit_symbols[data_type_context] = symbol
+        return symbol
+
+    def _attr_units(self) -> np.ndarray:
+        """
+        Get the display unit symbol of every attribute id, as used by :meth:`get_all_properties_display_unit`
+        :return: :class:`numpy.ndarray` of objects indexed by attribute id, None for the attributes without unit
+        """
+        if self._attr_units_np is None:
+            symbols = np.empty(len(self.attrs), dtype=object)
+            for i, context in enumerate(self._attr_field("data_type_context")):
+                if context not in ["", None]:
+                    symbols[i] = self._get_unit_symbol(context)
+            self._attr_units_np = symbols
+        return self._attr_units_np
+
+    @staticmethod
+    def _format_units(values, symbols, value_ids=None) -> np.ndarray:
+        """
+        Append the unit symbols to the values, in one pass for all values
+        :param values: values, any type
+        :param symbols: unit symbol of each value, None to keep the value as it is
+        :param value_ids: optional ids of the values in the values table, to format each distinct
+            (value, symbol) pair only once
+        :return: :class:`numpy.ndarray` of objects, "<value> <symbol>" where there is a symbol
+        """
+        values = np.array(values, dtype=object)
+        symbols = np.asarray(symbols, dtype=object)
+        positions = np.flatnonzero(pd.notna(symbols))
+        if len(positions) == 0:
+            return values
+        if value_ids is None:
+            values[positions] = [f"{value} {symbol}" for value, symbol in
+                                 zip(values[positions].tolist(), symbols[positions].tolist())]
+            return values
+        symbol_codes, distinct_symbols = pd.factorize(symbols[positions])
+        keys = np.asarray(value_ids, dtype=np.int64)[positions] * len(distinct_symbols) + symbol_codes
+        keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        formatted = np.array([f"{value} {symbol}" for value, symbol in
+                              zip(values[positions[first]].tolist(), symbols[positions[first]].tolist())],
+                             dtype=object)
+        values[positions] = formatted[inverse.ravel()]
+        return values
+
+    @classmethod
+    def _apply_units(cls, dataframe: pd.DataFrame, units: pd.DataFrame, unit_column: bool = False) -> pd.DataFrame:
+        """
+        Add the display units to a table, one column at a time
+        :param dataframe: table of values, of object dtype so numbers are not converted yet
+        :param units: table aligned on dataframe with the unit symbol of each value, None without unit
+        :param unit_column: keep the values and add a "<column> Unit" column after each column having units,
+        instead of appending the symbol to the values as text
+        :return: :class:`pandas.DataFrame` with units
+        """
+        for column in units.columns:
+            symbols = units[column]
+            mask = symbols.notna()
+            if not mask.any():
+                continue
+            if unit_column:
+                dataframe.insert(dataframe.columns.get_loc(column) + 1, f"{column} Unit", symbols.where(mask, None))
+            else:
+                dataframe[column] = cls._format_units(dataframe[column].to_numpy(dtype=object), symbols.to_numpy())
+        return dataframe
+
+    def _column_data_types(self, field: str = "name") -> dict:
+        """
+        Get the data type of the attributes by name, from the data_type field of objects_attrs
+        :param field: field of objects_attrs used as column name, e.g. "name" or "display_name"
+        :return: :class:`dict` of column name and data type, names having several data types are left out
+        """
+        data_types = {}
+        for label, data_type in zip(self._attr_field(field).tolist(), self._attr_field("data_type").tolist()):
+            if label is None:
+                continue
+            # the Revit readers rename the instance "name" to "Name"
+            for column in ([label, "Name"] if label == "name" else [label]):
+                data_types.setdefault(column, set()).add(data_type)
+        return {column: types.pop() for column, types in data_types.items() if len(types) == 1}
+
+    def apply_data_types(self, dataframe: pd.DataFrame, field: str = "name") -> pd.DataFrame:
+        """
+        Convert the columns of a table of properties to the data type of their attributes: Boolean to bool,
+        Integer to int64, Double to float64 (the nullable boolean and Int64 when values are missing) and
+        strings with few distinct values, e.g. Category or Level, to categorical.
+        Columns whose values do not match, e.g. numbers with units as text, are kept as they are.
+        :param dataframe: table of properties, one column by attribute
+        :param field: field of objects_attrs used as column name, e.g. "name" or "display_name"
+        :return: :class:`pandas.DataFrame` with typed columns
+        """
+        # data type enum, see get_units_mapping of PropDbReaderRevit
+        boolean, integer, double, strings = 1, 2, 3, (20, 21)
+        data_types = self._column_data_types(field)
+        for column in dataframe.columns:
+            data_type = data_types.get(column)
+            series = dataframe[column]
+            try:
+                if data_type == boolean:
+                    series = series.astype("boolean")
+                    series = series if series.hasnans else series.astype(bool)
+                elif data_type == integer:
+                    series = series.astype("Int64")
+                    series = series if series.hasnans else series.astype(np.int64)
+                elif data_type == double:
+                    if not pd.api.types.is_numeric_dtype(series):
+                        continue
+                    series = series.astype(np.float64)
+                elif data_type in strings:
+                    if series.nunique() > self.CATEGORY_RATIO * len(series):
+                        continue
+                    series = series.astype("category")
+                else:
+                    continue
+            except (TypeError, ValueError):
+                continue
+            dataframe[column] = series
+        return dataframe
+
+    def _attr_field(self, field: str) -> np.ndarray:
+        """
+        Get one field of objects_attrs for every attribute id, None for the placeholder rows
+        :param field: field name, e.g. "name", "category", "display_name"
+        :return: :class:`numpy.ndarray` of objects indexed by attribute id
+        """
+        if not isinstance(self.attrs, list):
+            return self.attrs.column(field)
+        index = AttrColumns.FIELDS.index(field)
+        column = np.empty(len(self.attrs), dtype=object)
+        for i, attr_obj in enumerate(self.attrs):
+            if isinstance(attr_obj, list) and len(attr_obj) > max(index, 1):
+                column[i] = attr_obj[index]
+        return column
+
+    def _attr_mask(self, field: str, keys: List[str]) -> np.ndarray:
+        """
+        Mark the attribute ids whose field is one of keys
+        :param field: field name, e.g. "name", "category", "display_name"
+        :param keys: values to look for
+        :return: :class:`numpy.ndarray` of bool indexed by attribute id
+        """
+        column = self._attr_field(field)
+        keys = set(keys)
+        return np.fromiter((key in keys for key in column), dtype=bool, count=len(column))
+
+    def _attr_public_mask(self) -> np.ndarray:
+        """
+        Mark the attribute ids kept by :meth:`get_properties`: category set and not internal like __child__
+        :return: :class:`numpy.ndarray` of bool indexed by attribute id
+        """
+        rg = re.compile(r'^__\w+__$')
+        column = self._attr_field("category")
+        return np.fromiter((bool(category) and not rg.match(category) for category in column), dtype=bool,
+                           count=len(column))
+
+    def _gather_pairs(self, db_ids) -> tuple:
+        """
+        Get the (attribute, value) pairs of many objects in one vectorized pass over offsets and avs
+        :param db_ids: database ids, ids out of range have no pairs
+        :return: tuple of (row, attribute id, value id) arrays, row is the position of the object in db_ids
+        """
+        rows, pair_index = self._pair_index(db_ids)
+        avs = self._avs_array()
+        return rows, avs[2 * pair_index], avs[2 * pair_index + 1]
+
+    def _pair_index(self, db_ids) -> tuple:
+        """
+        Get the positions in avs (counted in pairs) of the pairs of many objects
+        :param db_ids: database ids, ids out of range have no pairs
+        :return: tuple of (row, pair position) arrays, row is the position of the object in db_ids
+        """
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        offsets = self._offsets_array()
+        valid = (db_ids > 0) & (db_ids < len(offsets))
+        positions = np.flatnonzero(valid)
+        db_ids = db_ids[valid]
+        starts = offsets[db_ids]
+        counts = np.append(offsets[1:], len(self._avs_array()) // 2)[db_ids] - starts
+        return np.repeat(positions, counts), self._concat_ranges(starts, counts)
+
+    @staticmethod
+    def _concat_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Concatenate the ranges [start, start + count) without a python loop
+        """
+        # each item is the start of its range plus its running position inside the range
+        firsts = np.cumsum(counts) - counts
+        return np.repeat(starts - firsts, counts) + np.arange(int(counts.sum()))
+
+    def _gather_selected_pairs(self, db_ids, selected: np.ndarray) -> tuple:
+        """
+        Get the pairs of the selected attribute ids of many objects from the inverted index, only the avs slots
+        of the selected attributes are read
+        :param db_ids: database ids, may repeat
+        :param selected: :class:`numpy.ndarray` of bool indexed by attribute id
+        :return: tuple of (row, attribute id, value id) arrays, row is the position of the object in db_ids,
+        ordered by row then avs order
+        """
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        pair_index = self._get_postings(selected)
+        owners = self._pair_owners(pair_index)
+        # match every pair to the positions of its owner in db_ids
+        order = np.argsort(db_ids, kind="stable")
+        sorted_ids = db_ids[order]
+        starts = np.searchsorted(sorted_ids, owners, side="left")
+        counts = np.searchsorted(sorted_ids, owners, side="right") - starts
+        rows = order[self._concat_ranges(starts, counts)]
+        pair_index = np.repeat(pair_index, counts)
+        by_row = np.argsort(rows, kind="stable")
+        rows = rows[by_row]
+        pair_index = pair_index[by_row]
+        avs = self._avs_array()
+        return rows, avs[2 * pair_index], avs[2 * pair_index + 1]
+
+    def _owners_mask(self, selected: np.ndarray) -> np.ndarray:
+        """
+        Mark the objects having at least one of the selected attribute ids
+        :param selected: :class:`numpy.ndarray` of bool indexed by attribute id
+        :return: :class:`numpy.ndarray` of bool indexed by database id
+        """
+        mask = np.zeros(len(self.offsets), dtype=bool)
+        mask[self._pair_owners(self._get_postings(selected))] = True
+        return mask
+
+    def _pivot(self, n_rows: int, rows: np.ndarray, labels: np.ndarray, val_ids: np.ndarray,
+               values: np.ndarray = None) -> pd.DataFrame:
+        """
+        Spread (row, label, value id) triples to a wide table. Columns follow the order labels first appear,
+        a label repeated in a row keeps the last value, as assigning the properties to a dict would.
+        :param n_rows: number of rows of the table
+        :param rows: row of each pair
+        :param labels: column label of each pair
+        :param val_ids: value id of each pair
+        :param values: the values of the pairs when already decoded, val_ids is ignored then
+        :return: :class:`pandas.DataFrame` without index column
+        """
+        codes, columns = pd.factorize(labels, use_na_sentinel=False)
+        n_columns = len(columns)
+        cells = rows.astype(np.int64) * n_columns + codes
+        _, last = np.unique(cells[::-1], return_index=True)
+        last = len(cells) - 1 - last
+        table = np.full((n_rows, n_columns), np.nan, dtype=object)
+        if values is None:
+            values = np.empty(len(last), dtype=object)
+            values[:] = list(self._take_values(val_ids[last]))
+        else:
+            values = values[last]
+        table[rows[last], codes[last]] = values
+        return pd.DataFrame(table, columns=list(columns)).infer_objects()
+
+    def traverse(self, db_ids: List[int], visitor):
+        """
+        Walk db_ids and their descendants with an explicit stack, parent before children, in the same order
+        as a recursive walk but without hitting the recursion limit on deep trees
+        :param db_ids: list of database id to start from
+        :param visitor: function called with every visited database id, returns a tuple (rows, descend):
+        rows is a list of rows to yield, descend tells whether to walk the children of the id
+        :return: generator of the rows returned by visitor, in visiting order
+        """
+        stack = list(reversed(db_ids))
+        while stack:
+            id = stack.pop()
+            rows, descend = visitor(id)
+            yield from rows
+            if descend:
+                stack.extend(reversed(self.get_children(id)))
+
+    def _preorder_ids(self, db_ids: List[int]) -> List[int]:
+        """
+        Get db_ids and all their descendants, parent first, in the order a recursive walk visits them.
+        The tree is expanded one level at a time from the child links, then every object is put at its
+        position in the walk from the sizes of the subtrees before it. Trees deeper than
+        :attr:`PREORDER_MAX_LEVELS` are walked with :meth:`traverse` instead.
+        :param db_ids: list of database id storage in the manifest file
+        :return: list of database id
+        """
+        level = np.asarray(db_ids, dtype=np.int64)
+        levels, parents = [level], [None]
+        while len(level) > 0:
+            if len(levels) > self.PREORDER_MAX_LEVELS:
+                return list(self.traverse(db_ids, lambda id: ([id], True)))
+            # rows is the position of the parent in the level above, children of a parent are contiguous
+            rows, _, level = self._gather_links(level, "__child__")
+            levels.append(level)
+            parents.append(rows)
+        sizes = [np.ones(len(level), dtype=np.int64) for level in levels]
+        for depth in range(len(levels) - 1, 0, -1):
+            sizes[depth - 1] += np.bincount(parents[depth], weights=sizes[depth],
+                                            minlength=len(levels[depth - 1])).astype(np.int64)
+        ids = np.empty(int(sizes[0].sum()), dtype=np.int64)
+        positions = np.cumsum(sizes[0]) - sizes[0]
+        ids[positions] = levels[0]
+        for depth in range(1, len(levels)):
+            rows = parents[depth]
+            # a child comes after its parent and the subtrees of its previous siblings
+            before = np.cumsum(sizes[depth]) - sizes[depth]
+            before -= before[np.searchsorted(rows, rows, side="left")]
+            positions = positions[rows] + 1 + before
+            ids[positions] = levels[depth]
+        return ids.tolist()
+
+    def _get_recursive_child(self, output: dict, id, name: str):
+        """
+        Find the nearest descendants of id having the property name, without walking below them
+        :param output: :class:`dict` filled with key is database id, value is the stripped property value
+        :param id: database id to start from, it is not checked itself
+        :param name: property name, e.g. "_RC"
+        """
+
+        def visit(child):
+            property = [prop.value for prop in self.enumerate_properties(child) if prop.name == name]
+            if len(property) == 0:
+                return [], True
+            if str(property[0]) == "":
+                return [], False
+            return [(child, property[0].strip())], False
+
+        output.update(self.traverse(self.get_children(id), visit))
+
+    def _build_postings(self) -> tuple:
+        """
+        Build the inverted index of avs: for every attribute id the positions of its pairs, in avs order.
+        The object and the value of a pair are found back from its position, so the index is a single array.
+        :return: tuple of (offsets, positions), the postings of attribute id i are positions[offsets[i]:offsets[i + 1]]
+        """
+        _, pair_index = self._pair_index(np.arange(len(self.offsets)))
+        attr_ids = self._avs_array()[2 * pair_index]
+        n_attrs = max(len(self.attrs), int(attr_ids.max(initial=-1)) + 1)
+        offsets = np.zeros(n_attrs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(attr_ids, minlength=n_attrs), out=offsets[1:])
+        dtype = np.int32 if len(pair_index) < 2 ** 31 else np.int64
+        positions = pair_index[np.argsort(attr_ids, kind="stable")].astype(dtype)
+        return offsets, positions
+
+    def _get_postings(self, selected: np.ndarray) -> tuple:
+        """
+        Get the pairs of the selected attribute ids from the inverted index, built on first use
+        :param selected: :class:`numpy.ndarray` of bool indexed by attribute id
+        :return: :class:`numpy.ndarray` of pair positions in avs, in avs order
+        """
+        if self._postings is None:
+            self._postings = self._build_postings()
+        offsets, positions = self._postings
+        attr_ids = np.flatnonzero(selected)
+        attr_ids = attr_ids[attr_ids < len(offsets) - 1]
+        starts = offsets[attr_ids]
+        pair_index = positions[self._concat_ranges(starts, offsets[attr_ids + 1] - starts)]
+        if len(attr_ids) > 1:
+            pair_index.sort()
+        return pair_index
+
+    def _pair_owners(self, pair_index: np.ndarray) -> np.ndarray:
+        """
+        Get the database id owning each pair position
+        """
+        return np.searchsorted(self._offsets_array(), pair_index, side="right") - 1
+
+    def _values_by_field(self, field: str, keys: List[str]) -> dict:
+        """
+        Get the distinct values of the attributes whose field is one of keys, from the inverted index
+        :param field: field name, e.g. "name", "display_name"
+        :param keys: values of the field to look for
+        :return: :class:`dict` key is the field value, value is list of distinct values in avs order
+        """
+        column = self._attr_field(field)
+        pair_index = self._get_postings(self._attr_mask(field, keys))
+        avs = self._avs_array()
+        attr_ids = avs[2 * pair_index]
+        val_ids = avs[2 * pair_index + 1]
+        # key code of each pair, then keep the first pair of every (key, value id)
+        codes = np.zeros(len(column), dtype=np.int64)
+        key_index = {}
+        for attr_id in np.unique(attr_ids).tolist():
+            codes[attr_id] = key_index.setdefault(column[attr_id], len(key_index))
+        key_names = list(key_index)
+        pair_codes = codes[attr_ids] * (int(val_ids.max(initial=0)) + 1) + val_ids
+        _, first = np.unique(pair_codes, return_index=True)
+        first.sort()
+        pair_keys = codes[attr_ids[first]]
+        # group the pairs by key, keys in order of first appearance
+        order = np.argsort(pair_keys, kind="stable")
+        key_codes, key_first, key_counts = np.unique(pair_keys, return_index=True, return_counts=True)
+        bounds = np.concatenate(([0], np.cumsum(key_counts))).tolist()
+        values = list(self._take_values(val_ids[first[order]]))
+        result = {}
+        for i in np.argsort(key_first).tolist():
+            key_values = values[bounds[i]:bounds[i + 1]]
+            try:
+                distinct = list(dict.fromkeys(key_values))
+            except TypeError:
+                distinct = []
+                for value in key_values:
+                    if value not in distinct:
+                        distinct.append(value)
+            result[key_names[key_codes[i]]] = distinct
+        return result
+
+    def _get_value_index(self, name: str) -> dict:
+        """
+        Get the objects by value of a property, e.g. "ElementId", built once from the inverted index
+        :param name: property name
+        :return: :class:`dict` key is the value as str, value is list of database id having it, in order
+        """
+        if self._value_indexes is None:
+            self._value_indexes = {}
+        if name not in self._value_indexes:
+            pair_index = self._get_postings(self._attr_mask("name", [name]))
+            owners = self._pair_owners(pair_index).tolist()
+            values = self._take_values(self._avs_array()[2 * pair_index + 1])
+            index = {}
+            for owner, value in zip(owners, values):
+                db_ids = index.setdefault(str(value), [])
+                if not db_ids or db_ids[-1] != owner:
+                    db_ids.append(owner)
+            self._value_indexes[name] = index
+        return self._value_indexes[name]
+
+    def _get_external_id_index(self) -> dict:
+        """
+        Get the database id by external id, built once
+        :return: :class:`dict` key is external id, value is the first database id having it
+        """
+        if self._external_ids is None:
+            ids = list(self.ids)
+            # built backward so the first database id of a repeated external id wins
+            self._external_ids = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+        return self._external_ids
 
     def enumerate_properties(self, id) -> list:
         """
@@ -178,26 +791,23 @@ class PropReader:
         """
         properties = []
         if 0 < id < len(self.offsets):
-            av_start = 2 * self.offsets[id]
-            av_end = len(self.avs) if id == len(self.offsets) - 1 else 2 * self.offsets[id + 1]
-            for i in range(av_start, av_end, 2):
-                attr_offset = self.avs[i]
-                val_offset = self.avs[i + 1]
+            external_id = self.ids[id]
+            attr_ids, val_ids = self._av_pairs(id)
+            for attr_offset, value in zip(attr_ids, self._take_values(val_ids)):
                 attr_obj = self.attrs[attr_offset]
 
                 # Check if attr_obj is a list and has at least two elements
                 if isinstance(attr_obj, list) and len(attr_obj) >= 2:
-                    property_id = self.ids[id]
+                    property_id = external_id
                     name = attr_obj[0]
                     category = attr_obj[1]
-                    data_type = self.attrs[2]
+                    data_type = attr_obj[2]
                     data_type_context = attr_obj[3]
                     description = attr_obj[4]
                     display_name = attr_obj[5]
                     flags = attr_obj[6]
                     display_precision = attr_obj[7]
                     forge_parameter_id = attr_obj[8]
-                value = self.vals[val_offset]
                 properties.append(
                     Property(property_id, name, category, data_type, data_type_context, description, display_name,
                              flags,
@@ -230,32 +840,60 @@ class PropReader:
             props[prop.name] = prop.value
         return props
 
+    def get_properties_bulk(self, db_ids: List[int], names: List[str] = None) -> dict:
+        """
+        Get the properties of many objects at once as columns, one item per (object, property) pair.
+        The avs ranges of all objects are gathered in one vectorized pass, no Property object is created.
+        :param db_ids: list of database id storage in the manifest file, ids out of range have no properties
+        :param names: names of the properties to get, default is all properties exclude internal properties
+        like :meth:`get_properties`
+        :return: dict of :class:`numpy.ndarray` with keys dbId, name, value, ordered by object then avs order
+        """
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        if names is None:
+            rows, attr_ids, val_ids = self._gather_pairs(db_ids)
+            keep = self._attr_public_mask()[attr_ids]
+            rows, attr_ids, val_ids = rows[keep], attr_ids[keep], val_ids[keep]
+        else:
+            rows, attr_ids, val_ids = self._gather_selected_pairs(db_ids, self._attr_mask("name", names))
+        values = np.empty(len(val_ids), dtype=object)
+        values[:] = list(self._take_values(val_ids))
+        return {"dbId": db_ids[rows].astype(np.int32),
+                "name": self._attr_field("name")[attr_ids],
+                "value": values}
+
+    def _get_table(self, name: str, build) -> pd.DataFrame:
+        """
+        Get a raw table, built on the first call and kept for the life of the reader. The frames are shared,
+        copy them before modifying.
+        :param name: key of the table
+        :param build: function returning the :class:`pandas.DataFrame`
+        :return: :class:`pandas.DataFrame`
+        """
+        if self._tables is None:
+            self._tables = {}
+        if name not in self._tables:
+            self._tables[name] = build()
+        return self._tables[name]
+
     def get_entities_table(self) -> pd.DataFrame:
-        data = self.ids
-        df = pd.DataFrame(data, columns=["dbId"])
-        return df
+        return self._get_table("entities", lambda: pd.DataFrame({"dbId": np.asarray(self.ids, dtype=object)},
+                                                                copy=False))
 
     def get_values_table(self) -> pd.DataFrame:
-        data = self.vals
-        df = pd.DataFrame(data, columns=["value"])
-        return df
+        return self._get_table("values", lambda: pd.DataFrame({"value": np.asarray(self.vals, dtype=object)},
+                                                              copy=False))
 
     def get_attributes_table(self) -> pd.DataFrame:
-        data = self.attrs
-        data = data[1:]
-        df = pd.DataFrame(data, columns=['name', 'category', 'data_type', 'data_type_context', 'description',
-                                         'display_name', 'flags', 'display_precision', 'forge_parameter_id'])
-        return df
+        # the columns are slices of the attrs columns, the first row is a placeholder
+        return self._get_table("attributes", lambda: pd.DataFrame(
+            {field: self._attr_field(field)[1:] for field in AttrColumns.FIELDS}, copy=False).infer_objects())
 
     def get_avs_table(self) -> pd.DataFrame:
-        data = self.avs
-        df = pd.DataFrame(data, columns=['entId'])
-        return df
+        return self._get_table("avs", lambda: pd.DataFrame({"entId": self._avs_array()}, copy=False))
 
     def get_offsets_table(self) -> pd.DataFrame:
-        data = self.offsets
-        df = pd.DataFrame(data, columns=['offset'])
-        return df
+        return self._get_table("offsets", lambda: pd.DataFrame({"offset": np.asarray(self.offsets)}, copy=False))
 
     def get_all_properties_display_unit(self, id) -> dict:
         """
@@ -268,29 +906,69 @@ class PropReader:
             value = prop.value
             unit_type = prop.data_type_context
             if unit_type not in ["", None]:
-                unit = self.units.parse_symbol(unit_type)
+                unit = self._get_unit_symbol(unit_type)
                 props[prop.name] = f"{value} {unit}"
             else:
                 props[prop.name] = value
         return props
 
+    def _get_type_properties(self, type_id: int, display_unit: bool = False) -> dict:
+        """
+        Get the properties of a type shared by many instances, decoded once and kept in a bounded memo
+        of :attr:`TYPE_CACHE_SIZE` types for the life of the reader
+        :param type_id: database id of the type
+        :param display_unit: values with display unit as :meth:`get_all_properties_display_unit`, else the
+        properties of :meth:`get_properties`
+        :return: :class:`dict` of properties, shared by all callers so it must not be modified
+        """
+        properties, units = self._get_type_entry(type_id, display_unit)
+        if not units:
+            return properties
+        return {name: f"{value} {units[name]}" if name in units else value for name, value in properties.items()}
+
+    def _get_type_entry(self, type_id: int, display_unit: bool = False) -> tuple:
+        """
+        Get the memo entry of a type: its values and, with display_unit, the unit symbol by property name
+        :return: tuple of (:class:`dict` of properties, :class:`dict` of unit symbols), both must not be modified
+        """
+        if self._type_cache is None:
+            self._type_cache = functools.lru_cache(maxsize=self.TYPE_CACHE_SIZE)(self._read_type_entry)
+        return self._type_cache(type_id, display_unit)
+
+    def _read_type_entry(self, type_id: int, display_unit: bool) -> tuple:
+        if not display_unit:
+            return self.get_properties(type_id), {}
+        # the properties of get_all_properties_display_unit, the unit kept apart from the value
+        properties = {}
+        units = {}
+        for prop in self.enumerate_properties(type_id):
+            properties[prop.name] = prop.value
+            if prop.data_type_context not in ["", None]:
+                units[prop.name] = self._get_unit_symbol(prop.data_type_context)
+            else:
+                units.pop(prop.name, None)
+        return properties, units
+
+    def type_cache_info(self) -> dict:
+        """
+        Get the statistics of the memo of type properties
+        :return: :class:`dict` of hits, misses, maxsize, currsize and hit_rate (hits / lookups, 0 without lookup)
+        """
+        if self._type_cache is None:
+            hits, misses, currsize = 0, 0, 0
+        else:
+            hits, misses, _, currsize = self._type_cache.cache_info()
+        lookups = hits + misses
+        return {"hits": hits, "misses": misses, "maxsize": self.TYPE_CACHE_SIZE, "currsize": currsize,
+                "hit_rate": hits / lookups if lookups else 0.0}
+
     def get_property_values_by_names(self, names: List[str]) -> dict:
-        result = {}
-        for i in range(len(self.offsets)):
-            av_start = 2 * self.offsets[i]
-            av_end = len(self.avs) if i == len(self.offsets) - 1 else 2 * self.offsets[i + 1]
-            for j in range(av_start, av_end, 2):
-                attr_offset = self.avs[j]
-                attr_obj = self.attrs[attr_offset]
-                if isinstance(attr_obj, list) and len(attr_obj) >= 2:
-                    name = attr_obj[0]
-                    if name in names:
-                        value = self.vals[self.avs[j + 1]]
-                        values = result.get(name, [])
-                        if value not in values:
-                            values.append(value)
-                            result[name] = values
-        return result
+        """
+        Get distinct property values by names. e.g. : ["Comments", "name"]
+        :param names: list of property names to get values
+        :return: :class:`dict` key is property name, value is list of distinct values
+        """
+        return self._values_by_field("name", names)
 
     def get_property_values_by_display_names(self, display_names: List[str]) -> dict:
         """
@@ -298,23 +976,7 @@ class PropReader:
         :param display_names: list of display names to get values
         :return:
         """
-        result = {}
-        for i in range(len(self.offsets)):
-            av_start = 2 * self.offsets[i]
-            av_end = len(self.avs) if i == len(self.offsets) - 1 else 2 * self.offsets[i + 1]
-            for j in range(av_start, av_end, 2):
-                attr_offset = self.avs[j]
-                attr_obj = self.attrs[attr_offset]
-                if isinstance(attr_obj, list) and len(attr_obj) >= 2:
-                    display_name = attr_obj[5]
-                    if display_name in display_names:
-                        value = self.vals[self.avs[j + 1]]
-                        values = result.get(display_name, [])
-                        if value not in values:
-                            values.append(value)
-                            result[display_name] = values
-
-        return result
+        return self._values_by_field("display_name", display_names)
 
     def get_properties_group_by_category(self, id) -> dict:
         """
@@ -343,17 +1005,64 @@ class PropReader:
 
         return properties
 
+    def _build_links(self) -> dict:
+        """
+        Build the parent/child/instanceof/internalref links of all objects from the inverted index of avs
+        :return: :class:`dict` key is the link category, value is a tuple of CSR arrays (offsets, targets)
+        """
+        n = len(self.offsets)
+        links = {}
+        for category in ["__child__", "__parent__", "__instanceof__", "__internalref__"]:
+            pair_index = self._get_postings(self._attr_mask("category", [category]))
+            owners = self._pair_owners(pair_index)
+            val_ids = self._avs_array()[2 * pair_index + 1]
+            targets = np.fromiter((int(value) for value in self._take_values(val_ids)), dtype=np.int64,
+                                  count=len(owners))
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(owners, minlength=n), out=offsets[1:])
+            links[category] = (offsets, targets)
+        return links
+
+    def _get_links(self, id, category: str) -> list:
+        """
+        Get the ids linked to an object by a link category, e.g. __child__
+        :param id: database id storage in the manifest file
+        :param category: link category, one of __child__, __parent__, __instanceof__, __internalref__
+        :return: list of database id
+        """
+        if not 0 < id < len(self.offsets):
+            return []
+        if self._links is None:
+            self._links = self._build_links()
+        offsets, targets = self._links[category]
+        return targets[offsets[id]:offsets[id + 1]].tolist()
+
+    def _gather_links(self, db_ids, category: str) -> tuple:
+        """
+        Get the links of many objects at once, e.g. the types of instances with __instanceof__
+        :param db_ids: database ids
+        :param category: link category, one of __child__, __parent__, __instanceof__, __internalref__
+        :return: tuple of (row, rank, target) arrays, row is the position of the object in db_ids and rank the
+        position of the link in the links of the object
+        """
+        if self._links is None:
+            self._links = self._build_links()
+        offsets, targets = self._links[category]
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        valid = (db_ids > 0) & (db_ids < len(self.offsets))
+        starts = np.where(valid, offsets[np.where(valid, db_ids, 0)], 0)
+        counts = np.where(valid, offsets[np.where(valid, db_ids, 0) + 1], 0) - starts
+        rows = np.repeat(np.arange(len(db_ids)), counts)
+        ranks = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, ranks, targets[self._concat_ranges(starts, counts)]
+
     def get_children(self, id) -> list:
         """
         Get all children of an object
         :param id: database id storage in the manifest file
         :return: list of children (database id)
         """
-        children = []
-        for prop in self.enumerate_properties(id):
-            if prop.category == "__child__":
-                children.append(int(prop.value))
-        return children
+        return self._get_links(id, "__child__")
 
     def get_parent(self, id) -> list:
         """
@@ -361,11 +1070,7 @@ class PropReader:
         :param id: database id storage in the manifest file
         :return: list of parent (database id)
         """
-        parent = []
-        for prop in self.enumerate_properties(id):
-            if prop.category == "__parent__":
-                parent.append(int(prop.value))
-        return parent
+        return self._get_links(id, "__parent__")
 
     def get_instance(self, id) -> list:
         """
@@ -373,22 +1078,89 @@ class PropReader:
         :param id:  database id storage in the manifest file
         :return:  list of instance (database id)
         """
-        instance_of = []
-        for prop in self.enumerate_properties(id):
-            if prop.category == "__instanceof__":
-                instance_of.append(int(prop.value))
-        return instance_of
+        return self._get_links(id, "__instanceof__")
 
     def get_internal_ref(self, id) -> list:
-        reference = []
-        for prop in self.enumerate_properties(id):
-            if prop.category == "__internalref__":
-                reference.append(int(prop.value))
+        """
+        Get all internal references of an object, e.g. the host of a Revit sub family
+        :param id: database id storage in the manifest file
+        :return: list of reference (database id)
+        """
+        return self._get_links(id, "__internalref__")
+
+    def to_eav_frame(self, db_ids: List[int] = None) -> pd.DataFrame:
+        """
+        Get the properties as a long entity-attribute-value table, one row per (attribute, value) pair,
+        built in one vectorized pass over offsets and avs. Use :meth:`pivot_wide` to get one row per object.
+        :param db_ids: list of database id storage in the manifest file, default is all objects
+        :return: :class:`pandas.DataFrame` with int32 columns dbId, attr_id, value_id
+        """
+        if db_ids is None:
+            db_ids = np.arange(1, len(self.offsets))
+        db_ids = np.asarray(db_ids, dtype=np.int64)
+        rows, attr_ids, val_ids = self._gather_pairs(db_ids)
+        return pd.DataFrame({"dbId": db_ids[rows].astype(np.int32),
+                             "attr_id": attr_ids.astype(np.int32),
+                             "value_id": val_ids.astype(np.int32)})
+
+    def pivot_wide(self, eav: pd.DataFrame, column: str = "name") -> pd.DataFrame:
+        """
+        Pivot an entity-attribute-value table from :meth:`to_eav_frame` to one row per object.
+        Rows and columns keep the order they first appear, a repeated column keeps the last value.
+        :param eav: :class:`pandas.DataFrame` with columns dbId, attr_id, value_id
+        :param column: field of objects_attrs used as column name, e.g. "name" or "display_name"
+        :return: :class:`pandas.DataFrame` of properties, first column is dbId
+        """
+        rows, db_ids = pd.factorize(eav["dbId"].to_numpy())
+        labels = self._attr_field(column)[eav["attr_id"].to_numpy()]
+        dataframe = self._pivot(len(db_ids), rows, labels, eav["value_id"].to_numpy())
+        dataframe.insert(0, "dbId", db_ids)
+        return dataframe
+
+    def get_all_data(self, typed_columns: bool = False) -> pd.DataFrame:
+        """
+        Get all properties of all objects, one row per object, without the internal links like parent, child
+        :param typed_columns: the flag to convert the columns to the data type of their attributes, see
+        :meth:`apply_data_types`, default is False
+        :return: :class:`pandas.DataFrame` of properties, first column is dbId
+        """
+        props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
+        eav = self.to_eav_frame()
+        ignored = self._attr_mask("name", props_ignore)
+        eav = eav[~ignored[eav["attr_id"].to_numpy()]]
+        dataframe = self.pivot_wide(eav)
+        if typed_columns:
+            dataframe = self.apply_data_types(dataframe)
+        return dataframe
 
-    # TODO : It too slow, need find another way to get all data with less time and cover all format : dwg, rvt, nwd, ifc, ...
-    # def get_all_data(self) -> pd.DataFrame:
-    #     db_index_ids = [i for i in range(len(self.offsets))]
-    #     return self.get_recursive_ids(db_index_ids)
+    def _get_recursive_frame(self, db_ids: List[int], selected: np.ndarray, type_selected: np.ndarray):
+        """
+        Get properties of db_ids and their descendants, one row per object. Properties of the types an object
+        is instance of are added after its own properties.
+        :param db_ids: list of database id storage in the manifest file
+        :param selected: attribute ids kept from the object itself
+        :param type_selected: attribute ids kept from the types
+        :return: :class:`pandas.DataFrame` of properties, first column is dbId
+        """
+        ids = self._preorder_ids(db_ids)
+        rows, attr_ids, val_ids = self._gather_pairs(ids)
+        instance_of = self._attr_mask("category", ["__instanceof__"])[attr_ids]
+        instance_rows = rows[instance_of]
+        instance_ids = [int(value) for value in self._take_values(val_ids[instance_of])]
+        keep = selected[attr_ids]
+        rows, attr_ids, val_ids = rows[keep], attr_ids[keep], val_ids[keep]
+        if len(instance_ids) > 0:
+            type_rows, type_attr_ids, type_val_ids = self._gather_pairs(instance_ids)
+            keep = type_selected[type_attr_ids]
+            type_rows = instance_rows[type_rows[keep]]
+            # own properties first, then the types in order, the way the dicts were merged
+            order = np.argsort(np.concatenate([rows, type_rows]), kind="stable")
+            rows = np.concatenate([rows, type_rows])[order]
+            attr_ids = np.concatenate([attr_ids, type_attr_ids[keep]])[order]
+            val_ids = np.concatenate([val_ids, type_val_ids[keep]])[order]
+        dataframe = self._pivot(len(ids), rows, self._attr_field("name")[attr_ids], val_ids)
+        dataframe.insert(0, "dbId", ids)
+        return dataframe
 
     def get_recursive_ids(self, db_ids: List[int]) -> pd.DataFrame:
         """
@@ -396,33 +1168,11 @@ class PropReader:
         :param db_ids:  list of database id storage in the manifest file
         :return:  :class:`pandas.DataFrame` of properties
         """
-        dataframe = pd.DataFrame()
         props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
         if len(db_ids) == 0:
-            return dataframe
-        for id in db_ids:
-            props = self.enumerate_properties(id)
-            properties = {}
-            for prop in props:
-                if prop.name == 'name':
-                    continue
-                if prop.name not in props_ignore:
-                    properties[prop.name] = prop.value
-            db_id = id
-            properties['dbId'] = db_id
-            ins = self.get_instance(id)
-            if len(ins) > 0:
-                for instance in ins:
-                    types = self.get_properties(instance)
-                    properties = {**properties, **types}
-            singleDF = pd.DataFrame(properties, index=[0])
-            dataframe = pd.concat([dataframe, singleDF], ignore_index=True)
-            ids = self.get_children(id)
-            dataframe = pd.concat([dataframe, self.get_recursive_ids(ids)], ignore_index=True)
-        if 'dbId' in dataframe.columns:
-            dataframe = dataframe[
-                ['dbId'] + [col for col in dataframe.columns if col not in ['dbId']]]
-        return dataframe
+            return pd.DataFrame()
+        selected = ~self._attr_mask("name", props_ignore + ['name'])
+        return self._get_recursive_frame(db_ids, selected, self._attr_public_mask())
 
     def get_recursive_ids_by_parameters(self, db_ids: List[int], params: List[str]) -> pd.DataFrame:
         """
@@ -431,51 +1181,25 @@ class PropReader:
         :param params:  list of parameters to get
         :return:  :class:`pandas.DataFrame` of properties
         """
-        dataframe = pd.DataFrame()
         props_ignore = ['parent', 'instanceof_objid', 'child', "viewable_in"]
         if len(db_ids) == 0:
-            return dataframe
-        for id in db_ids:
-            props = self.enumerate_properties(id)
-            properties = {}
-            for prop in props:
-                if prop.name == 'name':
-                    continue
-                if prop.name not in props_ignore:
-                    properties[prop.name] = prop.value
-            db_id = id
-            properties = {k: v for k, v in properties.items() if k in params}
-            properties['dbId'] = db_id
-            ins = self.get_instance(id)
-            if len(ins) > 0:
-                for instance in ins:
-                    types = self.get_properties(instance)
-                    types = {k: v for k, v in types.items() if k in params}
-                    properties = {**properties, **types}
-            singleDF = pd.DataFrame(properties, index=[0])
-            dataframe = pd.concat([dataframe, singleDF], ignore_index=True)
-            ids = self.get_children(id)
-            dataframe = pd.concat([dataframe, self.get_recursive_ids_by_parameters(ids, params)], ignore_index=True)
-        if 'dbId' in dataframe.columns:
-            dataframe = dataframe[['dbId'] + [col for col in dataframe.columns if col not in ['dbId']]]
-        return dataframe
+            return pd.DataFrame()
+        in_params = self._attr_mask("name", params)
+        selected = in_params & ~self._attr_mask("name", props_ignore + ['name'])
+        return self._get_recursive_frame(db_ids, selected, in_params & self._attr_public_mask())
 
     def get_all_properties_names(self) -> List[str]:
         """
         Get all properties names of all objects
         :return: :class:`list` of properties names
         """
-        props_names = []
-        for i in range(len(self.offsets)):
-            av_start = 2 * self.offsets[i]
-            av_end = len(self.avs) if i == len(self.offsets) - 1 else 2 * self.offsets[i + 1]
-            for j in range(av_start, av_end, 2):
-                attr_offset = self.avs[j]
-                attr_obj = self.attrs[attr_offset]
-                if isinstance(attr_obj, list) and len(attr_obj) >= 2:
-                    name = attr_obj[0]
-                    props_names.append(name)
-        props_names = list(set(props_names))
+        if self._postings is None:
+            self._postings = self._build_postings()
+        offsets, _ = self._postings
+        column = self._attr_field("name")
+        attr_ids = np.flatnonzero(np.diff(offsets) > 0)
+        names = column[attr_ids[attr_ids < len(column)]]
+        props_names = list(set(name for name in names if name is not None))
         props_names.sort()
         return props_names
 
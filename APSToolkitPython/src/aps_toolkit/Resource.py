@@ -18,12 +18,13 @@ from urllib.parse import urljoin, quote
 
 
 class Resource:
-    def __init__(self, file_name, remote_path, local_path):
+    def __init__(self, file_name, remote_path, local_path, version=None):
         self.host = "https://developer.api.autodesk.com"
         self.file_name = file_name
         self.remote_path = self._resolve_path_slashes(remote_path)
         self.url = self._resolve_url(remote_path)
         self.local_path = self._resolve_path_slashes(local_path)
+        self.version = version
 
     def _resolve_path_slashes(self, path):
         url_with_forward_slashes = path.replace('\\', '/')
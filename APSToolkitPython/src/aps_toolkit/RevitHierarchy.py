@@ -0,0 +1,74 @@
+"""
+Copyright (C) 2024  chuongmep.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from typing import List
+import numpy as np
+
+
+class RevitHierarchy:
+    """
+    Category -> Family -> Type -> Instance tree of a Revit model, built in one walk by
+    :meth:`PropDbReaderRevit.get_hierarchy`. Every level keeps the dbIds of its nodes in walk order,
+    with the name read from _RC, _RFN or _RFT and the dbId of the nearest node of the upper levels (0 if none).
+    """
+
+    def __init__(self, categories: dict, families: dict, types: dict, family_categories: dict,
+                 type_parents: dict, type_rows: List[dict], type_nodes: List[dict], instance_offsets: np.ndarray,
+                 instance_ids: np.ndarray):
+        """
+        :param categories: key is dbId of category, value is category name
+        :param families: key is dbId of family, value is family name
+        :param types: key is dbId of family type, value is family type name
+        :param family_categories: key is dbId of family, value is dbId of its category
+        :param type_parents: key is dbId of family type, value is tuple (dbId of category, dbId of family)
+        :param type_rows: dbId, Category, Family, FamilyType of every family type, from its own properties
+        :param type_nodes: the nodes of category "Revit Family Type" with their child and instanceof_objid
+        :param instance_offsets: CSR offsets of the instances of the family types, in order of types
+        :param instance_ids: dbIds of the instances (children) of the family types
+        """
+        self.categories = categories
+        self.families = families
+        self.types = types
+        self.family_categories = family_categories
+        self.type_parents = type_parents
+        self.type_rows = type_rows
+        self.type_nodes = type_nodes
+        self.instance_offsets = instance_offsets
+        self.instance_ids = instance_ids
+        self._type_positions = {type_id: i for i, type_id in enumerate(types)}
+
+    @property
+    def category_ids(self) -> np.ndarray:
+        return np.fromiter(self.categories, dtype=np.int64, count=len(self.categories))
+
+    @property
+    def family_ids(self) -> np.ndarray:
+        return np.fromiter(self.families, dtype=np.int64, count=len(self.families))
+
+    @property
+    def type_ids(self) -> np.ndarray:
+        return np.fromiter(self.types, dtype=np.int64, count=len(self.types))
+
+    def get_instances(self, type_id: int) -> np.ndarray:
+        """
+        Get the instances of a family type
+        :param type_id: dbId of the family type
+        :return: :class:`numpy.ndarray` of dbIds, empty if type_id is not a family type
+        """
+        position = self._type_positions.get(type_id)
+        if position is None:
+            return self.instance_ids[:0]
+        return self.instance_ids[self.instance_offsets[position]:self.instance_offsets[position + 1]]
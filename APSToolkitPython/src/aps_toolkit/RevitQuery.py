@@ -0,0 +1,66 @@
+"""
+Copyright (C) 2024  chuongmep.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+from typing import List
+import pandas as pd
+
+
+class RevitQuery:
+    """
+    Query of the parameters of the elements of a Revit model, built from :meth:`PropDbReaderRevit.select`.
+    The attribute ids of the parameters are resolved before reading, so only their values are decoded.
+
+    e.g: reader.select(["Name", "Width", "Area"]).where(["Walls", "Doors"]).execute()
+    """
+
+    def __init__(self, reader, params: List[str]):
+        """
+        :param reader: the :class:`PropDbReaderRevit` to read from
+        :param params: the list of parameters to read, e.g: ["Name", "Area", "Volume", "Height"]
+        """
+        self.reader = reader
+        self.params = list(params)
+        self.categories = None
+
+    def where(self, categories: List[str]):
+        """
+        Keep the elements of the given categories only
+        :param categories: the list of categories, e.g: ["Walls", "Doors", "Windows"]
+        :return: :class:`RevitQuery` : the query itself
+        """
+        self.categories = list(categories)
+        return self
+
+    def execute(self, is_get_sub_family: bool = False, display_unit: bool = False,
+                unit_column: bool = False, typed_columns: bool = False) -> pd.DataFrame:
+        """
+        Read the parameters of the selected elements
+        :param is_get_sub_family: the flag to get sub family or not, default is False
+        :param display_unit: the flag to display unit or not in value, default is False
+        :param unit_column: with display_unit, keep the values as numbers and add a "<name> Unit" column after
+        each column having units, default is False
+        :param typed_columns: the flag to convert the columns to the data type of their parameters, see
+        :meth:`PropReader.apply_data_types`, default is False
+        :return: :class:`pandas.DataFrame` : one row by element, first columns are dbId and external_id
+        """
+        all_categories = self.reader.get_all_categories()
+        category_ids = [key for key, value in all_categories.items()
+                        if self.categories is None or value in self.categories]
+        dataframe = self.reader._get_recursive_ids_prams(category_ids, self.params, is_get_sub_family,
+                                                         display_unit, unit_column)
+        if typed_columns:
+            dataframe = self.reader.apply_data_types(dataframe)
+        return dataframe
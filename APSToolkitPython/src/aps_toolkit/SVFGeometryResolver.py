@@ -0,0 +1,166 @@
+"""
+Copyright (C) 2024  chuongmep.com
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+import concurrent.futures
+from collections import OrderedDict
+from typing import List
+import numpy as np
+from .Derivative import Derivative
+from .ManifestItem import ManifestItem
+from .Fragments import Fragments
+from .SVFGeometries import SVFGeometries
+from .SVFMesh import SVFMesh
+from .PackFileReader import PackFileReader
+
+
+class SVFGeometryResolver:
+    """
+    Resolve the geometry of objects of a manifest item (view) without reading every mesh pack: the fragments
+    (dbID -> geometryID) are joined with the geometry metadata (geometryID -> pack, entity), then only the
+    packs and entries referenced by the objects are downloaded and decoded. Decoded packs are kept in a
+    least recently used cache.
+    """
+    PACK_CACHE_SIZE = 16
+    MAX_INFLIGHT = 8
+
+    def __init__(self, derivative: Derivative, manifest_item: ManifestItem, max_packs: int = None):
+        """
+        :param derivative: the derivative of the model
+        :param manifest_item: the manifest item (view) to read
+        :param max_packs: the number of decoded packs kept in the cache, default is :attr:`PACK_CACHE_SIZE`
+        """
+        self.derivative = derivative
+        self.manifest_item = manifest_item
+        self.max_packs = self.PACK_CACHE_SIZE if max_packs is None else max_packs
+        self._resources = None
+        self._fragments = None
+        self._geometries = None
+        # pack id -> (pack file reader, dict of entity id -> decoded mesh), least recently used first
+        self._packs = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _get_resources(self) -> dict:
+        if self._resources is None:
+            self._resources = {resource.file_name: resource
+                               for resource in self.derivative.read_svf_resource_item(self.manifest_item)}
+        return self._resources
+
+    def _download(self, file_name: str) -> bytes:
+        resource = self._get_resources().get(file_name)
+        if resource is None:
+            raise Exception(f"Resource {file_name} not found in manifest item {self.manifest_item.guid}")
+        return self.derivative.download_stream_resource(resource).read()
+
+    def get_fragments(self) -> np.ndarray:
+        """
+        Get the fragments of the manifest item, downloaded once
+        :return: :class:`numpy.ndarray` of :attr:`Fragments.DTYPE`
+        """
+        if self._fragments is None:
+            self._fragments = Fragments.parse_fragments_array(self._download("FragmentList.pack"))
+        return self._fragments
+
+    def get_geometries(self) -> tuple:
+        """
+        Get the pack and the entry in the pack of every geometry id, downloaded once
+        :return: tuple of (pack_id, entity_id) arrays indexed by geometry id
+        """
+        if self._geometries is None:
+            geometries = SVFGeometries.parse_geometries(self._download("GeometryMetadata.pf"))
+            pack_ids = np.fromiter((geometry.pack_id for geometry in geometries), dtype=np.int64,
+                                   count=len(geometries))
+            entity_ids = np.fromiter((geometry.entity_id for geometry in geometries), dtype=np.int64,
+                                     count=len(geometries))
+            self._geometries = (pack_ids, entity_ids)
+        return self._geometries
+
+    def get_geometry_for(self, db_ids: List[int]) -> dict:
+        """
+        Get the geometry of objects, only the packs and entries of their fragments are decoded
+        :param db_ids: list of database ids
+        :return: dict of database id to the list of (:class:`Fragments`, mesh) of its fragments, the fragment holds
+        the transform, bbox and material of the mesh. An object without fragment has an empty list.
+        """
+        db_ids = [int(db_id) for db_id in db_ids]
+        result = {db_id: [] for db_id in db_ids}
+        fragments = self.get_fragments()
+        rows = np.flatnonzero(np.isin(fragments["dbID"], np.asarray(db_ids, dtype=np.int64)))
+        pack_ids, entity_ids = self.get_geometries()
+        geometry_ids = fragments["geometryID"][rows].astype(np.int64)
+        rows = rows[geometry_ids < len(pack_ids)]
+        geometry_ids = geometry_ids[geometry_ids < len(pack_ids)]
+        if len(rows) == 0:
+            return result
+        packs = pack_ids[geometry_ids].tolist()
+        entities = entity_ids[geometry_ids].tolist()
+        needed = {}
+        for pack_id, entity_id in zip(packs, entities):
+            needed.setdefault(pack_id, set()).add(entity_id)
+        meshes = self._get_meshes(needed)
+        for fragment, pack_id, entity_id in zip(Fragments.from_array(fragments[rows]), packs, entities):
+            result[fragment.dbID].append((fragment, meshes[(pack_id, entity_id)]))
+        return result
+
+    def _get_meshes(self, needed: dict) -> dict:
+        """
+        Get the decoded entries of packs, from the cache or by downloading the missing packs concurrently
+        :param needed: dict of pack id to the set of entity ids
+        :return: dict of (pack id, entity id) to the mesh
+        """
+        meshes = {}
+        missing = []
+        for pack_id, entity_ids in needed.items():
+            if pack_id in self._packs:
+                self._hits += 1
+                self._packs.move_to_end(pack_id)
+                meshes.update(self._decode(pack_id, entity_ids))
+            else:
+                self._misses += 1
+                missing.append(pack_id)
+        if len(missing) == 0:
+            return meshes
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.MAX_INFLIGHT, len(missing))) as executor:
+            future_to_pack = {executor.submit(self._download, f"{pack_id}.pf"): pack_id for pack_id in missing}
+            for future in concurrent.futures.as_completed(future_to_pack):
+                pack_id = future_to_pack[future]
+                self._packs[pack_id] = (PackFileReader(future.result()), {})
+                meshes.update(self._decode(pack_id, needed[pack_id]))
+                while len(self._packs) > self.max_packs:
+                    self._packs.popitem(last=False)
+        return meshes
+
+    def _decode(self, pack_id: int, entity_ids: set) -> dict:
+        pfr, decoded = self._packs[pack_id]
+        todo = [entity_id for entity_id in entity_ids if entity_id not in decoded]
+        if todo:
+            decoded.update(SVFMesh.parse_mesh_entries(pfr, sorted(todo)))
+        return {(pack_id, entity_id): decoded[entity_id] for entity_id in entity_ids}
+
+    def pack_cache_info(self) -> dict:
+        """
+        Get the statistics of the cache of decoded packs
+        :return: :class:`dict` of hits, misses, maxsize, currsize and hit_rate (hits / lookups, 0 without lookup)
+        """
+        lookups = self._hits + self._misses
+        return {"hits": self._hits, "misses": self._misses, "maxsize": self.max_packs, "currsize": len(self._packs),
+                "hit_rate": self._hits / lookups if lookups else 0.0}
+
+    def clear_cache(self):
+        """
+        Drop the decoded packs
+        """
+        self._packs.clear()
@@ -16,15 +16,21 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 from .SVFUVMap import SVFUVMap
 from .PackFileReader import PackFileReader
-import math
+import numpy as np
+import lzma
 from .SVFLines import SVFLines
 from .SVFPoints import SVFPoints
 from .Derivative import Derivative
 import re
+import concurrent.futures
+import threading
+from collections import deque
 from .ManifestItem import ManifestItem
 
 
 class SVFMesh:
+    MESH_TYPES = ("Autodesk.CloudPlatform.OpenCTM", "Autodesk.CloudPlatform.Lines", "Autodesk.CloudPlatform.Points")
+
     def __init__(self, v_count=None, t_count=None, uv_count=None, attrs=None, flags=None, comment=None,
                  uv_maps: [SVFUVMap] = None,
                  indices=None, vertices=None, normals=None, colors=None, min=None, max=None):
@@ -66,18 +72,100 @@ class SVFMesh:
         return mesh_packs
 
     @staticmethod
-    def parse_mesh_from_manifest_item(derivative:[Derivative], manifest_item: [ManifestItem]) -> list:
+    def parse_mesh_from_manifest_item(derivative: [Derivative], manifest_item: [ManifestItem]) -> list:
+        meshes = dict(SVFMesh.iter_mesh_packs(derivative, manifest_item))
+        meshes_manifest_item = []
+        for pack_id in sorted(meshes):
+            meshes_manifest_item.extend(meshes[pack_id])
+        return meshes_manifest_item
+
+    @staticmethod
+    def iter_mesh_packs(derivative: [Derivative], manifest_item: [ManifestItem], max_inflight: int = 8,
+                        max_memory: int = 512 * 1024 ** 2, workers: int = 1):
+        """
+        Download and decode the mesh packs <number>.pf of a manifest item in a pipeline: a pool of threads
+        downloads the next packs while the previous ones are decoded, each pack is yielded as soon as it is
+        decoded, so the meshes of the whole model are never held at once.
+        :param derivative: the derivative of the model
+        :param manifest_item: the manifest item (view) to read
+        :param max_inflight: the maximum number of packs downloading, downloaded or decoding at once
+        :param max_memory: the ceiling in bytes of the downloaded packs not decoded yet, counted from the end of
+        their download until their meshes are decoded, in this process or in a decoding process. No download starts
+        while it is reached. A pack is only known in size once downloaded, the packs downloading are counted at the
+        average size of the packs downloaded, so the ceiling can be passed by the first downloads
+        :param workers: the number of processes decoding the packs, 1 to decode in this process
+        :return: generator of (pack_id, list of meshes) in the order the packs are decoded
+        """
         svf_resources = derivative.read_svf_resource_item(manifest_item)
         # filter the resources have file extension .pf and name follow <number>.pf
         pattern = re.compile(r"^\d+\.pf$")
-        file_packs = [resource for resource in svf_resources if pattern.match(resource.file_name)]
-        meshes_manifest_item = []
-        for file_pack in file_packs:
-            bytes_io = derivative.download_stream_resource(file_pack)
-            buffer = bytes_io.read()
-            meshes = SVFMesh.parse_mesh(buffer)
-            meshes_manifest_item.extend(meshes)
-        return meshes_manifest_item
+        queue = deque(resource for resource in svf_resources if pattern.match(resource.file_name))
+        if len(queue) == 0:
+            return
+        lock = threading.Lock()
+        # the packs downloaded and not decoded yet and their bytes, updated by the download threads. The buffers
+        # are not kept as results of the futures, so they are released as soon as they are decoded
+        buffers = {}
+        held = [0]
+        # number and bytes of the packs downloaded, to estimate the size of the packs downloading
+        downloaded = [0, 0]
+
+        def download(resource):
+            buffer = derivative.download_stream_resource(resource).read()
+            with lock:
+                buffers[resource.file_name] = buffer
+                held[0] += len(buffer)
+                downloaded[0] += 1
+                downloaded[1] += len(buffer)
+
+        def estimate():
+            with lock:
+                downloading = len(downloads) - len(buffers)
+                average = downloaded[1] / downloaded[0] if downloaded[0] else 0
+                return held[0] + downloading * average
+
+        def release(size):
+            with lock:
+                held[0] -= size
+
+        downloads = {}
+        decodes = {}
+        downloader = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_inflight))
+        decoder = concurrent.futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            while queue or downloads or decodes:
+                while queue and len(downloads) + len(decodes) < max_inflight and (
+                        estimate() < max_memory or not (downloads or decodes)):
+                    resource = queue.popleft()
+                    downloads[downloader.submit(download, resource)] = resource.file_name
+                done, _ = concurrent.futures.wait(list(downloads) + list(decodes),
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    if future in downloads:
+                        file_name = downloads.pop(future)
+                        future.result()
+                        pack_id = int(file_name[:-3])
+                        with lock:
+                            buffer = buffers.pop(file_name)
+                        if decoder is None:
+                            meshes = SVFMesh.parse_mesh(buffer)
+                            release(len(buffer))
+                            del buffer
+                            yield pack_id, meshes
+                        else:
+                            decodes[decoder.submit(SVFMesh.parse_mesh, buffer)] = (pack_id, len(buffer))
+                            del buffer
+                    else:
+                        pack_id, size = decodes.pop(future)
+                        release(size)
+                        yield pack_id, future.result()
+        finally:
+            for future in list(downloads) + list(decodes):
+                future.cancel()
+            downloader.shutdown(wait=True)
+            if decoder is not None:
+                decoder.shutdown(wait=True)
+
     @staticmethod
     def parse_mesh_from_file(file_path):
         with open(file_path, "rb") as file:
@@ -92,14 +180,35 @@ class SVFMesh:
             entry = pfr.seek_entry(i)
             assert entry is not None
             assert entry.version >= 1
-            if entry.type == "Autodesk.CloudPlatform.OpenCTM":
-                mesh_packs.append(SVFMesh.parse_mesh_octm(pfr))
-            elif entry.type == "Autodesk.CloudPlatform.Lines":
-                mesh_packs.append(SVFMesh.parse_lines(pfr, entry.version))
-            elif entry.type == "Autodesk.CloudPlatform.Points":
-                mesh_packs.append(SVFMesh.parse_points(pfr, entry.version))
+            if entry.type in SVFMesh.MESH_TYPES:
+                mesh_packs.append(SVFMesh._parse_entry(pfr, entry))
         return mesh_packs
 
+    @staticmethod
+    def parse_mesh_entries(pfr: [PackFileReader], entity_ids: list) -> dict:
+        """
+        Parse only some entries of a mesh pack, the other entries are not read
+        :param pfr: the pack file reader of the mesh pack
+        :param entity_ids: the indices of the entries in the pack, e.g. :attr:`SVFGeometries.entity_id`
+        :return: dict of entity id to the mesh, lines or points, None for an entry out of the pack or not a mesh
+        """
+        meshes = {}
+        for entity_id in entity_ids:
+            entry = pfr.seek_entry(entity_id)
+            if entry is not None and entry.type in SVFMesh.MESH_TYPES:
+                meshes[entity_id] = SVFMesh._parse_entry(pfr, entry)
+            else:
+                meshes[entity_id] = None
+        return meshes
+
+    @staticmethod
+    def _parse_entry(pfr: [PackFileReader], entry):
+        if entry.type == "Autodesk.CloudPlatform.OpenCTM":
+            return SVFMesh.parse_mesh_octm(pfr)
+        elif entry.type == "Autodesk.CloudPlatform.Lines":
+            return SVFMesh.parse_lines(pfr, entry.version)
+        return SVFMesh.parse_points(pfr, entry.version)
+
     @staticmethod
     def parse_mesh_octm(pfr: [PackFileReader]):
         fourcc = pfr.get_string(4)
@@ -113,52 +222,82 @@ class SVFMesh:
 
         if method == "RAW":
             return SVFMesh.parse_mesh_raw(pfr)
+        elif method == "MG1":
+            return SVFMesh.parse_mesh_mg1(pfr)
+        elif method == "MG2":
+            return SVFMesh.parse_mesh_mg2(pfr)
         else:
             print("Unsupported OpenCTM method " + method)
             return None
 
     @staticmethod
-    def parse_mesh_raw(pfr: [PackFileReader]):
+    def _read_octm_header(pfr: [PackFileReader]) -> tuple:
         vcount = pfr.get_int32()  # Num of vertices
         tcount = pfr.get_int32()  # Num of triangles
         uvcount = pfr.get_int32()  # Num of UV maps
         attrs = pfr.get_int32()  # Number of custom attributes per vertex
         flags = pfr.get_int32()  # Additional flags (e.g., whether normals are present)
         comment = pfr.get_string(pfr.get_int32())
+        return vcount, tcount, uvcount, attrs, flags, comment
+
+    @staticmethod
+    def _create_mesh(header: tuple, indices, vertices, normals, uvmaps, colors):
+        """
+        Create the mesh of decoded arrays, the same way for every OpenCTM method: bounds of the vertices,
+        unit length normals and flipped v of the uv maps
+        """
+        vcount = header[0]
+        min_values = [float('inf')] * 3
+        max_values = [float('-inf')] * 3
+        if vcount > 0:
+            points = vertices.reshape(-1, 3)
+            min_values = points.min(axis=0).tolist()
+            max_values = points.max(axis=0).tolist()
+
+        if normals is not None:
+            normals = normals.reshape(-1, 3)
+            # Make sure the normals have unit length
+            dot = np.einsum('ij,ij->i', normals, normals)
+            scaled = (dot != 1.0) & (dot > 0.0)
+            if scaled.any():
+                normals = normals.copy()
+                normals[scaled] /= np.sqrt(dot[scaled])[:, None]
+            normals = normals.reshape(-1)
+
+        for uvmap in uvmaps:
+            # flip v
+            uvs = uvmap["uvs"].reshape(-1, 2) * np.array([1.0, -1.0], dtype=np.float32)
+            uvmap["uvs"] = (uvs + np.array([0.0, 1.0], dtype=np.float32)).reshape(-1)
+
+        return SVFMesh(*header, uvmaps, indices, vertices, normals, colors, min_values, max_values)
+
+    @staticmethod
+    def parse_mesh_raw(pfr: [PackFileReader]):
+        """
+        Parse a RAW OpenCTM mesh, every chunk is read at once. Indices, vertices and colors are read-only views
+        into the pack buffer, normals are copied only when some of them are not unit length.
+        :param pfr: the pack file reader at the start of the mesh header
+        :return: :class:`SVFMesh` with flat numpy arrays: indices uint32, vertices, normals, uvs and colors float32
+        """
+        header = SVFMesh._read_octm_header(pfr)
+        vcount, tcount, uvcount, attrs, flags, comment = header
 
         # Indices
         name = pfr.get_string(4)
         assert name == "INDX"
-        indices = [pfr.get_uint32() for _ in range(tcount * 3)]
+        indices = pfr.get_array('<u4', tcount * 3)
 
         # Vertices
         name = pfr.get_string(4)
         assert name == "VERT"
-        vertices = []
-        min_values = [float('inf')] * 3
-        max_values = [float('-inf')] * 3
-        for _ in range(vcount):
-            x, y, z = pfr.get_float32(), pfr.get_float32(), pfr.get_float32()
-            min_values = [min(x, min_values[0]), min(y, min_values[1]), min(z, min_values[2])]
-            max_values = [max(x, max_values[0]), max(y, max_values[1]), max(z, max_values[2])]
-            vertices.extend([x, y, z])
+        vertices = pfr.get_array('<f4', vcount * 3)
 
         # Normals
         normals = None
         if flags & 1 != 0:
             name = pfr.get_string(4)
             assert name == "NORM"
-            normals = []
-            for _ in range(vcount):
-                x, y, z = pfr.get_float32(), pfr.get_float32(), pfr.get_float32()
-                # Make sure the normals have unit length
-                dot = x * x + y * y + z * z
-                if dot != 1.0:
-                    length = math.sqrt(dot)
-                    x /= length
-                    y /= length
-                    z /= length
-                normals.extend([x, y, z])
+            normals = pfr.get_array('<f4', vcount * 3)
 
         # Parse zero or more UV maps
         uvmaps = []
@@ -167,11 +306,7 @@ class SVFMesh:
             assert name == "TEXC"
             uvmap_name = pfr.get_string(pfr.get_int32())
             uvmap_file = pfr.get_string(pfr.get_int32())
-            uvs = []
-            for _ in range(vcount):
-                u, v = pfr.get_float32(), 1.0 - pfr.get_float32()
-                uvs.extend([u, v])
-            uvmaps.append({"name": uvmap_name, "file": uvmap_file, "uvs": uvs})
+            uvmaps.append({"name": uvmap_name, "file": uvmap_file, "uvs": pfr.get_array('<f4', vcount * 2)})
 
         # Parse custom attributes (currently we only support "Color" attrs)
         colors = None
@@ -181,18 +316,252 @@ class SVFMesh:
             for _ in range(attrs):
                 attr_name = pfr.get_string(pfr.get_int32())
                 if attr_name == "Color":
-                    colors = [pfr.get_float32() for _ in range(vcount * 4)]
+                    colors = pfr.get_array('<f4', vcount * 4)
                 else:
                     pfr.seek(pfr.offset + vcount * 4)
 
-        mesh = SVFMesh(vcount, tcount, uvcount, attrs, flags, comment, uvmaps, indices, vertices, normals, colors,
-                       min_values, max_values)
-        if normals is not None:
-            mesh.normals = normals
-        if colors is not None:
-            mesh.colors = colors
+        return SVFMesh._create_mesh(header, indices, vertices, normals, uvmaps, colors)
+
+    @staticmethod
+    def parse_mesh_mg1(pfr: [PackFileReader]):
+        """
+        Parse a MG1 OpenCTM mesh: LZMA packed indices stored as deltas and LZMA packed floats
+        :param pfr: the pack file reader at the start of the mesh header
+        :return: :class:`SVFMesh` with the same arrays as :meth:`parse_mesh_raw`
+        """
+        header = SVFMesh._read_octm_header(pfr)
+        vcount, tcount, uvcount, attrs, flags, comment = header
+
+        name = pfr.get_string(4)
+        assert name == "INDX"
+        indices = SVFMesh._restore_indices(SVFMesh._read_packed(pfr, tcount, 3))
+
+        name = pfr.get_string(4)
+        assert name == "VERT"
+        vertices = SVFMesh._read_packed(pfr, vcount * 3, 1).view(np.float32).reshape(-1)
+
+        normals = None
+        if flags & 1 != 0:
+            name = pfr.get_string(4)
+            assert name == "NORM"
+            normals = SVFMesh._read_packed(pfr, vcount, 3).view(np.float32).reshape(-1)
+
+        uvmaps = []
+        for _ in range(uvcount):
+            name = pfr.get_string(4)
+            assert name == "TEXC"
+            uvmap_name = pfr.get_string(pfr.get_int32())
+            uvmap_file = pfr.get_string(pfr.get_int32())
+            uvs = SVFMesh._read_packed(pfr, vcount, 2).view(np.float32).reshape(-1)
+            uvmaps.append({"name": uvmap_name, "file": uvmap_file, "uvs": uvs})
 
-        return mesh
+        colors = None
+        for _ in range(attrs):
+            name = pfr.get_string(4)
+            assert name == "ATTR"
+            attr_name = pfr.get_string(pfr.get_int32())
+            values = SVFMesh._read_packed(pfr, vcount, 4).view(np.float32).reshape(-1)
+            if attr_name == "Color":
+                colors = values
+
+        return SVFMesh._create_mesh(header, indices, vertices, normals, uvmaps, colors)
+
+    @staticmethod
+    def parse_mesh_mg2(pfr: [PackFileReader]):
+        """
+        Parse a MG2 OpenCTM mesh: vertices as integer positions in the boxes of a grid, indices as deltas,
+        normals as angles relative to the smooth normals of the mesh and maps as fixed point deltas
+        :param pfr: the pack file reader at the start of the mesh header
+        :return: :class:`SVFMesh` with the same arrays as :meth:`parse_mesh_raw`
+        """
+        header = SVFMesh._read_octm_header(pfr)
+        vcount, tcount, uvcount, attrs, flags, comment = header
+
+        name = pfr.get_string(4)
+        assert name == "MG2H"
+        vertex_precision = pfr.get_float32()
+        normal_precision = pfr.get_float32()
+        lower_bound = pfr.get_array('<f4', 3)
+        higher_bound = pfr.get_array('<f4', 3)
+        division = pfr.get_array('<u4', 3)
+
+        name = pfr.get_string(4)
+        assert name == "VERT"
+        int_vertices = SVFMesh._read_packed(pfr, vcount, 3)
+        name = pfr.get_string(4)
+        assert name == "GIDX"
+        grid_indices = np.cumsum(SVFMesh._read_packed(pfr, vcount, 1)[:, 0], dtype=np.int64) & 0xFFFFFFFF
+        vertices = SVFMesh._restore_vertices(int_vertices, grid_indices, lower_bound, higher_bound, division,
+                                             vertex_precision)
+
+        name = pfr.get_string(4)
+        assert name == "INDX"
+        indices = SVFMesh._restore_indices(SVFMesh._read_packed(pfr, tcount, 3))
+
+        normals = None
+        if flags & 1 != 0:
+            name = pfr.get_string(4)
+            assert name == "NORM"
+            int_normals = SVFMesh._read_packed(pfr, vcount, 3)
+            normals = SVFMesh._restore_normals(int_normals, SVFMesh._smooth_normals(indices, vertices),
+                                               normal_precision)
+
+        uvmaps = []
+        for _ in range(uvcount):
+            name = pfr.get_string(4)
+            assert name == "TEXC"
+            uvmap_name = pfr.get_string(pfr.get_int32())
+            uvmap_file = pfr.get_string(pfr.get_int32())
+            precision = pfr.get_float32()
+            uvs = SVFMesh._restore_map(SVFMesh._read_packed(pfr, vcount, 2), precision)
+            uvmaps.append({"name": uvmap_name, "file": uvmap_file, "uvs": uvs})
+
+        colors = None
+        for _ in range(attrs):
+            name = pfr.get_string(4)
+            assert name == "ATTR"
+            attr_name = pfr.get_string(pfr.get_int32())
+            precision = pfr.get_float32()
+            values = SVFMesh._restore_map(SVFMesh._read_packed(pfr, vcount, 4), precision)
+            if attr_name == "Color":
+                colors = values
+
+        return SVFMesh._create_mesh(header, indices, vertices, normals, uvmaps, colors)
+
+    @staticmethod
+    def _read_packed(pfr: [PackFileReader], count: int, size: int) -> np.ndarray:
+        """
+        Read an OpenCTM packed array: LZMA compressed, the bytes of the 32-bit items are interleaved
+        by byte significance then by component, most significant byte first
+        :param count: number of elements
+        :param size: number of components by element
+        :return: :class:`numpy.ndarray` of uint32 of shape (count, size)
+        """
+        packed_size = pfr.get_uint32()
+        props = pfr.buffer[pfr.offset:pfr.offset + 5]
+        packed = pfr.buffer[pfr.offset + 5:pfr.offset + 5 + packed_size]
+        pfr.seek(pfr.offset + 5 + packed_size)
+        length = count * size * 4
+        if length == 0:
+            return np.zeros((count, size), dtype=np.uint32)
+        # lc, lp, pb are packed in the first byte of the properties, the dictionary size in the 4 next
+        filters = [{"id": lzma.FILTER_LZMA1, "lc": props[0] % 9, "lp": props[0] // 9 % 5, "pb": props[0] // 45,
+                    "dict_size": max(int.from_bytes(props[1:5], "little"), 4096)}]
+        data = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=filters).decompress(packed, max_length=length)
+        if len(data) < length:
+            raise Exception("OpenCTM packed data is truncated")
+        planes = np.frombuffer(data, dtype=np.uint8).reshape(4, length // 4)
+        values = np.ascontiguousarray(planes.T).view('>u4').reshape(size, count)
+        return values.T.astype(np.uint32, order='C')
+
+    @staticmethod
+    def _run_cumsum(values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """
+        Running sum of values restarting where keys changes
+        """
+        total = np.cumsum(values)
+        starts = np.ones(len(keys), dtype=bool)
+        starts[1:] = keys[1:] != keys[:-1]
+        return total - (total - values)[starts][np.cumsum(starts) - 1]
+
+    @staticmethod
+    def _restore_indices(deltas: np.ndarray) -> np.ndarray:
+        """
+        Restore the triangle indices: the first index is a delta to the first index of the previous triangle,
+        the second a delta to the second of the previous triangle when both share the first index, else to the
+        first index, the third a delta to the first index
+        :param deltas: :class:`numpy.ndarray` of shape (triangles, 3)
+        :return: flat :class:`numpy.ndarray` of uint32
+        """
+        deltas = deltas.astype(np.int64)
+        indices = np.empty(deltas.shape, dtype=np.int64)
+        if len(deltas) > 0:
+            indices[:, 0] = np.cumsum(deltas[:, 0])
+            indices[:, 1] = indices[:, 0] + SVFMesh._run_cumsum(deltas[:, 1], indices[:, 0])
+            indices[:, 2] = indices[:, 0] + deltas[:, 2]
+        return (indices & 0xFFFFFFFF).astype(np.uint32).reshape(-1)
+
+    @staticmethod
+    def _restore_vertices(int_vertices: np.ndarray, grid_indices: np.ndarray, lower_bound: np.ndarray,
+                          higher_bound: np.ndarray, division: np.ndarray, precision: float) -> np.ndarray:
+        """
+        Restore the vertices from their grid box and integer position in the box, x is a delta to the previous
+        vertex when both are in the same box
+        :return: flat :class:`numpy.ndarray` of float32
+        """
+        division = division.astype(np.int64)
+        size = (higher_bound.astype(np.float64) - lower_bound) / division
+        box = np.empty((len(grid_indices), 3), dtype=np.int64)
+        box[:, 2] = grid_indices // (division[0] * division[1])
+        rest = grid_indices - box[:, 2] * division[0] * division[1]
+        box[:, 1] = rest // division[0]
+        box[:, 0] = rest - box[:, 1] * division[0]
+        positions = int_vertices.astype(np.int64)
+        positions[:, 0] = SVFMesh._run_cumsum(int_vertices[:, 0].view(np.int32).astype(np.int64), grid_indices)
+        vertices = lower_bound + box * size + precision * positions
+        return vertices.astype(np.float32).reshape(-1)
+
+    @staticmethod
+    def _smooth_normals(indices: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+        """
+        Average the unit normals of the triangles around every vertex
+        :return: :class:`numpy.ndarray` of shape (vertices, 3), unit length where not degenerated
+        """
+        points = vertices.reshape(-1, 3).astype(np.float64)
+        triangles = indices.reshape(-1, 3).astype(np.int64)
+        first = points[triangles[:, 0]]
+        normals = np.cross(points[triangles[:, 1]] - first, points[triangles[:, 2]] - first)
+        lengths = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+        normals[lengths > 1e-10] /= lengths[lengths > 1e-10, None]
+        corners = triangles.reshape(-1)
+        smooth = np.empty(points.shape, dtype=np.float64)
+        for axis in range(3):
+            smooth[:, axis] = np.bincount(corners, weights=np.repeat(normals[:, axis], 3), minlength=len(points))
+        lengths = np.sqrt(np.einsum('ij,ij->i', smooth, smooth))
+        smooth[lengths > 1e-10] /= lengths[lengths > 1e-10, None]
+        return smooth
+
+    @staticmethod
+    def _restore_normals(int_normals: np.ndarray, smooth: np.ndarray, precision: float) -> np.ndarray:
+        """
+        Restore the normals from magnitude, phi and theta, angles relative to a basis around the smooth normal
+        :return: flat :class:`numpy.ndarray` of float32
+        """
+        magnitude = int_normals[:, 0] * np.float64(precision)
+        int_phi = int_normals[:, 1].astype(np.int64)
+        int_theta = int_normals[:, 2].astype(np.int64)
+        theta = np.where(int_phi <= 4, (int_theta - 2) * (np.pi / 2),
+                         int_theta * (2 * np.pi) / np.maximum(int_phi, 1) - np.pi)
+        phi = int_phi * (precision * np.pi / 2)
+        sin_phi = magnitude * np.sin(phi)
+        nx = sin_phi * np.cos(theta)
+        ny = sin_phi * np.sin(theta)
+        nz = magnitude * np.cos(phi)
+        # basis around the smooth normal
+        s0, s1, s2 = smooth[:, 0], smooth[:, 1], smooth[:, 2]
+        bz = s1.copy()
+        by = s0 - s2
+        length = np.sqrt(2 * bz * bz + by * by)
+        large = length > 1e-20
+        by[large] /= length[large]
+        bz[large] /= length[large]
+        normals = np.empty(smooth.shape, dtype=np.float64)
+        normals[:, 0] = s0 * nz + (s1 * bz - s2 * by) * ny - bz * nx
+        normals[:, 1] = s1 * nz - (s2 + s0) * bz * ny + by * nx
+        normals[:, 2] = s2 * nz + (s0 * by + s1 * bz) * ny + bz * nx
+        # a zero phi is the smooth normal itself
+        normals[int_phi == 0] = smooth[int_phi == 0] * magnitude[int_phi == 0, None]
+        return normals.astype(np.float32).reshape(-1)
+
+    @staticmethod
+    def _restore_map(int_values: np.ndarray, precision: float) -> np.ndarray:
+        """
+        Restore a uv or attribute map of signed deltas to the previous vertex, in steps of precision
+        :return: flat :class:`numpy.ndarray` of float32
+        """
+        values = int_values.astype(np.int64)
+        values = np.where(values & 1, -((values + 1) >> 1), values >> 1)
+        return (np.cumsum(values, axis=0) * np.float64(precision)).astype(np.float32).reshape(-1)
 
     @staticmethod
     def parse_lines(pfr: [PackFileReader], entry_version) -> SVFLines:
@@ -217,7 +586,7 @@ class SVFMesh:
         return lines
 
     @staticmethod
-    def parse_points(self, pfr: [PackFileReader], entry_version) -> SVFPoints:
+    def parse_points(pfr: [PackFileReader], entry_version) -> SVFPoints:
         assert entry_version >= 2
         vertex_count = pfr.get_uint16()
         index_count = pfr.get_uint16()
@@ -28,14 +28,23 @@ from .Materials import Materials
 from .SVFMaterials import SVFMaterials
 from .SVFImage import SVFImage
 from .SVFMetadata import SVFMetadata
+from .SVFGeometryResolver import SVFGeometryResolver
 
 
 class SVFReader:
-    def __init__(self, urn, token, region="US"):
+    def __init__(self, urn, token, region="US", cache_dir: str = None):
+        """
+        :param urn: the urn of the model
+        :param token: the token authentication
+        :param region: the region of hub (default is US)
+        :param cache_dir: directory of a local :class:`DerivativeCache` shared by downloads and properties
+        """
         self.urn = urn
         self.token = token
         self.region = region
-        self.derivative = Derivative(self.urn, self.token, self.region)
+        self.cache_dir = cache_dir
+        self.derivative = Derivative(self.urn, self.token, self.region, cache_dir)
+        self._resolvers = {}
 
     def read_contents(self, manifest_item: [ManifestItem] = None) -> list[SVFContent]:
         contents = []
@@ -100,6 +109,28 @@ class SVFReader:
             meshes = SVFMesh.parse_mesh_from_urn(self.urn, self.token, self.region)
         return meshes
 
+    def get_geometry_for(self, db_ids: list[int], manifest_item: [ManifestItem] = None) -> dict:
+        """
+        Get the geometry of some objects without reading every mesh pack, only the packs referenced by
+        their fragments are downloaded and decoded, the decoded packs are cached between calls
+        :param db_ids: list of database ids
+        :param manifest_item: the manifest item (view) to read, default is the first manifest item
+        :return: dict of database id to the list of (:class:`Fragments`, mesh) of its fragments
+        """
+        return self.get_geometry_resolver(manifest_item).get_geometry_for(db_ids)
+
+    def get_geometry_resolver(self, manifest_item: [ManifestItem] = None) -> SVFGeometryResolver:
+        """
+        Get the lazy geometry resolver of a manifest item, one by manifest item is kept by the reader
+        :param manifest_item: the manifest item (view), default is the first manifest item
+        :return: :class:`SVFGeometryResolver`
+        """
+        if manifest_item is None:
+            manifest_item = self.read_svf_manifest_items()[0]
+        if manifest_item.guid not in self._resolvers:
+            self._resolvers[manifest_item.guid] = SVFGeometryResolver(self.derivative, manifest_item)
+        return self._resolvers[manifest_item.guid]
+
     def read_materials(self, manifest_item: [ManifestItem] = None) -> dict[str, list[Materials]]:
         materials = {}
         if manifest_item:
@@ -128,7 +159,7 @@ class SVFReader:
         return meta_datas
 
     def read_properties(self) -> PropReader:
-        return PropReader(self.urn, self.token, self.region)
+        return PropReader(self.urn, self.token, self.region, cache_dir=self.cache_dir)
 
     def download(self, output_dir, manifest_item: [ManifestItem] = None):
         if manifest_item:
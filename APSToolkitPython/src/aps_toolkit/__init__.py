@@ -3,21 +3,27 @@ from .Auth import Auth
 from .AuthGoogleColab import AuthGoogleColab
 from .BIM360 import BIM360
 from .ProDbReaderRevit import PropDbReaderRevit
+from .RevitQuery import RevitQuery
+from .RevitHierarchy import RevitHierarchy
 from .ProDbReaderCad import PropDbReaderCad
 from .ProDbReaderNavis import PropDbReaderNavis
 from .PropReader import PropReader
+from .PropColumns import PropColumns
 from .DbReader import DbReader
 from .Bucket import Bucket
 from .Token import Token
 from .Token import RevokeType, ClientType
 from .InputStream import InputStream
+from .JsonStream import JsonStream
 from .PackFileReader import PackFileReader
 from .SVFReader import SVFReader
 from .SVFContent import SVFContent
 from .Derivative import Derivative
+from .DerivativeCache import DerivativeCache
 from .Fragments import Fragments
 from .SVFGeometries import SVFGeometries
 from .SVFMesh import SVFMesh
+from .SVFGeometryResolver import SVFGeometryResolver
 from .SVFMaterials import SVFMaterials
 from .SVFImage import SVFImage
 from .SVFMetadata import SVFMetadata
@@ -20,6 +20,8 @@ from aps_toolkit import Fragments
 from aps_toolkit import SVFGeometries
 from aps_toolkit import SVFMesh
 from aps_toolkit import Derivative
+from aps_toolkit import DerivativeCache
+from aps_toolkit import JsonStream
 from aps_toolkit import SVFReader
 from aps_toolkit import SVFMaterials
 from aps_toolkit import SVFImage
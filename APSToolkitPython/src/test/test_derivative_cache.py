@@ -0,0 +1,59 @@
+from unittest import TestCase
+import os
+import tempfile
+from .context import DerivativeCache
+
+
+class TestDerivativeCache(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = DerivativeCache(self.cache_dir, max_size=100)
+
+    def test_make_key(self):
+        key = DerivativeCache.make_key("urn", "guid", "1.0")
+        self.assertEqual(key, DerivativeCache.make_key("urn", "guid", "1.0"))
+        self.assertNotEqual(key, DerivativeCache.make_key("urn", "guid", "2.0"))
+
+    def test_put_get_bytes(self):
+        key = DerivativeCache.make_key("urn", "file")
+        self.assertIsNone(self.cache.get_bytes(key))
+        self.cache.put_bytes(key, b"content")
+        self.assertEqual(self.cache.get_bytes(key), b"content")
+
+    def test_put_directory(self):
+        key = DerivativeCache.make_key("urn", "properties")
+
+        def write(path):
+            os.makedirs(path)
+            with open(os.path.join(path, "data.bin"), "wb") as f:
+                f.write(b"1234")
+
+        path = self.cache.put(key, write)
+        self.assertEqual(self.cache.get(key), path)
+        self.assertEqual(self.cache.size(), 4)
+
+    def test_evict_least_recently_used(self):
+        first = DerivativeCache.make_key("first")
+        second = DerivativeCache.make_key("second")
+        self.cache.put_bytes(first, b"a" * 60)
+        os.utime(self.cache.entry_path(first), (0, 0))
+        self.cache.put_bytes(second, b"b" * 60)
+        self.assertIsNone(self.cache.get(first))
+        self.assertIsNotNone(self.cache.get(second))
+
+    def test_size_from_index(self):
+        key = DerivativeCache.make_key("urn", "file")
+        self.cache.put_bytes(key, b"1234")
+        cache = DerivativeCache(self.cache_dir, max_size=100)
+        self.assertEqual(cache.size(), 4)
+        os.remove(cache.entry_path(key))
+        self.assertIsNone(cache.get_bytes(key))
+        self.assertEqual(cache.entries(), [])
+        self.assertEqual(cache.size(), 0)
+
+    def test_remove_temp(self):
+        temp_path = os.path.join(self.cache_dir, ".key.0.tmp")
+        os.makedirs(temp_path)
+        os.utime(temp_path, (0, 0))
+        DerivativeCache(self.cache_dir)
+        self.assertFalse(os.path.exists(temp_path))
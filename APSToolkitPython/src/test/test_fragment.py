@@ -17,6 +17,15 @@ class TestFragment(TestCase):
         fragment = Fragments.parse_fragments(buffer)
         self.assertNotEquals(len(fragment), 0)
 
+    def test_parse_fragments_array(self):
+        with open(self.file_path, 'rb') as f:
+            buffer = f.read()
+        fragments = Fragments.parse_fragments_array(buffer)
+        self.assertNotEquals(len(fragments), 0)
+        fragment = Fragments.parse_fragments(buffer)[0]
+        self.assertEqual(fragments["dbID"][0], fragment.dbID)
+        self.assertEqual(fragments["bbox"][0].tolist(), fragment.bbox)
+
     def test_parse_fragments_from_file(self):
         fragment = Fragments.parse_fragments_from_file(self.file_path)
         self.assertNotEquals(len(fragment), 0)
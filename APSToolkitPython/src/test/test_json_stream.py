@@ -0,0 +1,32 @@
+from unittest import TestCase
+import gzip
+import json
+from .context import JsonStream
+
+
+class TestJsonStream(TestCase):
+    def setUp(self):
+        self.values = [0, "Wall, Basic", 1.5, None, True, "quote \" and ]", [1, [2, 3]], {"a": "b,c"}, -7, "é"]
+        self.data = gzip.compress(json.dumps(self.values).encode("utf-8"))
+
+    def test_load_gzip(self):
+        for chunk_size in [1, 2, 3, 7, 64]:
+            self.assertEqual(JsonStream.load_gzip(self.data, chunk_size), self.values)
+
+    def test_iter_gzip_batches(self):
+        batches = list(JsonStream.iter_gzip_batches(self.data, chunk_size=8))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([value for batch in batches for value in batch], self.values)
+
+    def test_empty_array(self):
+        self.assertEqual(JsonStream.load_gzip(gzip.compress(b" [ ] ")), [])
+
+    def test_invalid(self):
+        self.assertRaises(Exception, JsonStream.load_gzip, gzip.compress(b"{}"))
+        self.assertRaises(Exception, JsonStream.load_gzip, gzip.compress(b"[1, 2"))
+
+    def test_split_in_strings(self):
+        values = ["a,b", "[", "back\\", "\\\",", {"k": ["]", ","]}, ""] * 20
+        data = gzip.compress(json.dumps(values).encode("utf-8"))
+        for chunk_size in [1, 5, 13, 100]:
+            self.assertEqual(JsonStream.load_gzip(data, chunk_size), values)
@@ -1,6 +1,12 @@
 from unittest import TestCase
+import gzip
+import lzma
+import math
+import struct
+import numpy as np
 from .context import SVFMesh
 from .context import Auth
+from .context import Derivative
 
 
 class TestMesh(TestCase):
@@ -13,6 +19,239 @@ class TestMesh(TestCase):
         mesh = SVFMesh.parse_mesh_from_file(self.file_path)
         self.assertNotEquals(len(mesh), 0)
 
+    def test_parse_mesh_raw_arrays(self):
+        meshes = [mesh for mesh in SVFMesh.parse_mesh_from_file(self.file_path) if isinstance(mesh, SVFMesh)]
+        self.assertNotEquals(len(meshes), 0)
+        mesh = meshes[0]
+        self.assertEqual(len(mesh.indices), mesh.t_count * 3)
+        self.assertEqual(mesh.vertices.reshape(-1, 3).min(axis=0).tolist(), mesh.min)
+
+    def test_parse_mesh_compressed(self):
+        meshes = SVFMesh.parse_mesh_from_urn(self.urn, self.token)
+        for meshes_item in meshes.values():
+            self.assertNotIn(None, meshes_item)
+
+    def test_iter_mesh_packs(self):
+        derivative = Derivative(self.urn, self.token)
+        manifest_item = derivative.read_svf_manifest_items()[0]
+        pack_ids = []
+        for pack_id, meshes in SVFMesh.iter_mesh_packs(derivative, manifest_item, max_inflight=4, workers=2):
+            self.assertNotEquals(len(meshes), 0)
+            pack_ids.append(pack_id)
+        self.assertEqual(len(pack_ids), len(set(pack_ids)))
+        self.assertNotEquals(len(pack_ids), 0)
+
     def test_parse_mesh_from_urn(self):
         mesh = SVFMesh.parse_mesh_from_urn(self.urn, self.token)
         self.assertNotEquals(len(mesh), 0)
+
+
+class TestMeshCompressed(TestCase):
+    """
+    Encode a small mesh in RAW, MG1 and MG2 OpenCTM entries and compare the decoded meshes, no download
+    """
+
+    def setUp(self):
+        rnd = np.random.default_rng(1)
+        xs, ys = np.meshgrid(np.arange(8), np.arange(8))
+        vertices = np.stack([xs.ravel() * 0.37, ys.ravel() * 0.41,
+                             np.sin(xs.ravel() * 0.3) * np.cos(ys.ravel() * 0.2) * 3], 1) + rnd.normal(0, 0.01, (64, 3))
+        # float32 as in a mesh, the bounds of the MG2 grid are float32
+        self.vertices = vertices.astype(np.float32).astype(np.float64)
+        self.triangles = [triangle for i in range(56) if i % 8 != 7
+                          for triangle in [(i, i + 1, i + 8), (i + 1, i + 9, i + 8)]]
+        normals = rnd.normal(0, 1, (64, 3))
+        normals[:, 2] = np.abs(normals[:, 2]) + 2
+        self.normals = normals / np.linalg.norm(normals, axis=1)[:, None]
+        self.uvs = rnd.random((64, 2))
+        self.colors = rnd.random((64, 4))
+
+    @staticmethod
+    def varint(value):
+        out = bytearray()
+        while True:
+            byte, value = value & 0x7F, value >> 7
+            out.append(byte | 0x80 if value else byte)
+            if not value:
+                return bytes(out)
+
+    @staticmethod
+    def string(value):
+        data = value.encode("utf-8")
+        return TestMeshCompressed.varint(len(data)) + data
+
+    @staticmethod
+    def int_string(value):
+        data = value.encode("utf-8")
+        return struct.pack("<i", len(data)) + data
+
+    @staticmethod
+    def pack(bodies):
+        """
+        Write a gzip mesh pack of OpenCTM entries
+        """
+        string = TestMeshCompressed.string
+        body = bytearray(string("Autodesk.CloudPlatform.PackFile") + struct.pack("<i", 1))
+        offsets = []
+        for entry in bodies:
+            offsets.append(len(body))
+            body += struct.pack("<I", 0) + entry
+        entries_offset = len(body)
+        body += TestMeshCompressed.varint(len(offsets)) + b"".join(struct.pack("<I", offset) for offset in offsets)
+        types_offset = len(body)
+        body += TestMeshCompressed.varint(1) + string("Autodesk.CloudPlatform.Geometry")
+        body += string("Autodesk.CloudPlatform.OpenCTM") + TestMeshCompressed.varint(1)
+        body += struct.pack("<II", entries_offset, types_offset)
+        return gzip.compress(bytes(body))
+
+    @staticmethod
+    def packed(values):
+        """
+        Write an array of 32 bits integers as OpenCTM does: big endian bytes interleaved by plane, LZMA1 raw
+        """
+        values = np.asarray(values, dtype=np.int64).astype(np.uint32)
+        if values.ndim == 1:
+            values = values[:, None]
+        planes = np.frombuffer(values.T.reshape(-1).astype(">u4").tobytes(), np.uint8).reshape(-1, 4).T
+        lc, lp, pb, dict_size = 3, 0, 2, 1 << 16
+        data = lzma.compress(planes.tobytes(), format=lzma.FORMAT_RAW, filters=[
+            {"id": lzma.FILTER_LZMA1, "lc": lc, "lp": lp, "pb": pb, "dict_size": dict_size}])
+        return struct.pack("<I", len(data)) + bytes([(pb * 5 + lp) * 9 + lc]) + struct.pack("<I", dict_size) + data
+
+    @staticmethod
+    def header(method, vertex_count, triangle_count):
+        return (b"OCTM" + struct.pack("<i", 5) + method + struct.pack("<5i", vertex_count, triangle_count, 1, 1, 1)
+                + TestMeshCompressed.int_string(""))
+
+    @staticmethod
+    def sorted_triangles(triangles):
+        """
+        Rotate every triangle to start with its lowest index and sort them, as the MG1 and MG2 encoders do
+        """
+        rotated = []
+        for a, b, c in triangles:
+            while a != min(a, b, c):
+                a, b, c = b, c, a
+            rotated.append((a, b, c))
+        return sorted(rotated)
+
+    @staticmethod
+    def index_deltas(triangles):
+        deltas = []
+        previous = None
+        for a, b, c in triangles:
+            if previous is None:
+                deltas.append((a, b - a, c - a))
+            else:
+                deltas.append((a - previous[0], b - (previous[1] if a == previous[0] else a), c - a))
+            previous = (a, b)
+        return deltas
+
+    def raw(self, vertices, triangles, normals, uvs, colors):
+        body = self.header(b"RAW\0", len(vertices), len(triangles))
+        body += b"INDX" + np.asarray(triangles, dtype="<u4").tobytes()
+        body += b"VERT" + np.asarray(vertices, dtype="<f4").tobytes()
+        body += b"NORM" + np.asarray(normals, dtype="<f4").tobytes()
+        body += b"TEXC" + self.int_string("uv") + self.int_string("") + np.asarray(uvs, dtype="<f4").tobytes()
+        body += b"ATTR" + self.int_string("Color") + np.asarray(colors, dtype="<f4").tobytes()
+        return body
+
+    def mg1(self, vertices, triangles, normals, uvs, colors):
+        body = self.header(b"MG1\0", len(vertices), len(triangles))
+        body += b"INDX" + self.packed(self.index_deltas(triangles))
+        body += b"VERT" + self.packed(np.asarray(vertices, np.float32).reshape(-1).view(np.uint32))
+        body += b"NORM" + self.packed(np.asarray(normals, np.float32).view(np.uint32))
+        body += b"TEXC" + self.int_string("uv") + self.int_string("") + self.packed(
+            np.asarray(uvs, np.float32).view(np.uint32))
+        body += b"ATTR" + self.int_string("Color") + self.packed(np.asarray(colors, np.float32).view(np.uint32))
+        return body
+
+    def mg2(self, vertex_precision, normal_precision, uv_precision, color_precision):
+        """
+        Encode the mesh in a grid of 2 x 2 x 1 boxes. The vertices are sorted by box then x as the MG2 encoder
+        does, so the mesh is also returned in that order to be compared.
+        :return: tuple of (MG2 body, vertices, triangles, normals, uvs, colors) in the order of the MG2 body
+        """
+        divisions = np.array([2, 2, 1])
+        low, high = self.vertices.min(0).astype(np.float32), self.vertices.max(0).astype(np.float32)
+        size = (high.astype(np.float64) - low) / divisions
+        boxes = np.minimum(np.floor((self.vertices - low) / size).astype(np.int64), divisions - 1)
+        grid = boxes[:, 0] + boxes[:, 1] * divisions[0] + boxes[:, 2] * divisions[0] * divisions[1]
+        positions = np.floor((self.vertices - (low + boxes * size)) / vertex_precision + 0.5).astype(np.int64)
+        order = np.lexsort((positions[:, 0], grid))
+        remap = np.empty(len(order), dtype=np.int64)
+        remap[order] = np.arange(len(order))
+        grid, positions, boxes = grid[order], positions[order], boxes[order]
+        triangles = self.sorted_triangles([(remap[a], remap[b], remap[c]) for a, b, c in self.triangles])
+        delta_x = positions[:, 0].copy()
+        same_box = np.r_[False, grid[1:] == grid[:-1]]
+        delta_x[same_box] = positions[same_box, 0] - positions[np.flatnonzero(same_box) - 1, 0]
+        # the normals are relative to the smooth normals of the quantized vertices, as the decoder computes them
+        quantized = (low + boxes * size + vertex_precision * positions).astype(np.float32).astype(np.float64)
+        smooth = np.zeros((len(quantized), 3))
+        for a, b, c in triangles:
+            normal = np.cross(quantized[b] - quantized[a], quantized[c] - quantized[a])
+            smooth[[a, b, c]] += normal / np.linalg.norm(normal)
+        smooth /= np.linalg.norm(smooth, axis=1)[:, None]
+        normals = self.normals[order]
+        packed_normals = []
+        for normal, s in zip(normals, smooth):
+            bz, by = s[1], s[0] - s[2]
+            length = math.sqrt(2 * bz * bz + by * by)
+            bz, by = bz / length, by / length
+            u = np.array([s[1] * bz - s[2] * by, -(s[2] + s[0]) * bz, s[0] * by + s[1] * bz])
+            v = np.array([-bz, by, bz])
+            magnitude = np.linalg.norm(normal)
+            phi = math.acos(max(-1.0, min(1.0, normal @ s / magnitude)))
+            theta = math.atan2(normal @ u, normal @ v)
+            i_phi = int(math.floor(phi / (normal_precision * math.pi / 2) + 0.5))
+            if i_phi == 0:
+                i_theta = 0
+            elif i_phi <= 4:
+                i_theta = int(math.floor(theta / (math.pi / 2) + 2 + 0.5)) % 4
+            else:
+                i_theta = int(math.floor((theta + math.pi) * i_phi / (2 * math.pi) + 0.5)) % i_phi
+            packed_normals.append((int(math.floor(magnitude / normal_precision + 0.5)), i_phi, i_theta))
+
+        def signed_deltas(values, precision):
+            deltas = np.diff(np.floor(values / precision + 0.5).astype(np.int64), axis=0, prepend=0)
+            return np.where(deltas >= 0, deltas << 1, ((-deltas) << 1) - 1)
+
+        uvs, colors = self.uvs[order], self.colors[order]
+        body = self.header(b"MG2\0", len(quantized), len(triangles))
+        body += b"MG2H" + struct.pack("<2f", vertex_precision, normal_precision)
+        body += low.astype("<f4").tobytes() + high.astype("<f4").tobytes() + divisions.astype("<u4").tobytes()
+        body += b"VERT" + self.packed(np.stack([delta_x, positions[:, 1], positions[:, 2]], 1))
+        body += b"GIDX" + self.packed(np.diff(grid, prepend=0))
+        body += b"INDX" + self.packed(self.index_deltas(triangles))
+        body += b"NORM" + self.packed(packed_normals)
+        body += b"TEXC" + self.int_string("uv") + self.int_string("") + struct.pack("<f", uv_precision)
+        body += self.packed(signed_deltas(uvs, uv_precision))
+        body += b"ATTR" + self.int_string("Color") + struct.pack("<f", color_precision)
+        body += self.packed(signed_deltas(colors, color_precision))
+        return body, self.vertices[order], triangles, normals, uvs, colors
+
+    def test_parse_mesh_mg1(self):
+        triangles = self.sorted_triangles(self.triangles)
+        mesh = (self.vertices, triangles, self.normals, self.uvs, self.colors)
+        raw, mg1 = SVFMesh.parse_mesh(self.pack([self.raw(*mesh), self.mg1(*mesh)]))
+        self.assertTrue(np.array_equal(mg1.indices, raw.indices))
+        self.assertTrue(np.array_equal(mg1.vertices, raw.vertices))
+        self.assertTrue(np.allclose(mg1.normals, raw.normals, atol=1e-6))
+        self.assertTrue(np.array_equal(mg1.uv_maps[0]["uvs"], raw.uv_maps[0]["uvs"]))
+        self.assertTrue(np.array_equal(mg1.colors, raw.colors))
+        self.assertEqual(mg1.min, raw.min)
+        self.assertEqual(mg1.max, raw.max)
+
+    def test_parse_mesh_mg2(self):
+        vertex_precision, normal_precision, uv_precision, color_precision = 1 / 1024, 1 / 256, 1 / 4096, 1 / 256
+        body, *mesh = self.mg2(vertex_precision, normal_precision, uv_precision, color_precision)
+        vertices, triangles, normals, uvs, colors = mesh
+        raw, mg2 = SVFMesh.parse_mesh(self.pack([self.raw(vertices, triangles, normals, uvs, colors), body]))
+        self.assertTrue(np.array_equal(mg2.indices, raw.indices))
+        self.assertTrue(np.allclose(mg2.vertices, raw.vertices, atol=vertex_precision))
+        # the angles are rounded to normal_precision * pi / 2
+        self.assertTrue(np.allclose(mg2.normals, raw.normals, atol=normal_precision * 5))
+        self.assertTrue(np.allclose(mg2.uv_maps[0]["uvs"], raw.uv_maps[0]["uvs"], atol=uv_precision))
+        self.assertTrue(np.allclose(mg2.colors, raw.colors, atol=color_precision))
+
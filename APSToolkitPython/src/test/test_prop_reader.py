@@ -1,5 +1,9 @@
 ﻿from unittest import TestCase
+import gzip
+import json
 import os
+import shutil
+import tempfile
 from .context import PropReader
 from .context import Auth
 
@@ -21,6 +25,22 @@ class TestPropDbReader(TestCase):
         path = r"C:\Users\vho2\AppData\Local\Temp\output\output\Resource"
         prop = PropReader.read_from_resource(path)
         self.assertNotEqual(prop.ids, 0)
+
+    def test_convert_resource(self):
+        path = r"C:\Users\vho2\AppData\Local\Temp\output\output\Resource"
+        columns_path = PropReader.convert_resource(path)
+        self.assertTrue(os.path.exists(columns_path))
+        prop = PropReader.read_from_resource(path)
+        self.assertTrue(prop.columnar)
+        expected = PropReader.read_from_resource(path, columnar=False)
+        self.assertEqual(prop.get_properties(1), expected.get_properties(1))
+        self.assertEqual(prop.ids[0], expected.ids[0])
+
+    def test_read_columnar(self):
+        prop_reader = PropReader(self.urn, self.token, columnar=True)
+        self.assertEqual(prop_reader.get_properties(14), self.prop_reader.get_properties(14))
+        self.assertEqual(prop_reader.get_all_properties_names(), self.prop_reader.get_all_properties_names())
+
     def test_enumerate_properties(self):
         properties = self.prop_reader.enumerate_properties(14)
         self.assertNotEquals(properties, 0)
@@ -29,6 +49,22 @@ class TestPropDbReader(TestCase):
         ids = self.prop_reader.get_recursive_ids([14, 15])
         self.assertNotEquals(len(ids), 0)
 
+    def test_to_eav_frame(self):
+        eav = self.prop_reader.to_eav_frame([14, 15])
+        self.assertEqual(list(eav.columns), ["dbId", "attr_id", "value_id"])
+        self.assertEqual(len(eav), len(self.prop_reader.enumerate_properties(14)) + len(
+            self.prop_reader.enumerate_properties(15)))
+
+    def test_pivot_wide(self):
+        eav = self.prop_reader.to_eav_frame([14, 15])
+        df = self.prop_reader.pivot_wide(eav)
+        self.assertEqual(df["dbId"].tolist(), [14, 15])
+        self.assertEqual(df.iloc[0]["name"], self.prop_reader.get_all_properties(14)["name"])
+
+    def test_get_all_data(self):
+        df = self.prop_reader.get_all_data()
+        self.assertNotEquals(len(df), 0)
+
     def test_get_all_properties_names(self):
         properties = self.prop_reader.get_all_properties_names()
         self.assertNotEquals(len(properties), 0)
@@ -37,6 +73,15 @@ class TestPropDbReader(TestCase):
         properties = self.prop_reader.get_properties(14)
         self.assertNotEquals(properties, 0)
 
+    def test_get_properties_bulk(self):
+        properties = self.prop_reader.get_properties_bulk([14, 15])
+        self.assertEqual(set(properties["dbId"].tolist()), {14, 15})
+        self.assertEqual(dict(zip(properties["name"][properties["dbId"] == 14],
+                                  properties["value"][properties["dbId"] == 14])),
+                         self.prop_reader.get_properties(14))
+        names = self.prop_reader.get_properties_bulk([14], names=["name"])["name"]
+        self.assertTrue((names == "name").all())
+
     def test_get_all_properties(self):
         properties = self.prop_reader.get_all_properties(1)
         self.assertNotEquals(properties, 0)
@@ -52,6 +97,7 @@ class TestPropDbReader(TestCase):
     def test_get_attributes_table(self):
         df = self.prop_reader.get_attributes_table()
         self.assertNotEquals(df.empty, True)
+        self.assertIs(self.prop_reader.get_attributes_table(), df)
 
     def test_get_avs_table(self):
         # TODO
@@ -65,6 +111,9 @@ class TestPropDbReader(TestCase):
     def test_get_property_values_by_names(self):
         values = self.prop_reader.get_property_values_by_names(["Comments", "name"])
         self.assertNotEquals(len(values), 0)
+        self.assertEqual(len(values["name"]), len(set(values["name"])))
+        # the second call is served by the inverted index built by the first one
+        self.assertEqual(self.prop_reader.get_property_values_by_names(["Comments", "name"]), values)
 
     def test_get_property_values_by_display_names(self):
         values = self.prop_reader.get_property_values_by_display_names(["Category", "Name"])
@@ -81,3 +130,76 @@ class TestPropDbReader(TestCase):
     def test_get_parent(self):
         parent = self.prop_reader.get_parent(1)
         self.assertEquals(len(parent), 0)
+
+    def test_get_children_parent_link(self):
+        children = self.prop_reader.get_children(1)
+        for child in children:
+            self.assertEqual(self.prop_reader.get_parent(child), [1])
+
+    def test_get_internal_ref(self):
+        reference = self.prop_reader.get_internal_ref(1)
+        self.assertEquals(len(reference), 0)
+
+    def test_traverse(self):
+        ids = list(self.prop_reader.traverse([1], lambda id: ([id], True)))
+        self.assertEqual(ids[0], 1)
+        self.assertEqual(ids[1:1 + 1], self.prop_reader.get_children(1)[:1])
+
+    def test_preorder_ids(self):
+        ids = self.prop_reader._preorder_ids([1])
+        self.assertEqual(ids, list(self.prop_reader.traverse([1], lambda id: ([id], True))))
+
+
+class TestPropReaderResource(TestCase):
+    """
+    Convert a small Resource folder written in a temporary directory, no download
+    """
+
+    def setUp(self):
+        self.resource_dir = os.path.join(tempfile.mkdtemp(), "Resource")
+        os.makedirs(self.resource_dir)
+        attrs = [0, ["name", "__name__", 20, None, None, "name", 0, None, None],
+                 ["parent", "__parent__", 11, None, None, "parent", 0, None, None],
+                 ["Width", "Dimensions", 3, "autodesk.unit.unit:millimeters-1.0.1", None, "Width", 0, None, None]]
+        vals = [0, "Model", "Wall", 1, 250.0]
+        self.write_tables([0, "root-id", "wall-id"], [0, 0, 1, 4], [1, 1, 1, 2, 2, 3, 3, 4], attrs, vals)
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.resource_dir), ignore_errors=True)
+
+    def write_tables(self, ids, offs, avs, attrs, vals):
+        for name, table in zip(["ids", "offs", "avs", "attrs", "vals"], [ids, offs, avs, attrs, vals]):
+            with open(os.path.join(self.resource_dir, f"objects_{name}.json.gz"), "wb") as f:
+                f.write(gzip.compress(json.dumps(table).encode("utf-8")))
+
+    def test_convert_resource(self):
+        expected = PropReader.read_from_resource(self.resource_dir)
+        self.assertFalse(expected.columnar)
+        columns_path = PropReader.convert_resource(self.resource_dir)
+        prop = PropReader.read_from_resource(self.resource_dir)
+        self.assertTrue(prop.columnar)
+        self.assertEqual(prop.ids[0], 0)
+        self.assertEqual(list(prop.ids), list(expected.ids))
+        for db_id in [1, 2]:
+            self.assertEqual(prop.get_properties(db_id), expected.get_properties(db_id))
+        # a second conversion replaces the sidecar folder
+        self.assertEqual(PropReader.convert_resource(self.resource_dir), columns_path)
+        self.assertEqual([name for name in os.listdir(self.resource_dir) if not name.endswith(".json.gz")],
+                         [os.path.basename(columns_path)])
+
+    def test_convert_resource_stale(self):
+        columns_path = PropReader.convert_resource(self.resource_dir)
+        # the json files changed after the conversion
+        modified_time = os.path.getmtime(os.path.join(self.resource_dir, "objects_ids.json.gz"))
+        os.utime(os.path.join(columns_path, "columns.json"), (modified_time - 10, modified_time - 10))
+        self.assertFalse(PropReader.read_from_resource(self.resource_dir).columnar)
+        PropReader.convert_resource(self.resource_dir)
+        self.assertTrue(PropReader.read_from_resource(self.resource_dir).columnar)
+
+    def test_convert_resource_empty(self):
+        self.write_tables([0], [0], [], [0], [0])
+        PropReader.convert_resource(self.resource_dir)
+        prop = PropReader.read_from_resource(self.resource_dir)
+        self.assertTrue(prop.columnar)
+        self.assertEqual(list(prop.ids), [0])
+        self.assertEqual(len(prop.avs), 0)
@@ -33,6 +33,8 @@ class TestPropDbReader(TestCase):
     def test_get_data_by_categories(self):
         df = self.prop_reader.get_data_by_categories(["Lines", "Circles"])
         self.assertNotEquals(df.empty, True)
+        self.assertEqual(len(df), len(self.prop_reader.get_data_by_category("Lines")) + len(
+            self.prop_reader.get_data_by_category("Circles")))
 
     def test_get_data_by_categories_and_params(self):
         df = self.prop_reader.get_data_by_categories_and_params(["Lines", "Circles"], ["Name", "Layer", "Color", "type"])
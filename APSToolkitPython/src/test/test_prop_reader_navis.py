@@ -36,6 +36,13 @@ class TestPropDbReaderNavis(TestCase):
     def test_get_all_data_by_resources(self):
         data = self.prop_reader.get_all_data_resources()
         self.assertIsNotNone(data)
+        self.assertTrue(set(data["ModelName"]) <= set(self.prop_reader.get_all_sources_files()))
+
+    def test_iter_data_by_resources(self):
+        sources = self.prop_reader.get_all_sources_files()
+        for df in self.prop_reader.iter_data_by_resources(["Element"]):
+            self.assertEqual(df["ModelName"].nunique(), 1)
+            self.assertIn(df["ModelName"].iloc[0], sources)
 
     def test_get_data_by_resources_categories(self):
         data = self.prop_reader.get_data_resources_by_categories(["Element"])
@@ -40,6 +40,16 @@ class TestPropDbReaderRevit(TestCase):
         print(categories)
         self.assertNotEquals(categories, 0)
 
+    def test_get_hierarchy(self):
+        hierarchy = self.prop_reader.get_hierarchy()
+        self.assertIs(hierarchy, self.prop_reader.get_hierarchy())
+        self.assertEqual(list(hierarchy.category_ids), list(self.prop_reader.get_all_categories()))
+        type_id = int(hierarchy.type_ids[0])
+        category_id, family_id = hierarchy.type_parents[type_id]
+        self.assertIn(category_id, hierarchy.categories)
+        self.assertEqual(hierarchy.family_categories[family_id], category_id)
+        self.assertEqual(list(hierarchy.get_instances(type_id)), self.prop_reader.get_children(type_id))
+
     def test_get_all_families(self):
         families = self.prop_reader.get_all_families()
         self.assertNotEquals(families, 0)
@@ -60,6 +70,26 @@ class TestPropDbReaderRevit(TestCase):
         data = self.prop_reader.get_all_data(display_unit=True)
         self.assertIsNotNone(data)
 
+    def test_get_all_data_unit_column(self):
+        data = self.prop_reader.get_data_by_parameters(["Name", "Width", "Height"], True, unit_column=True)
+        self.assertNotEquals(data.empty, True)
+        for column in ["Width", "Height"]:
+            if column in data.columns:
+                self.assertEqual(data.columns[data.columns.get_loc(column) + 1], f"{column} Unit")
+
+    def test_get_all_data_typed_columns(self):
+        data = self.prop_reader.get_data_by_categories(["Doors", "Windows"], typed_columns=True)
+        self.assertNotEquals(data.empty, True)
+        self.assertEqual(data["Category"].dtype, "category")
+        self.assertLess(data.memory_usage(deep=True).sum(),
+                        self.prop_reader.get_data_by_categories(["Doors", "Windows"]).memory_usage(deep=True).sum())
+
+    def test_type_cache_info(self):
+        self.prop_reader.get_data_by_category("Doors")
+        info = self.prop_reader.type_cache_info()
+        self.assertGreater(info["hits"] + info["misses"], 0)
+        self.assertLessEqual(info["currsize"], info["maxsize"])
+
     def test_get_bounding_boxs(self):
         bounding_boxes = self.prop_reader.get_all_bounding_boxs()
         self.assertNotEquals(len(bounding_boxes), 0)
@@ -74,6 +104,11 @@ class TestPropDbReaderRevit(TestCase):
         df = self.prop_reader.get_data_by_categories(["Doors", "Windows"], is_add_family_name=True)
         self.assertNotEquals(df.empty, True)
 
+    def test_get_data_by_categories_workers(self):
+        categories = ["Doors", "Windows", "Furniture"]
+        df = self.prop_reader.get_data_by_categories(categories, is_add_family_name=True, workers=2)
+        self.assertTrue(df.equals(self.prop_reader.get_data_by_categories(categories, is_add_family_name=True)))
+
     # noinspection PyInterpreter
     def test_get_data_by_family(self):
         family_name = "Seating-LAMMHULTS-PENNE-Chair"
@@ -102,6 +137,12 @@ class TestPropDbReaderRevit(TestCase):
         df = self.prop_reader.get_data_by_categories_and_params(categories, params, True, display_unit=False)
         self.assertNotEquals(df.empty, True)
 
+    def test_select_where(self):
+        df = self.prop_reader.select(["Name", "Width", "Height"]).where(["Doors", "Windows"]).execute()
+        self.assertNotEquals(df.empty, True)
+        self.assertEqual(list(df.columns[:2]), ["dbId", "external_id"])
+        self.assertTrue(set(df.columns[2:]) <= {"Name", "Width", "Height"})
+
     def test_get_data_by_parameters(self):
         df = self.prop_reader.get_data_by_parameters(["Name", "Category", "ElementId", "Width", "Height",
                                                       "IfcGUID", "Family Name"], True)
@@ -118,10 +159,34 @@ class TestPropDbReaderRevit(TestCase):
         self.assertIsNotNone(parameters)
         self.assertNotEquals(len(parameters), 0)
 
+    def test_get_data_by_element_ids(self):
+        df = self.prop_reader.get_data_by_element_ids([289790, 289791, -1])
+        self.assertNotEquals(df.empty, True)
+        self.assertIn("ElementId", df.columns)
+        self.assertEqual(len(df), 3)
+        self.assertEqual(df["dbId"].tolist()[2], -1)
+        self.assertEqual(df["element_id"].tolist(), [289790, 289791, -1])
+
+    def test_get_data_by_external_ids(self):
+        external_ids = ["652ae298-920d-4c0c-a25b-0f9dc79857d7-000fafee", "nope"]
+        df = self.prop_reader.get_data_by_external_ids(external_ids)
+        self.assertNotEquals(df.empty, True)
+
+    def test_get_db_ids(self):
+        external_id = "652ae298-920d-4c0c-a25b-0f9dc79857d7-000fafee"
+        db_ids = self.prop_reader.get_db_ids([external_id, "nope"])
+        self.assertEqual(db_ids, [self.prop_reader.get_db_id(external_id), -1])
+        db_id = self.prop_reader.get_db_ids_by_element_ids([289790])[0]
+        self.assertNotEqual(db_id, -1)
+        ifc_guid = self.prop_reader.get_properties(db_id).get("IfcGUID")
+        self.assertEqual(self.prop_reader.get_db_ids_by_ifc_guids([ifc_guid]), [db_id])
+
     def test_get_all_parametes(self):
         parameters = self.prop_reader.get_all_parameters()
         self.assertNotEquals(parameters, 0)
 
     def test_get_units_mapping(self):
         units = self.prop_reader.get_units_mapping()
-        self.assertNotEquals(units, 0)
\ No newline at end of file
+        self.assertNotEquals(units, 0)
+        self.assertEqual(len(units), len(self.prop_reader.get_attributes_table()))
+        self.assertIs(self.prop_reader.get_units_mapping(), units)
\ No newline at end of file
@@ -33,6 +33,18 @@ class TestSVFReader(TestCase):
         fragments = self.reader.read_fragments(manifest_items[0])
         self.assertTrue(len(fragments) > 0)
 
+    def test_get_geometry_for(self):
+        manifest_items = self.reader.read_svf_manifest_items()
+        db_ids = self.reader.get_geometry_resolver(manifest_items[0]).get_fragments()["dbID"][:10].tolist()
+        geometry = self.reader.get_geometry_for(db_ids, manifest_items[0])
+        self.assertEqual(set(geometry), set(db_ids))
+        for fragment, mesh in geometry[db_ids[0]]:
+            self.assertEqual(fragment.dbID, db_ids[0])
+            self.assertIsNotNone(mesh)
+        info = self.reader.get_geometry_resolver(manifest_items[0]).pack_cache_info()
+        self.assertGreater(info["misses"], 0)
+        self.assertLessEqual(info["currsize"], info["maxsize"])
+
     def test_read_geometries(self):
         geometries = self.reader.read_geometries()
         self.assertTrue(len(geometries) > 0)